@@ -0,0 +1,39 @@
+"""
+Per-call latency of IB_LTP with a new TCP connection per call (bare requests.post,
+as IB_APIS used to do) versus the shared keep-alive session.
+
+Run from the repo root:  python -m benchmarks.bench_bridge_pool
+"""
+import time
+import requests
+from benchmarks.fake_bridge import start_fake_bridge
+from utils.pyIB_APIS import IB_APIS
+
+CALLS = 2000
+
+
+def _per_call_ms(fn):
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        fn()
+    return (time.perf_counter() - start) * 1000.0 / CALLS
+
+
+def main():
+    server, url = start_fake_bridge()
+    data = {"Exchange": "NFO", "Symbol": "NIFTY 27-NOV-2025 CE 24000", "DataProvider": ""}
+    try:
+        cold = _per_call_ms(lambda: float(requests.post(url + "/LTP", data=data).json()["response"]))
+        bridge = IB_APIS(url)
+        pooled = _per_call_ms(lambda: bridge.IB_LTP(data["Exchange"], data["Symbol"]))
+    finally:
+        server.shutdown()
+
+    print(f"new connection per call : {cold:.3f} ms/call")
+    print(f"pooled keep-alive       : {pooled:.3f} ms/call")
+    print(f"speed-up                : {cold / pooled:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
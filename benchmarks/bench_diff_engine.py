@@ -0,0 +1,87 @@
+"""
+Per-tick diff cost for 10 / 100 / 1000 strategies: calculate_per_ratio_diff
+called once per strategy versus one DiffEngine.evaluate() pass, with a check
+that both give exactly the same diffs. Then the pass the tick loop usually
+makes: only the strategies whose prices moved, DUE of them per cycle; up to
+SCALAR_MAX_ROWS of those the engine evaluates them one by one without numpy.
+
+Run from the repo root:  python -m benchmarks.bench_diff_engine
+"""
+import random
+import time
+import strategies.compiled as compiled_mod
+from strategies.compiled import CompiledStrategy
+from strategies.diff_engine import DiffEngine, SCALAR_MAX_ROWS
+from utils.strategy_helpers import calculate_per_ratio_diff
+
+SIZES = (10, 100, 1000)
+TOKENS = 400
+ROUNDS = 200
+DUE = (1, 5, 10, 100)
+
+LOT_SIZES = {}
+
+
+def synthetic_strategies(count, tokens):
+    strategies = []
+    for s in range(count):
+        strat = {"Strategy Name": f"S{s}", "Diff Threshold": "5", "SL": "10%", "TP": "20"}
+        for i in range(1, random.randint(2, 8) + 1):
+            strat[f"Token{i}"] = random.choice(tokens)
+            strat[f"Side{i}"] = random.choice(("BUY", "SELL"))
+            strat[f"Lots{i}"] = random.randint(1, 4)
+            strat[f"TotalQty{i}"] = strat[f"Lots{i}"] * LOT_SIZES[strat[f"Token{i}"]]
+        strategies.append(CompiledStrategy(strat))
+    return strategies
+
+
+def helper_pass(strategies, quotes):
+    out = {}
+    for cs in strategies:
+        prices = [quotes[t] for t in cs.tokens]
+        legs = [{"side": side, "lots": lots} for side, lots, _, _ in cs.legs()]
+        out[cs.name] = calculate_per_ratio_diff(legs, prices, list(cs.lot_sizes))
+    return out
+
+
+def _per_tick_us(fn):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn()
+    return (time.perf_counter() - start) / ROUNDS * 1e6
+
+
+def main():
+    random.seed(7)
+    tokens = [f"NIFTY 27-NOV-2025 {'CE' if i % 2 else 'PE'} {20000 + 50 * i}" for i in range(TOKENS)]
+    LOT_SIZES.update({t: random.choice((15, 25, 75)) for t in tokens})
+    # Resolve lot sizes without a scripmaster
+    compiled_mod.get_lot_size = LOT_SIZES.get
+    quotes = {t: round(random.uniform(1, 500), 2) for t in tokens}
+
+    for size in SIZES:
+        strategies = synthetic_strategies(size, tokens)
+        engine = DiffEngine()
+        for cs in strategies:
+            engine.add(cs.name, cs)
+
+        expected = helper_pass(strategies, quotes)
+        got = engine.evaluate(quotes)
+        assert all(got[name][0] == net for name, net in expected.items()), "engine diverged from helper"
+
+        loop_us = _per_tick_us(lambda: helper_pass(strategies, quotes))
+        batch_us = _per_tick_us(lambda: engine.evaluate(quotes))
+        print(f"{size:5d} strategies  helper: {loop_us:9.1f} us/tick   engine: {batch_us:9.1f} us/tick   ({loop_us / batch_us:.1f}x)")
+        for count in DUE:
+            if count > size:
+                continue
+            due = random.sample(strategies, count)
+            names = [cs.name for cs in due]
+            helper_us = _per_tick_us(lambda: helper_pass(due, quotes))
+            due_us = _per_tick_us(lambda: engine.evaluate(quotes, names=names))
+            path = "scalar" if count <= SCALAR_MAX_ROWS else "numpy"
+            print(f"{'':5s} {count:4d} due     helper: {helper_us:9.1f} us/tick   engine: {due_us:9.1f} us/tick   ({path})")
+
+
+if __name__ == "__main__":
+    main()
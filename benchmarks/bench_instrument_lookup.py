@@ -0,0 +1,76 @@
+"""
+Lookups per second for exchange / lot size / scrip row: the old pandas column
+scans versus the dict-backed instrument index, on a synthetic 40k-row master.
+
+Run from the repo root:  python -m benchmarks.bench_instrument_lookup
+"""
+import random
+import time
+import pandas as pd
+import utils.load_tokken as lt
+
+ROWS = 40000
+LOOKUPS = 200
+
+
+def synthetic_master(rows=ROWS):
+    names, exch = [], []
+    for i in range(rows):
+        code = "NIFTY" if i % 2 else "BSX"
+        names.append(f"{code} {1 + i % 28:02d}-NOV-2025 {'CE' if i % 3 else 'PE'} {10000 + i * 50}")
+        exch.append("NSEFO" if code == "NIFTY" else "BSEFO")
+    return pd.DataFrame({
+        "scripname": names,
+        "exchangename": exch,
+        "marketlot": ["75"] * rows,
+        "lowerexchcircuitprice": ["0.05"] * rows,
+        "upperexchcircuitprice": ["999.0"] * rows,
+        "maxqtyperorder": ["1800"] * rows,
+    })
+
+
+# --- Pre-index implementations, kept here for comparison ---
+def legacy_exchange(df, token):
+    row = df[df["scripname"].str.upper() == token.upper()]
+    if not row.empty:
+        return "NFO" if row.iloc[0]["exchangename"] == "NSEFO" else "BFO"
+    return None
+
+
+def legacy_scrip_row(df, token):
+    s = df[df["scripname"].str.strip().str.upper() == token.strip().upper()]
+    return s.iloc[0]
+
+
+def legacy_lot_size(df, token):
+    row = df[(df["scripname"].str.upper() == token) | (df["scripname"].str.upper().str.startswith(token))]
+    return int(row.iloc[0]["marketlot"])
+
+
+def _rate(fn, tokens):
+    start = time.perf_counter()
+    for t in tokens:
+        fn(t)
+    return len(tokens) / (time.perf_counter() - start)
+
+
+def main():
+    df = synthetic_master()
+    start = time.perf_counter()
+    lt._set_master(df, pd.Timestamp.now().strftime("%Y-%m-%d"))
+    build_ms = (time.perf_counter() - start) * 1000.0
+    tokens = random.sample(list(df["scripname"]), LOOKUPS)
+
+    rows = [
+        ("exchange", lambda t: legacy_exchange(df, t), lt.get_exchange_from_scripmaster),
+        ("scrip row", lambda t: legacy_scrip_row(df, t), lt.get_instrument),
+        ("lot size", lambda t: legacy_lot_size(df, t), lt.get_lot_size),
+    ]
+    print(f"index build: {build_ms:.1f} ms for {ROWS} rows")
+    for label, before, after in rows:
+        old, new = _rate(before, tokens), _rate(after, tokens * 100)
+        print(f"{label:10s}  scan: {old:10.0f}/s   index: {new:12.0f}/s   ({new / old:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Time to flat for StrategyExecutor.kill_switch() with STRATEGIES x LEGS open
+legs and ORDERS_PER_STRATEGY working orders each, on the stand-in bridge where
+every call takes BRIDGE_LATENCY seconds and market orders fill at once.
+
+Runs the real kill switch once per KILL_SWITCH_BULK mode and checks the report
+against the legs that were open: per-leg orders ("orders") must place one
+counter order per open leg, "strategy" one bridge square-off per strategy.
+The serial figure is what the same calls cost one after another.
+
+Run from the repo root:  python -m benchmarks.bench_kill_switch
+"""
+import contextlib
+import io
+import itertools
+import threading
+import time
+import config
+from benchmarks.fake_executor import start_executor, LOT_SIZE
+
+STRATEGIES = 50
+LEGS = 8
+ORDERS_PER_STRATEGY = 4   # working orders to cancel
+BRIDGE_LATENCY = 0.005
+
+
+class FakeFills:
+    """Market orders fill their full qty immediately; working orders never fill."""
+
+    def __init__(self):
+        self.ids = itertools.count(1)
+        self.qty = {}
+        self.lock = threading.Lock()
+
+    def handler(self, path, form):
+        time.sleep(BRIDGE_LATENCY)
+        get = lambda name: (form.get(name) or [""])[0]
+        if path == "/PlaceOrderAdv":
+            with self.lock:
+                rid = str(next(self.ids))
+                self.qty[rid] = get("Quantity")
+            return {"status": "success", "response": rid}
+        qty = self.qty.get(get("OrderID") or get("RequestID") or get("UniqueID"))
+        if path == "/OrderFilledQty":
+            return {"status": "success", "response": qty or "0"}
+        if path == "/OrderAvgPrice":
+            return {"status": "success", "response": "101.5" if qty else "0"}
+        return None
+
+
+def open_positions(executor, _book_fill, _record_order, round_no):
+    """Book one lot on every leg (the real fill path) and a few working orders per strategy."""
+    for state in executor.states():
+        with state["lock"]:
+            state["status"] = "triggered"
+        for leg in range(1, LEGS + 1):
+            _book_fill(state, leg, LOT_SIZE, 100.0, risk=executor.risk)
+        for o in range(ORDERS_PER_STRATEGY):
+            _record_order(state, f"W{round_no}-{state['strategy']['Strategy Name']}-{o}")
+
+
+def main():
+    fills = FakeFills()
+    executor, server = start_executor(STRATEGIES, LEGS, fills.handler)
+    from strategies.executer import _book_fill, _record_order
+
+    print(f"{STRATEGIES} strategies x {LEGS} open legs, {ORDERS_PER_STRATEGY} working orders each, "
+          f"{BRIDGE_LATENCY * 1000:.0f} ms per bridge call")
+    try:
+        for round_no, (mode, expect_orders, expect_bulk) in enumerate((
+            ("orders", STRATEGIES * LEGS, 0),
+            ("strategy", 0, STRATEGIES),
+        )):
+            config.KILL_SWITCH_BULK = mode
+            open_positions(executor, _book_fill, _record_order, round_no)
+            with contextlib.redirect_stdout(io.StringIO()):  # bridge client logs every "false" flag
+                report = executor.kill_switch()
+            serial_ms = (report["cancels"] + report["counter_orders"] + report["bulk"]) * BRIDGE_LATENCY * 1000.0
+            ok = (report["counter_orders"] == expect_orders and report["bulk"] == expect_bulk
+                  and report["not_placed"] == 0 and report["flat"])
+            print(f"KILL_SWITCH_BULK={mode:9s} {report['summary']}")
+            print(f"{'':24s} cancels done {report['cancel_ms']:6.1f} ms, all sent {report['sent_ms']:6.1f} ms, "
+                  f"serial calls alone: {serial_ms:6.0f} ms   matches open legs: {ok}")
+    finally:
+        executor.order_engine.stop()
+        executor.order_pool.shutdown(wait=False)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
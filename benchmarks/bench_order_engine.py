@@ -0,0 +1,128 @@
+"""
+Many hedge legs working their order ladders at once on the OrderEngine: one
+engine thread, one tracker sweep and the bridge loop drive every leg.
+
+Each fake leg's first limit never fills and is auto-cancelled by the bridge
+after its wait, the second fills half, and the best-quote rung fills the rest.
+Reports how late each rung went out against its exact deadline (wait + settle)
+and how much qty was booked. Past the deadline a rung only waits on the tracker
+noticing the auto-cancel (IsOrderOpen is asked every few sweeps).
+
+Run from the repo root:  python -m benchmarks.bench_order_engine
+"""
+import contextlib
+import io
+import itertools
+import statistics
+import threading
+import time
+from benchmarks.fake_bridge import start_fake_bridge
+from strategies.order_engine import OrderEngine, LegOrder, Step
+from trading.order_tracker import OrderTracker
+from utils.pyIB_APIS_async import AsyncIB_APIS, BridgeLoop
+
+LEGS = 200
+QTY = 50
+WAIT = 1            # seconds each limit rung may work
+SETTLE = 0.2
+SWEEP_INTERVAL = 0.05
+
+
+class FakeLadder:
+    """Orders of rung n fill n/2 of their qty right away (rung 0 nothing); unfilled orders cancel after their wait."""
+
+    def __init__(self):
+        self.ids = itertools.count(1)
+        self.orders = {}            # request id -> dict
+        self.placed = {}            # leg key -> [placed_at, ...]
+        self.lock = threading.Lock()
+
+    def handler(self, path, form):
+        get = lambda name, default="": (form.get(name) or [default])[0]
+        now = time.monotonic()
+        with self.lock:
+            if path == "/PlaceOrderAdv":
+                rid = str(next(self.ids))
+                key = get("StrategyTag") + get("Symbol")
+                times = self.placed.setdefault(key, [])
+                rung = len(times)
+                times.append(now)
+                qty = int(get("Quantity", "0"))
+                self.orders[rid] = {
+                    "qty": qty,
+                    "filled": qty if rung >= 2 else qty // 2 if rung == 1 else 0,
+                    "expires": now + float(get("CancelIfNotCompleteInSeconds", "0")) if rung < 2 else None,
+                }
+                return {"status": "success", "response": rid}
+            rid = get("OrderID") or get("RequestID") or get("UniqueID")
+            order = self.orders.get(rid)
+            if order is None:
+                return None
+            if path == "/CancelOrExitOrder":
+                order["expires"] = min(order["expires"] or now, now)
+                return {"status": "success", "response": "true"}
+            complete = order["filled"] >= order["qty"]
+            cancelled = not complete and order["expires"] is not None and now >= order["expires"]
+        if path == "/OrderFilledQty":
+            return {"status": "success", "response": str(order["filled"])}
+        if path == "/OrderAvgPrice":
+            return {"status": "success", "response": "101.5" if order["filled"] else "0"}
+        flag = {
+            "/IsOrderOpen": not (complete or cancelled),
+            "/IsOrderCompleted": complete,
+            "/IsOrderCancelled": cancelled,
+        }.get(path, False)
+        return {"status": "success", "response": "true"} if flag else {"status": "error", "error": "no"}
+
+
+def main():
+    ladder = FakeLadder()
+    server, url = start_fake_bridge(ladder.handler)
+    loop = BridgeLoop("BenchLoop")
+    api = AsyncIB_APIS(url)
+    tracker = OrderTracker(api, loop, interval=SWEEP_INTERVAL)
+    engine = OrderEngine(api, loop, tracker, settle=SETTLE)
+    booked = {}
+    lock = threading.Lock()
+
+    def on_fill(key, qty, price):
+        with lock:
+            booked[key] = booked.get(key, 0) + qty
+
+    steps = [Step("LMT", 100.0, WAIT), Step("LMT", 100.5, WAIT), Step("BEST", None, None)]
+    legs = [
+        LegOrder(f"S{i}", "TOKEN", "BUY", QTY, steps, "NFO", "bench", (90.0, 110.0),
+                 on_fill=lambda q, px, key=f"S{i}": on_fill(key, q, px))
+        for i in range(LEGS)
+    ]
+    try:
+        start = time.monotonic()
+        with contextlib.redirect_stdout(io.StringIO()):  # bridge client logs every "false" flag
+            futures = [engine.submit(leg) for leg in legs]
+            filled = [f.result(timeout=3 * (WAIT + SETTLE) + 10) for f in futures]
+        elapsed = time.monotonic() - start
+    finally:
+        engine.stop()
+        tracker.stop()
+        loop.run(api.close())
+        loop.stop()
+        server.shutdown()
+
+    # How late each rung went out versus the previous rung's exact deadline
+    late = sorted(
+        (times[n + 1] - times[n] - (WAIT + SETTLE)) * 1000.0
+        for times in ladder.placed.values()
+        for n in range(len(times) - 1)
+    )
+    stats = engine.stats()
+    print(f"{LEGS} legs x {QTY} qty, ladder LMT({WAIT}s) -> LMT({WAIT}s) -> BEST, settle {SETTLE}s")
+    print(f"all done in {elapsed:5.2f} s   legs fully filled: {sum(f == QTY for f in filled)}/{LEGS}   "
+          f"qty booked: {sum(booked.values())}/{LEGS * QTY}")
+    print(f"next rung sent after its deadline  p50: {statistics.median(late):6.1f} ms   "
+          f"p99: {late[int(len(late) * 0.99)]:6.1f} ms   max: {late[-1]:6.1f} ms")
+    print(f"engine timer lag max: {stats['max_timer_lag_ms']:.1f} ms   events: {stats['events_handled']}   "
+          f"bridge calls: {server.requests_seen}")
+
+
+if __name__ == "__main__":
+    main()
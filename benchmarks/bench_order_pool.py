@@ -0,0 +1,88 @@
+"""
+Trigger-to-start latency for a burst of order tasks: a new daemon thread per
+task (as _tick used to start for every trigger) versus the pre-started
+OrderPool, plus a check that one strategy's tasks run in submission order.
+
+Each task stands in for an order call that holds its worker on bridge I/O for
+TASK_IO seconds.
+
+Run from the repo root:  python -m benchmarks.bench_order_pool
+"""
+import statistics
+import threading
+import time
+from strategies.order_pool import OrderPool
+
+TASK_IO = 0.002     # seconds of bridge I/O per task
+TRIGGERS = 500      # isolated triggers, one at a time
+TRIGGER_GAP = 0.003
+BURST = (8, 8)      # strategies x tasks each, submitted at once
+WORKERS = 8
+
+
+def _report(label, lags, extra=""):
+    lags = sorted(lags)
+    p99 = lags[int(len(lags) * 0.99)]
+    print(f"{label:34s}  start lag p50: {statistics.median(lags):8.1f} us   p99: {p99:8.1f} us{extra}")
+
+
+def _recorder():
+    lags, order, lock = [], {}, threading.Lock()
+
+    def task(key, seq, submitted):
+        with lock:
+            lags.append((time.perf_counter() - submitted) * 1e6)
+            order.setdefault(key, []).append(seq)
+        time.sleep(TASK_IO)
+
+    return task, lags, order
+
+
+def _spawn(task, *args):
+    t = threading.Thread(target=task, args=args, daemon=True)
+    t.start()
+    return t
+
+
+def isolated(label, submit):
+    task, lags, _ = _recorder()
+    waits = []
+    for i in range(TRIGGERS):
+        waits.append(submit("S0", task, "S0", i, time.perf_counter()))
+        time.sleep(TRIGGER_GAP)
+    for w in waits:
+        (w.join if hasattr(w, "join") else w.result)()
+    _report(f"{label}, isolated triggers", lags)
+
+
+def burst(label, submit, threads_created):
+    task, lags, order = _recorder()
+    strategies, per = BURST
+    waits = [
+        submit(f"S{s}", task, f"S{s}", seq, time.perf_counter())
+        for seq in range(per)
+        for s in range(strategies)
+    ]
+    for w in waits:
+        (w.join if hasattr(w, "join") else w.result)()
+    in_order = all(seqs == sorted(seqs) for seqs in order.values())
+    _report(f"{label}, burst of {strategies * per}", lags,
+            f"   threads: {threads_created}   per-strategy order kept: {in_order}")
+
+
+def main():
+    isolated("thread per task", lambda key, task, *args: _spawn(task, *args))
+    burst("thread per task", lambda key, task, *args: _spawn(task, *args), BURST[0] * BURST[1])
+
+    pool = OrderPool(workers=WORKERS, max_pending=BURST[0] * BURST[1])
+    isolated("order pool", pool.submit)
+    burst("order pool", pool.submit, WORKERS)
+    stats = pool.stats()
+    pool.shutdown()
+    print(f"pool stats: {stats}")
+    # In a burst the pool's lag includes queueing behind busy workers: concurrency is
+    # bounded by design (the bridge only has BRIDGE_POOL_SIZE connections anyway)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Bridge traffic and fill-detection latency for many concurrent orders: one
+polling loop per order (IB_OrderFilledQty every 100 ms, as fire_leg_k did)
+versus one OrderTracker sweep shared by every waiter.
+
+Each fake order fills completely at a random time within FILL_WINDOW seconds.
+
+Run from the repo root:  python -m benchmarks.bench_order_tracker
+"""
+import contextlib
+import io
+import random
+import statistics
+import threading
+import time
+from benchmarks.fake_bridge import start_fake_bridge
+from trading.order_tracker import OrderTracker, filled_at_least
+from utils.pyIB_APIS import IB_APIS
+from utils.pyIB_APIS_async import AsyncIB_APIS, BridgeLoop
+
+ORDERS = 40
+QTY = 75
+FILL_WINDOW = (0.1, 0.8)
+POLL_INTERVALS = (0.1, 0.05)  # old per-order loops (fire_leg_k, leg-1 loop)
+SWEEP_INTERVAL = 0.05         # tracker
+
+
+class FakeOrders:
+    def __init__(self):
+        self.fill_at = {}
+
+    def place(self, count):
+        now = time.monotonic()
+        self.fill_at = {str(i): now + random.uniform(*FILL_WINDOW) for i in range(1, count + 1)}
+
+    def handler(self, path, form):
+        rid = (form.get("OrderID") or form.get("RequestID") or form.get("UniqueID") or [""])[0]
+        filled = time.monotonic() >= self.fill_at.get(rid, float("inf"))
+        if path == "/OrderFilledQty":
+            return {"status": "success", "response": str(QTY if filled else 0)}
+        if path == "/OrderAvgPrice":
+            return {"status": "success", "response": "101.5" if filled else "0"}
+        flag = {"/IsOrderOpen": not filled, "/IsOrderCompleted": filled}.get(path, False)
+        return {"status": "success", "response": "true"} if flag else {"status": "error", "error": "no"}
+
+
+def run_waiters(wait_one, orders):
+    lags = []
+    lock = threading.Lock()
+
+    def waiter(rid):
+        detected = wait_one(rid)
+        if detected is not None:
+            with lock:
+                lags.append((detected - orders.fill_at[rid]) * 1000.0)
+
+    threads = [threading.Thread(target=waiter, args=(rid,)) for rid in orders.fill_at]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return lags
+
+
+def polling_loops(url, orders, interval):
+    bridge = IB_APIS(url)
+
+    def wait_one(rid):
+        deadline = time.monotonic() + FILL_WINDOW[1] + 0.5
+        while time.monotonic() < deadline:
+            if (bridge.IB_OrderFilledQty(rid) or 0) >= QTY:
+                return time.monotonic()
+            time.sleep(interval)
+        return None
+
+    return run_waiters(wait_one, orders)
+
+
+def shared_tracker(url, orders):
+    loop = BridgeLoop("BenchLoop")
+    tracker = OrderTracker(AsyncIB_APIS(url), loop, interval=SWEEP_INTERVAL)
+    for rid in orders.fill_at:
+        tracker.track(rid, QTY)
+
+    def wait_one(rid):
+        status = tracker.wait(rid, until=filled_at_least(QTY), timeout=FILL_WINDOW[1] + 0.5)
+        return time.monotonic() if status is not None and status.filled_qty >= QTY else None
+
+    try:
+        return run_waiters(wait_one, orders)
+    finally:
+        tracker.stop()
+        loop.stop()
+
+
+def main():
+    random.seed(5)
+    orders = FakeOrders()
+    server, url = start_fake_bridge(orders.handler)
+    try:
+        runs = [(f"polling every {int(i * 1000)} ms", lambda u, o, i=i: polling_loops(u, o, i)) for i in POLL_INTERVALS]
+        runs.append((f"tracker, {int(SWEEP_INTERVAL * 1000)} ms sweep", shared_tracker))
+        for label, fn in runs:
+            orders.place(ORDERS)
+            before = server.requests_seen
+            with contextlib.redirect_stdout(io.StringIO()):  # bridge client logs every "false" flag
+                lags = fn(url, orders)
+            calls = server.requests_seen - before
+            print(
+                f"{label:24s}  {ORDERS} orders  bridge calls: {calls:5d}  "
+                f"fill seen after p50: {statistics.median(lags):6.1f} ms  max: {max(lags):6.1f} ms  "
+                f"({len(lags)}/{ORDERS} seen)"
+            )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Cost of keeping portfolio MTM current on every quote snapshot for STRATEGIES x
+8 legs: summing every leg of every strategy again (as _tick did per strategy)
+versus the RiskEngine's incremental update, where only legs on a moved token
+are touched and the portfolio total is read in O(1).
+
+Each snapshot moves MOVED_FRACTION of the tokens.
+
+Run from the repo root:  python -m benchmarks.bench_risk_engine
+"""
+import random
+import time
+from strategies.risk_engine import RiskEngine
+
+STRATEGIES = 200
+LEGS = 8
+TOKENS = 400
+MOVED_FRACTION = 0.1
+SNAPSHOTS = 2000
+
+
+def main():
+    random.seed(3)
+    tokens = [f"TOKEN{i}" for i in range(TOKENS)]
+    legs = [
+        (f"S{s}", leg, random.choice(tokens), random.choice(("BUY", "SELL")), 75, 100.0 + random.random())
+        for s in range(STRATEGIES)
+        for leg in range(1, LEGS + 1)
+    ]
+    prices = {t: 100.0 for t in tokens}
+    snapshots = []
+    for _ in range(SNAPSHOTS):
+        prices = dict(prices)
+        moved = random.sample(tokens, int(TOKENS * MOVED_FRACTION))
+        for t in moved:
+            prices[t] = round(prices[t] + random.uniform(-0.5, 0.5), 2)
+        snapshots.append((prices, moved))
+
+    start = time.perf_counter()
+    for snapshot, _ in snapshots:
+        full = 0.0
+        for name, leg, token, side, qty, entry in legs:
+            price = snapshot[token]
+            full += (price - entry) * qty if side == "BUY" else (entry - price) * qty
+    full_us = (time.perf_counter() - start) * 1e6 / SNAPSHOTS
+
+    risk = RiskEngine()
+    for name, leg, token, side, qty, entry in legs:
+        risk.on_fill(name, leg, token, side, qty, entry)
+    risk.on_quotes({t: 100.0 for t in tokens})
+    start = time.perf_counter()
+    for snapshot, moved in snapshots:
+        risk.on_quotes(snapshot, moved)  # the executor passes the tokens that moved
+        total = risk.total()
+    incremental_us = (time.perf_counter() - start) * 1e6 / SNAPSHOTS
+
+    print(f"{STRATEGIES} strategies x {LEGS} legs on {TOKENS} tokens, {MOVED_FRACTION:.0%} of tokens move per snapshot")
+    print(f"full recompute per snapshot : {full_us:8.1f} us")
+    print(f"risk engine per snapshot    : {incremental_us:8.1f} us   (portfolio total read in O(1))")
+    print(f"totals agree: {abs(full - total) < 1e-6 * max(1.0, abs(full))}   ({full:.2f} vs {total:.2f})")
+
+
+if __name__ == "__main__":
+    main()
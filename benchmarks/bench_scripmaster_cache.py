@@ -0,0 +1,51 @@
+"""
+Cold-start cost of the daily scripmaster cache: the old full CSV read with
+dtype=str versus the compact pickle written by load_scripmaster.
+
+Run from the repo root:  python -m benchmarks.bench_scripmaster_cache
+"""
+import tempfile
+import time
+from pathlib import Path
+import pandas as pd
+from benchmarks.bench_instrument_lookup import synthetic_master
+from utils.load_tokken import _compact_master
+
+ROWS = 80000  # roughly NSEFO + BSEFO
+EXTRA_COLUMNS = 30  # the real masters carry many columns the app never reads
+REPEATS = 5
+
+
+def raw_master():
+    df = synthetic_master(ROWS)
+    for i in range(EXTRA_COLUMNS):
+        df[f"unusedcol{i}"] = [f"value{i}_{j % 97}" for j in range(ROWS)]
+    return df
+
+
+def _best_ms(fn):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, (time.perf_counter() - start) * 1000.0)
+    return best
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "scripmaster.csv"
+        pkl_path = Path(tmp) / "scripmaster.pkl"
+        raw = raw_master()
+        raw.to_csv(csv_path, index=False)
+        _compact_master(raw.copy()).to_pickle(pkl_path)
+
+        csv_ms = _best_ms(lambda: pd.read_csv(csv_path, dtype=str))
+        pkl_ms = _best_ms(lambda: pd.read_pickle(pkl_path))
+        print(f"csv    : {csv_ms:8.1f} ms  ({csv_path.stat().st_size / 1e6:.1f} MB)")
+        print(f"pickle : {pkl_ms:8.1f} ms  ({pkl_path.stat().st_size / 1e6:.1f} MB)")
+        print(f"speed-up: {csv_ms / pkl_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
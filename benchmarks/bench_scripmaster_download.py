@@ -0,0 +1,98 @@
+"""
+Scripmaster download against a local HTTP stand-in for the broker's CSV endpoint:
+sequential exchanges versus the parallel streamed fetch, and a conditional
+refresh (ETag / If-None-Match -> 304) of an unchanged master.
+
+Run from the repo root:  python -m benchmarks.bench_scripmaster_download
+"""
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from benchmarks.bench_instrument_lookup import synthetic_master
+import utils.load_tokken as lt
+
+ROWS = 40000
+LATENCY = 0.5  # seconds the stand-in waits before answering, per exchange
+
+
+class _MasterHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        exch = parse_qs(urlparse(self.path).query).get("name", [""])[0]
+        body = self.server.bodies.get(exch)
+        self.server.requests_seen += 1
+        time.sleep(LATENCY)
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        etag = f'"{exch}-{len(body)}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.server.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_master_server():
+    df = synthetic_master(ROWS)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _MasterHandler)
+    server.daemon_threads = True
+    server.bodies = {
+        exch: df[df["exchangename"] == exch].to_csv(index=False).encode()
+        for exch in lt.SCRIPMASTER_EXCHANGES
+    }
+    server.requests_seen = 0
+    server.not_modified = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/getscripmastercsv?name={{exchange}}"
+
+
+def main():
+    server, url = start_master_server()
+    lt.SCRIPMASTER_URL = url
+    try:
+        with tempfile.TemporaryDirectory() as seq_dir, tempfile.TemporaryDirectory() as par_dir:
+            start = time.perf_counter()
+            seq = [lt._fetch_exchange_master(exch, seq_dir)[0] for exch in lt.SCRIPMASTER_EXCHANGES]
+            seq_ms = (time.perf_counter() - start) * 1000.0
+
+            def parallel():
+                with ThreadPoolExecutor(max_workers=len(lt.SCRIPMASTER_EXCHANGES)) as pool:
+                    return [df for df, _ in pool.map(lambda exch: lt._fetch_exchange_master(exch, par_dir), lt.SCRIPMASTER_EXCHANGES)]
+
+            start = time.perf_counter()
+            par = parallel()
+            par_ms = (time.perf_counter() - start) * 1000.0
+            assert [len(f) for f in seq] == [len(f) for f in par]
+
+            start = time.perf_counter()
+            again = parallel()
+            refresh_ms = (time.perf_counter() - start) * 1000.0
+            assert [len(f) for f in again] == [len(f) for f in par]
+            assert server.not_modified == len(lt.SCRIPMASTER_EXCHANGES)
+
+        print(f"sequential download : {seq_ms:8.1f} ms")
+        print(f"parallel download   : {par_ms:8.1f} ms  ({seq_ms / par_ms:.1f}x)")
+        print(f"unchanged (304)     : {refresh_ms:8.1f} ms  ({server.not_modified} not-modified replies)")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
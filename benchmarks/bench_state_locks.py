@@ -0,0 +1,110 @@
+"""
+Lock contention between strategies on a real StrategyExecutor: while
+FILL_WORKERS threads drive CONTENDED busy strategies through the executor's own
+calls (pause_strategy / resume_strategy, which logs to the CSV log while
+holding the strategy's lock, and _book_fill), how long do _tick on an unrelated
+strategy B and the registry snapshot states() (what the GUI iterates) take?
+
+Compares per-strategy state["lock"] with the old single executor-wide lock,
+emulated by giving every strategy and the registry one shared RLock. The log
+write releases the GIL while the lock is held, which is where one shared lock
+makes B wait on everybody else's I/O.
+
+Run from the repo root:  python -m benchmarks.bench_state_locks
+"""
+import contextlib
+import io
+import statistics
+import tempfile
+import threading
+import time
+import config
+from benchmarks.fake_executor import start_executor, leg_token
+
+CONTENDED = 16        # busy strategies sharing the executor with B
+FILL_WORKERS = 4      # threads cycling over the busy strategies
+READS = 300           # ticks / states() reads against strategy B
+READ_GAP = 0.001      # spacing between B's reads
+LEGS = 8
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples), samples[int(len(samples) * 0.99)], samples[-1]
+
+
+def run(executor, busy, b, quotes):
+    from strategies.executer import _book_fill
+
+    stop = threading.Event()
+    cycles = [0]
+
+    def worker(mine):
+        while not stop.is_set():
+            for state in mine:
+                name = state["strategy"]["Strategy Name"]
+                executor.pause_strategy(name)
+                executor.resume_strategy(name)   # logs under the strategy's lock, then ticks it
+                _book_fill(state, 1, 1, 100.0, risk=executor.risk)
+                cycles[0] += 1
+
+    workers = [
+        threading.Thread(target=worker, args=(busy[i::FILL_WORKERS],), daemon=True)
+        for i in range(FILL_WORKERS)
+    ]
+    for w in workers:
+        w.start()
+    time.sleep(0.05)
+
+    ticks, snapshots = [], []
+    start_all = time.perf_counter()
+    for _ in range(READS):
+        start = time.perf_counter()
+        executor._tick(b, quotes=quotes)
+        ticks.append((time.perf_counter() - start) * 1e6)
+        start = time.perf_counter()
+        executor.states()
+        snapshots.append((time.perf_counter() - start) * 1e6)
+        time.sleep(READ_GAP)
+    elapsed = time.perf_counter() - start_all
+
+    stop.set()
+    for w in workers:
+        w.join()
+    return _percentiles(ticks), _percentiles(snapshots), cycles[0] / elapsed
+
+
+def main():
+    config.LOG_FOLDER_PATH = tempfile.mkdtemp(prefix="bench_state_locks_")  # keep the CSV log out of the repo
+    # The bridge only sees order tracker sweeps here; nothing is placed
+    executor, server = start_executor(CONTENDED + 1, LEGS, lambda path, form: {"status": "success", "response": "0"})
+    from strategies.executer import order_tracker
+    from utils.logger import ensure_log_dir
+    ensure_log_dir()
+
+    states = executor.states()
+    busy, b = states[:-1], states[-1]
+    quotes = {leg_token(CONTENDED, leg): 100.0 + leg for leg in range(1, LEGS + 1)}
+    striped = [state["lock"] for state in states] + [executor.state_lock]
+    shared = threading.RLock()
+    results = []
+    try:
+        for label, locks in (("single shared lock", [shared] * len(striped)), ("per-strategy locks", striped)):
+            for state, lock in zip(states, locks):
+                state["lock"] = lock
+            executor.state_lock = locks[-1]
+            with contextlib.redirect_stdout(io.StringIO()):  # log_event echoes every resume
+                results.append((label, run(executor, busy, b, quotes)))
+    finally:
+        order_tracker.stop()
+        server.shutdown()
+
+    print(f"{FILL_WORKERS} workers pausing / resuming / filling {CONTENDED} strategies; "
+          f"{READS} ticks + states() reads for strategy B")
+    for label, (tick, snap, rate) in results:
+        print(f"{label:20s}  B _tick p50 {tick[0]:7.1f} p99 {tick[1]:8.1f} us   "
+              f"states() p50 {snap[0]:7.1f} p99 {snap[1]:8.1f} us   busy cycles/s {rate:7.0f}")
+
+
+if __name__ == "__main__":
+    main()
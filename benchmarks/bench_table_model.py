@@ -0,0 +1,90 @@
+"""
+Strategy table update throughput with 1,000+ rows: the old QTableWidget path
+(scan column 1 for the row, then setItem / item.setText per cell) versus
+StrategyTableModel (O(1) name -> row, one dataChanged range per row).
+
+Runs offscreen; a QTableView / QTableWidget is shown so the repaint cost of
+each path is included when events are processed.
+
+Run from the repo root:  QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_table_model
+"""
+import os
+import random
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication, QTableView, QTableWidget, QTableWidgetItem
+from gui.strategy_model import StrategyTableModel
+
+ROWS = 1000
+COLS = 47  # S.No, Name, Diff, SL, TP, P&L, Current Diff + 8 legs x 5
+UPDATES = 20000
+FLUSH_EVERY = 500  # process events (repaint) every N updates, like a GUI frame
+
+
+def make_updates():
+    random.seed(3)
+    return [
+        (f"S{random.randrange(ROWS)}", {6: f"{random.uniform(-50, 50):.2f}", 5: f"{random.uniform(-1e4, 1e4):.2f}"})
+        for _ in range(UPDATES)
+    ]
+
+
+def widget_path(app, updates):
+    table = QTableWidget(ROWS, COLS)
+    for row in range(ROWS):
+        table.setItem(row, 1, QTableWidgetItem(f"S{row}"))
+    table.show()
+    app.processEvents()
+
+    start = time.perf_counter()
+    for i, (name, cells) in enumerate(updates):
+        row = None
+        for r in range(table.rowCount()):
+            item = table.item(r, 1)
+            if item and item.text() == name:
+                row = r
+                break
+        for col, text in cells.items():
+            item = table.item(row, col)
+            if item is None:
+                table.setItem(row, col, QTableWidgetItem(text))
+            elif item.text() != text:
+                item.setText(text)
+        if i % FLUSH_EVERY == 0:
+            app.processEvents()
+    app.processEvents()
+    return time.perf_counter() - start
+
+
+def model_path(app, updates):
+    model = StrategyTableModel([str(c) for c in range(COLS)])
+    for row in range(ROWS):
+        model.append_row({1: f"S{row}"})
+    view = QTableView()
+    view.setModel(model)
+    view.show()
+    app.processEvents()
+
+    start = time.perf_counter()
+    for i, (name, cells) in enumerate(updates):
+        model.set_cells(model.row_of(name), cells)
+        if i % FLUSH_EVERY == 0:
+            app.processEvents()
+    app.processEvents()
+    return time.perf_counter() - start
+
+
+def main():
+    app = QApplication.instance() or QApplication([])
+    updates = make_updates()
+    widget_s = widget_path(app, updates)
+    model_s = model_path(app, updates)
+    print(f"{ROWS} rows, {UPDATES} row updates")
+    print(f"QTableWidget:       {UPDATES / widget_s:10.0f} updates/s")
+    print(f"StrategyTableModel: {UPDATES / model_s:10.0f} updates/s   ({widget_s / model_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
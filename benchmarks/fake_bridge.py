@@ -0,0 +1,62 @@
+"""
+Minimal local stand-in for the Intelligent Bridge HTTP API, used by the benchmarks.
+Speaks HTTP/1.1 with keep-alive and answers every endpoint with a success payload.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+RESPONSES = {
+    "/LTP": "101.5",
+    "/BID": "101.4",
+    "/ASK": "101.6",
+    "/OrderFilledQty": "0",
+    "/OrderAvgPrice": "0",
+    "/PlaceOrderAdv": "1",
+    "/PlaceOrder": "1",
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this every keep-alive reply waits on a delayed ACK
+    disable_nagle_algorithm = True
+
+    def _reply(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        form = parse_qs(self.rfile.read(length).decode()) if length else {}
+        self.server.requests_seen += 1
+        payload = self.server.handler(self.path, form) if self.server.handler else None
+        if payload is None:
+            payload = {"status": "success", "response": RESPONSES.get(self.path, "true")}
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _reply
+    do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    request_queue_size = 128  # a pool opening many connections at once must not hit SYN retries
+
+
+def start_fake_bridge(handler=None):
+    """
+    Starts the stand-in bridge on a free localhost port in a daemon thread.
+    handler(path, form) may return a custom JSON payload (or None for the default).
+    Returns (server, base_url); call server.shutdown() when done.
+    """
+    server = _Server(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    server.handler = handler
+    server.requests_seen = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
@@ -0,0 +1,53 @@
+"""
+A real StrategyExecutor on the stand-in bridge, with a synthetic scripmaster,
+for benchmarks that drive the executor's own code paths (kill switch, fills,
+ticks). The bridge clients are created when trading.* is first imported, so
+start_executor() must run before anything else imports them.
+"""
+import sys
+import config
+from benchmarks.fake_bridge import start_fake_bridge
+
+LOT_SIZE = 75
+
+
+def leg_token(strategy, leg):
+    return f"NIFTY 27-NOV-2025 CE {20000 + 50 * (strategy * 8 + leg)}"
+
+
+def start_executor(strategies, legs=8, handler=None, **executor_kwargs):
+    """
+    Starts the fake bridge, points config.BRIDGE_URL at it, publishes a master
+    with every leg token and adds `strategies` strategies of `legs` one-lot legs
+    (alternating BUY / SELL, never triggering). Returns (executor, server).
+    """
+    if "trading.bridge_async" in sys.modules:
+        raise RuntimeError("start_executor() must run before the bridge clients are imported")
+    server, url = start_fake_bridge(handler)
+    config.BRIDGE_URL = url
+
+    import pandas as pd
+    import utils.load_tokken as lt
+    from strategies.executer import StrategyExecutor
+
+    names = [leg_token(s, leg) for s in range(strategies) for leg in range(1, legs + 1)]
+    df = pd.DataFrame({
+        "scripname": names,
+        "exchangename": "NSEFO",
+        "marketlot": str(LOT_SIZE),
+        "lowerexchcircuitprice": "1",
+        "upperexchcircuitprice": "1000",
+        "maxqtyperorder": "1800",
+    })
+    lt._set_master(lt._compact_master(df), pd.Timestamp.now().strftime("%Y-%m-%d"))
+
+    executor = StrategyExecutor("bench", **executor_kwargs)
+    for s in range(strategies):
+        strat = {"Strategy Name": f"S{s}", "Diff Threshold": 1e9, "SL": 0, "TP": 0}
+        for leg in range(1, legs + 1):
+            strat[f"Token{leg}"] = leg_token(s, leg)
+            strat[f"Side{leg}"] = "BUY" if leg % 2 else "SELL"
+            strat[f"Lots{leg}"] = 1
+            strat[f"TotalQty{leg}"] = LOT_SIZE
+        executor.add_strategy(strat)
+    return executor, server
@@ -22,3 +22,33 @@ STRATEGY_EXPIRY_HOUR = 5  # Delete unsaved strategies after 5 AM daily
 STRATEGY_EXPIRY_DELTA = timedelta(days=1)
 LOG_ROTATION_TIME = "midnight"  # Daily log rotation
 LATENCY_THRESHOLD_MS = 200  # Max latency in ms
+
+# ========== Bridge ==========
+BRIDGE_URL = "http://127.0.0.1:21000"
+BRIDGE_POOL_SIZE = 16  # Keep-alive connections shared by every bridge client
+
+# ========== Market Data ==========
+QUOTE_CACHE_TTL_MS = 200  # Max age of a cached LTP/BID/ASK within one executor cycle
+QUOTE_FEED_INTERVAL_MS = 100  # Poll period of the background quote feed
+QUOTE_FETCH_CONCURRENCY = 16  # Max bridge quote calls in flight for one get_quotes() batch
+
+# ========== Scripmaster ==========
+SCRIPMASTER_REFRESH_SEC = 900  # Intraday re-check of the masters (circuit bands move during the day)
+SCRIPMASTER_RETRY_SEC = 30  # GUI retries a failed startup load after this
+SCRIPMASTER_WAIT_SEC = 120  # add_strategy fails if the master is still not loaded after this
+
+# ========== Executor ==========
+TICK_INTERVAL_TRIGGERED_MS = 100  # Cadence for strategies holding a position (SL/TP checks)
+TICK_INTERVAL_WAITING_MS = 200  # Cadence for strategies still waiting for their entry diff
+
+# ========== Orders ==========
+ORDER_TRACKER_INTERVAL_MS = 50  # Sweep period for fill qty / avg price / status of open orders
+ORDER_TRACKER_CONCURRENCY = 16  # Max bridge status calls in flight in one sweep
+ORDER_TRACKER_OPEN_EVERY = 4  # Ask IsOrderOpen every Nth sweep; fill qty is asked every sweep
+ORDER_POOL_WORKERS = 8  # Pre-started threads running entry / square-off tasks
+ORDER_POOL_MAX_PENDING = 64  # Queued order tasks before new triggers are turned away
+KILL_SWITCH_DEADLINE_SEC = 5  # Kill switch gives up waiting for counter orders to complete after this
+KILL_SWITCH_BULK = "strategy"  # "strategy": IB_SquareOffStrategy per strategy, "all": one IB_SquareOffAll (also closes positions not opened here), "orders": market counter orders per leg
+
+# ========== GUI ==========
+GUI_MAX_FPS = 10  # Max batched table refreshes per second from the executor
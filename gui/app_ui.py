@@ -1,18 +1,21 @@
 from PyQt5.QtWidgets import (
     QMainWindow, QDialog, QVBoxLayout, QRadioButton, QLineEdit, QPushButton, QHBoxLayout, QLabel, QButtonGroup,
-    QComboBox, QSpinBox, QWidget, QTableWidget, QTableWidgetItem, QMessageBox, QAbstractItemView, QFileDialog, QCheckBox
+    QComboBox, QSpinBox, QWidget, QTableView, QMessageBox, QAbstractItemView, QFileDialog, QCheckBox,
+    QProgressBar
 )
-from PyQt5.QtCore import Qt, QEvent, QTimer
-from datetime import datetime
+from PyQt5.QtCore import Qt, QEvent, QTimer, pyqtSignal
 from strategies.executer import StrategyExecutor
-from trading.xts_market import get_ltp
-from utils.load_tokken import get_valid_expiries, get_valid_strikes, get_lot_size
+from gui.strategy_model import StrategyTableModel
+from gui.leg_lookup import LegLookup
+from trading.xts_market import subscribe_one_token_per_exchange
+from utils.load_tokken import get_valid_expiries, get_valid_strikes, get_lot_size, get_instrument, get_all_scripnames
 import csv
-from utils.load_tokken import load_scripmaster
+from contextlib import nullcontext
+from utils.load_tokken import load_scripmaster_async, wait_for_master, start_scripmaster_refresh
 from data.saved_strategies import save_strategies, load_strategies
 from strategies.manager import StrategyManager
 from utils.strategy_helpers import calculate_per_ratio_diff
-from PyQt5.QtGui import QColor, QBrush
+from PyQt5.QtGui import QColor
 import json
 import os
 import config
@@ -51,12 +54,17 @@ class StrikeComboBox(QComboBox):
 class AddStrategyDialog(QDialog):
     def __init__(self, parent=None, strategy_data=None, edit_mode=False):
         super().__init__(parent)
-        self.scrip_df = load_scripmaster()
+        # MainWindow only opens this once the background load is done, so this returns at once
+        self.scrip_df = wait_for_master()
         self.setWindowTitle("Add / Edit Strategy")
         self.underlyings = ["NIFTY", "BANKNIFTY", "SENSEX", "BANKEX"]
         self.leg_widgets = []
         self.strategy_data = strategy_data
         self.edit_mode = edit_mode
+        # Bridge lookups run on a worker; answers land in _leg_quotes via a signal
+        self._leg_quotes = {}  # leg layout -> (token, ltp, lot size)
+        self.lookup = LegLookup(self)
+        self.lookup.result_signal.connect(self._on_leg_quote)
 
 
         main_layout = QVBoxLayout(self)
@@ -258,18 +266,9 @@ class AddStrategyDialog(QDialog):
         hl.addWidget(lot_lbl)
         hl.addWidget(total_qty_lbl)
 
-        def expiry_key(ds):
-            for fmt in ("%d-%b-%Y", "%d-%b-%y"):
-                try:
-                    return datetime.strptime(ds, fmt)
-                except ValueError:
-                    continue
-            return datetime.max
-
         def refresh_expiries():
             code = ucb.currentText().strip().upper()
-            expiry_list = get_valid_expiries(code)
-            expiry_list = sorted(expiry_list, key=expiry_key)
+            expiry_list = get_valid_expiries(code)  # already date-sorted by the chain index
             ecb.blockSignals(True)
             ecb.clear()
             ecb.addItem("--SELECT--")
@@ -281,8 +280,7 @@ class AddStrategyDialog(QDialog):
             expiry = ecb.currentText().strip().upper()
             opt_type = tcb.currentText().strip().upper()
             current_strike = strike_cb.currentText().strip()
-            strike_list = get_valid_strikes(code, expiry, opt_type)
-            strike_list = sorted(strike_list, key=lambda x: float(x) if x.replace('.', '', 1).isdigit() else float('inf'))
+            strike_list = get_valid_strikes(code, expiry, opt_type)  # already numerically sorted
             strike_cb.blockSignals(True)
             strike_cb.clear()
             strike_cb.addItem("--SELECT--")
@@ -298,30 +296,14 @@ class AddStrategyDialog(QDialog):
             strike_cb.blockSignals(False)
 
         def update_price_lot():
-            underlying = ucb.currentText().strip().upper()
-            expiry = ecb.currentText().strip().upper()
-            opt_type = tcb.currentText().strip().upper()
-            strike = strike_cb.currentText().strip()
-            if (
-                underlying in ("", "--SELECT--") or
-                expiry in ("", "--SELECT--") or
-                opt_type in ("", "--SELECT--") or
-                strike in ("--SELECT--", "0", "")
-            ):
-                price_lbl.setText("Price: --")
-                lot_lbl.setText("Lot size: --")
-                total_qty_lbl.setText("Total Qty: --")
-                return
-            tok = f"{underlying} {expiry} {opt_type} {strike}"
-            ltp = get_ltp(tok)
-            lot = get_lot_size(tok)
-            lots_val = lots_spin.value()
-            price_lbl.setText(f"Price: ₹{ltp:.2f}" if ltp else "Price: --")
-            lot_lbl.setText(f"Lot size: {lot}" if lot else "Lot size: --")
-            if lot and lots_val:
-                total_qty_lbl.setText(f"Total Qty: {int(lot) * lots_val}")
+            # Show what we already know now; the worker fills in the rest
+            token = self._leg_token(ucb, ecb, tcb, strike_cb)
+            if token is None:
+                self.lookup.forget(hl)
+                self._leg_quotes.pop(hl, None)
             else:
-                total_qty_lbl.setText("Total Qty: --")
+                self.lookup.request({hl: token})
+            self._show_leg_quote(hl)
 
         ucb.currentTextChanged.connect(lambda: (refresh_expiries(), refresh_strikes(), update_price_lot(), self.update_live_diff()))
         ecb.currentTextChanged.connect(lambda: (refresh_strikes(), update_price_lot(), self.update_live_diff()))
@@ -395,6 +377,8 @@ class AddStrategyDialog(QDialog):
                         w.setParent(None)
                 self.legs_layout.removeItem(hl)
                 self.leg_widgets.remove(entry)
+                self.lookup.forget(hl)
+                self._leg_quotes.pop(hl, None)
                 break
         self.validate_all()
         self.update_live_diff()
@@ -445,31 +429,75 @@ class AddStrategyDialog(QDialog):
     def save_strategies_to_file(self):
         save_strategies(self.strategy_list)
 
+    def _cached_leg_inputs(self):
+        """
+        (legs, prices, lot_sizes, complete) for the legs with a cached price and lot
+        size; complete is False if any leg is still missing one.
+        """
+        prices = []
+        legs_info = []
+        lot_sizes_info = []
+        complete = True
+        for (hl, ucb, ecb, strike_cb, tcb, scb, lots_spin, *_ ) in self.leg_widgets:
+            token = self._leg_token(ucb, ecb, tcb, strike_cb)
+            cached = self._leg_quotes.get(hl)
+            if token is None or not cached or cached[0] != token or cached[2] <= 0 or cached[1] <= 0:
+                complete = False
+                continue
+            prices.append(cached[1])
+            legs_info.append({"side": scb.currentText(), "lots": lots_spin.value()})
+            lot_sizes_info.append(cached[2])
+        return legs_info, prices, lot_sizes_info, complete
+
     def update_live_diff(self):
-            try:
-                legs = []
-                prices = []
-                lot_sizes = []
-                
-                for (_, ucb, ecb, strike_cb, tcb, scb, lots_spin, *_ ) in self.leg_widgets:
-                    # 1. Get leg info
-                    legs.append({'side': scb.currentText(), 'lots': lots_spin.value()})
-                    
-                    # 2. Get price
-                    token_str = f"{ucb.currentText()} {ecb.currentText()} {tcb.currentText()} {strike_cb.currentText()}"
-                    ltp = get_ltp(token_str)
-                    prices.append(ltp if ltp else None)
-                    
-                    # 3. Get lot size
-                    lot = get_lot_size(token_str)
-                    lot_sizes.append(int(lot) if lot else None)
+        # Uses the last looked-up prices only; never calls the bridge on the GUI thread
+        legs_info, prices, lot_sizes_info, _ = self._cached_leg_inputs()
+        if len(legs_info) >= 2:
+            # FIX: Call helper with 3 args, expect float
+            diff = calculate_per_ratio_diff(legs_info, prices, lot_sizes_info)
+            self.live_diff_label.setText(f"Current Diff: {diff:.2f}")
+        else:
+            self.live_diff_label.setText("Current Diff: --")
 
-                # Calculate diff using the CORRECT executor logic
-                diff = calculate_per_ratio_diff(legs, prices, lot_sizes)
-                self.live_diff_label.setText(f"Current Diff: {diff:.2f}")
+    @staticmethod
+    def _leg_token(ucb, ecb, tcb, strike_cb):
+        """Token for a leg's selection, or None while any part is unselected."""
+        scripshortname = ucb.currentText().strip().upper()
+        expirydate = ecb.currentText().strip().upper()
+        optiontype = tcb.currentText().strip().upper()
+        strikeprice = strike_cb.currentText().strip()
+        if (
+            not scripshortname or scripshortname == "--SELECT--" or
+            not expirydate or expirydate == "--SELECT--" or
+            not optiontype or optiontype == "--SELECT--" or
+            not strikeprice or strikeprice in ("--SELECT--", "0", "")
+        ):
+            return None
+        return f"{scripshortname} {expirydate} {optiontype} {strikeprice}".strip().upper()
 
-            except Exception:
-                self.live_diff_label.setText("Current Diff: --")
+    def _show_leg_quote(self, leg):
+        """Refresh one leg's Price / Lot size / Total Qty labels from the lookup cache."""
+        for (hl, ucb, ecb, strike_cb, tcb, scb, lots_spin, price_lbl, lot_lbl, total_qty_lbl) in self.leg_widgets:
+            if hl is not leg:
+                continue
+            token = self._leg_token(ucb, ecb, tcb, strike_cb)
+            cached = self._leg_quotes.get(hl)
+            if token is None or not cached or cached[0] != token or cached[2] <= 0:
+                price_lbl.setText("Price: --")
+                lot_lbl.setText("Lot size: --")
+                total_qty_lbl.setText("Total Qty: --")
+                return
+            _, ltp, lot = cached
+            price_lbl.setText(f"Price: ₹{ltp:.2f}" if ltp > 0 else "Price: --")
+            lot_lbl.setText(f"Lot size: {lot}")
+            total_qty_lbl.setText(f"Total Qty: {lots_spin.value() * lot}")
+            return
+
+    def _on_leg_quote(self, leg, token, ltp, lot):
+        # Only the newest answer per leg reaches here (LegLookup drops stale ones)
+        self._leg_quotes[leg] = (token, ltp, lot)
+        self._show_leg_quote(leg)
+        self.update_live_diff()
 
     def make_token(underlying, expiry, opt_type, strike):
         return f"{underlying} {expiry} {opt_type} {strike}".strip().upper()
@@ -484,18 +512,10 @@ class AddStrategyDialog(QDialog):
                 # 1. Get user's threshold
                 entered_threshold = float(self.diff_edit.text().strip())
 
-                # 2. Get current live diff (re-using logic from update_live_diff)
-                legs = []
-                prices = []
-                lot_sizes = []
-                
-                for (_, ucb, ecb, strike_cb, tcb, scb, lots_spin, *_ ) in self.leg_widgets:
-                    legs.append({'side': scb.currentText(), 'lots': lots_spin.value()})
-                    token_str = f"{ucb.currentText()} {ecb.currentText()} {tcb.currentText()} {strike_cb.currentText()}"
-                    ltp = get_ltp(token_str)
-                    prices.append(ltp if ltp else None)
-                    lot = get_lot_size(token_str)
-                    lot_sizes.append(int(lot) if lot else None)
+                # 2. Get current live diff from the prices the lookup worker last returned
+                legs, prices, lot_sizes, complete = self._cached_leg_inputs()
+                if not complete:
+                    raise ValueError("prices not available for every leg yet")
 
                 # Calculate diff using the executor's logic
                 diff_result = calculate_per_ratio_diff(legs, prices, lot_sizes)
@@ -526,13 +546,13 @@ class AddStrategyDialog(QDialog):
                 return f"{underlying} {expiry} {opt_type} {strike}".strip().upper()
             for idx, (_, ucb, ecb, strike_cb, tcb, scb, lots_spin, price_lbl, lot_lbl, total_qty_lbl) in enumerate(self.leg_widgets, start=1):
                 token = make_token(ucb.currentText(), ecb.currentText(), tcb.currentText(), strike_cb.currentText())
-                row = self.scrip_df[self.scrip_df["scripname"].str.upper() == token]
+                inst = get_instrument(token)
 
-                if row.empty:
+                if inst is None:
                     QMessageBox.warning(self, "Order Size Error", f"Leg {idx}: {token} not found in scripmaster.")
                     return
-                maxqty = int(row['maxqtyperorder'].values[0])
-                lot_size = int(row['marketlot'].values[0])
+                maxqty = int(inst.max_qty)
+                lot_size = int(inst.lot_size)
                 entered_lots = lots_spin.value()
                 entered_qty = entered_lots * lot_size
                 if entered_qty > maxqty:
@@ -547,8 +567,15 @@ class AddStrategyDialog(QDialog):
             
     def closeEvent(self, event):
         self.live_update_timer.stop()
+        self.lookup.close()
         super().closeEvent(event)
 
+    def done(self, result):
+        # accept()/reject() don't go through closeEvent
+        self.live_update_timer.stop()
+        self.lookup.close()
+        super().done(result)
+
     def get_strategy_data(self):
         data = {
             "Strategy Name": self.name_edit.text().strip(),
@@ -575,74 +602,26 @@ class AddStrategyDialog(QDialog):
             lots_spin.valueChanged.connect(self.update_leg_prices_and_diff)
 
     def update_leg_prices_and_diff(self):
-        prices = []
-        legs_info = []
-        lot_sizes_info = []
-
-        for idx, (_, ucb, ecb, strike_cb, tcb, scb, lots_spin, price_lbl, lot_lbl, total_qty_lbl) in enumerate(self.leg_widgets):
-            scripshortname = ucb.currentText().strip().upper()
-            expirydate = ecb.currentText().strip().upper()
-            optiontype = tcb.currentText().strip().upper()
-            strikeprice = strike_cb.currentText().strip()
-            
-            if (
-                not scripshortname or scripshortname == "--SELECT--" or
-                not expirydate or expirydate == "--SELECT--" or
-                not optiontype or optiontype == "--SELECT--" or
-                not strikeprice or strikeprice in ("--SELECT--", "0", "")
-            ):
-                price_lbl.setText("Price: --")
-                lot_lbl.setText("Lot size: --")
-                total_qty_lbl.setText("Total Qty: --")
-                prices.append(None)
-                legs_info.append(None)
-                lot_sizes_info.append(None)
-                continue
-
-            token = f"{scripshortname} {expirydate} {optiontype} {strikeprice}".strip().upper()
-            
-            # Lot size via get_lot_size
-            marketlot = get_lot_size(token)
-            entered_lots = lots_spin.value()
-
-            if not marketlot or int(marketlot) <= 0:
-                price_lbl.setText("Price: --")
-                lot_lbl.setText("Lot size: --")
-                total_qty_lbl.setText("Total Qty: --")
-                prices.append(None)
-                legs_info.append(None)
-                lot_sizes_info.append(None)
-                continue
+        # Repaint from what is cached, then ask the worker for fresh prices
+        wanted = {}
+        for (hl, ucb, ecb, strike_cb, tcb, *_ ) in self.leg_widgets:
+            token = self._leg_token(ucb, ecb, tcb, strike_cb)
+            if token is None:
+                self.lookup.forget(hl)
+                self._leg_quotes.pop(hl, None)
             else:
-                lot_lbl.setText(f"Lot size: {marketlot}")
-                total_qty = entered_lots * int(marketlot)
-                total_qty_lbl.setText(f"Total Qty: {total_qty}")
-
-            # Price lookup
-            ltp = get_ltp(token)
-            if not ltp or float(ltp) <= 0:
-                price_lbl.setText("Price: --")
-                prices.append(None)
-            else:
-                price_lbl.setText(f"Price: ₹{float(ltp):.2f}")
-                prices.append(float(ltp))
-            
-            legs_info.append({"side": scb.currentText(), "lots": entered_lots})
-            lot_sizes_info.append(int(marketlot))
-
-        # FIX: Crash fix
-        # Filter out Nones before passing to helper
-        valid_indices = [i for i, p in enumerate(prices) if p is not None]
-        valid_legs = [legs_info[i] for i in valid_indices]
-        valid_prices = [prices[i] for i in valid_indices]
-        valid_lot_sizes = [lot_sizes_info[i] for i in valid_indices]
+                wanted[hl] = token
+            self._show_leg_quote(hl)
+        self.update_live_diff()
 
-        if len(valid_legs) >= 2 and len(valid_legs) == len(valid_prices) == len(valid_lot_sizes):
-            # FIX: Call helper with 3 args, expect float
-            diff = calculate_per_ratio_diff(valid_legs, valid_prices, valid_lot_sizes)
-            self.live_diff_label.setText(f"Current Diff: {diff:.2f}")
-        else:
-            self.live_diff_label.setText("Current Diff: --")
+        # Don't queue another refresh behind a slow bridge; the next tick will retry
+        if wanted and not self.lookup.busy():
+            self.lookup.request(wanted)
+        elif wanted:
+            # Legs whose contract changed still get looked up right away
+            changed = {hl: t for hl, t in wanted.items() if self._leg_quotes.get(hl, (None,))[0] != t}
+            if changed:
+                self.lookup.request(changed)
 
 
     def eventFilter(self, obj, event):
@@ -668,9 +647,17 @@ class MainWindow(QMainWindow):
      - Top row: Load CSV / Save CSV / Add / Delete / Manual Square-Off
      - Next row: Start / Stop / Start All / Stop All
      - Table with columns for strategy details including lots, order qty, traded qty
+    The scripmaster loads in the background (start_master_load); until it is ready
+    Add Strategy / Load CSV stay disabled and saved strategies are not restored.
     """
+    master_progress_signal = pyqtSignal(str)
+    master_ready_signal = pyqtSignal(bool, str)
+
     def __init__(self):
         super().__init__()
+        self.master_loaded = False
+        self._master_failures = 0
+        self.strategy_list = []
         self.user_id = config.CLIENT_CODE 
         self.setWindowTitle("Strategy Executor")
         self.setGeometry(200, 200, 1350, 700)
@@ -718,7 +705,7 @@ class MainWindow(QMainWindow):
         ml_layout.addWidget(QLabel("Global Max Loss:"))
         self.max_loss_edit = QLineEdit(str(load_max_loss()))
         self.max_loss_edit.setPlaceholderText("e.g., 5000")
-        self.max_loss_edit.editingFinished.connect(lambda: save_max_loss(self.max_loss_edit.text()))
+        self.max_loss_edit.editingFinished.connect(self._on_max_loss_edited)
         ml_layout.addWidget(self.max_loss_edit)
         
         # Add both layouts to the main layout
@@ -738,9 +725,10 @@ class MainWindow(QMainWindow):
             ]
 
         # Create the table BEFORE setting headers/column counts!
-        self.table = QTableWidget()
-        self.table.setColumnCount(len(self.col_headers))
-        self.table.setHorizontalHeaderLabels(self.col_headers)
+        # Model/view: cells live in the model, updates repaint only what changed
+        self.table_model = StrategyTableModel(self.col_headers, self)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
 
         self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
@@ -751,14 +739,11 @@ class MainWindow(QMainWindow):
         self.executor = StrategyExecutor(self.user_id, parent=self, max_loss_global=self.get_global_max_loss())
         
         # FIX 2: Connect signals to the *correct* executor instance
-        self.executor.update_pnl_signal.connect(self._on_update_pnl)
-        if hasattr(self.executor, "update_diff_signal"):
-            print(f"[GUI] Connecting signals for executor: {self.executor}")
-            self.executor.update_diff_signal.connect(self._on_update_diff)
-        if hasattr(self.executor, "update_qty_signal"):
-            self.executor.update_qty_signal.connect(self._on_update_qty)
-        if hasattr(self.executor, "update_status_signal"):
-            self.executor.update_status_signal.connect(self._on_update_status)
+        # Ticks and order threads publish through one coalesced batch per frame
+        self.executor.update_batch_signal.connect(self._apply_updates)
+        self.executor.max_loss_signal.connect(self._on_max_loss_hit)
+        self.executor.square_off_done_signal.connect(self._on_square_off_done)
+        self.executor.kill_switch_done_signal.connect(self._on_kill_switch_done)
         
         self.manager = StrategyManager(self.executor)
         self.executor.start()
@@ -766,12 +751,12 @@ class MainWindow(QMainWindow):
         # UI signals
         self.btn_add.clicked.connect(self.open_add_dialog)
         self.btn_delete.clicked.connect(self.delete_selected_strategy)
-        self.table.cellDoubleClicked.connect(self.edit_strategy_dialog)
+        self.table.doubleClicked.connect(lambda index: self.edit_strategy_dialog(index.row(), index.column()))
         self.btn_stop.clicked.connect(self.stop_selected_strategy)
         self.btn_start_all.clicked.connect(self.start_all_strategies)
         self.btn_stop_all.clicked.connect(self.stop_all_strategies)
         self.btn_manual_sqoff.clicked.connect(self.manual_square_off)
-        self.table.itemSelectionChanged.connect(self._update_button_states)
+        self.table.selectionModel().selectionChanged.connect(self._update_button_states)
         self.btn_kill_switch.clicked.connect(self.handle_kill_switch)
         self.btn_save.clicked.connect(self.save_strategies_to_file)
         self.btn_start.clicked.connect(self.start_selected_strategy)
@@ -779,20 +764,77 @@ class MainWindow(QMainWindow):
         self.btn_load.clicked.connect(self.load_csv)
         self.btn_save.clicked.connect(self.save_csv)
 
-        self.strategy_list = load_strategies()
+        # Background scripmaster load -> status bar
+        self.master_progress_signal.connect(self._on_master_progress)
+        self.master_ready_signal.connect(self._on_master_ready)
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 0)  # busy indicator
+        self.load_progress.setMaximumWidth(160)
+        self.statusBar().addPermanentWidget(self.load_progress)
+        self.load_progress.hide()
 
+        self._update_button_states()
+
+    def start_master_load(self):
+        """
+        Load the scripmaster and subscribe the broker feed off the GUI thread.
+        Progress goes to the status bar; saved strategies are restored when done.
+        """
+        self.load_progress.show()
+        self.statusBar().showMessage("Loading scripmaster...")
+        future = load_scripmaster_async(progress=self.master_progress_signal.emit)
+        future.add_done_callback(self._master_load_done)
+
+    def _master_load_done(self, future):
+        # Runs on the loader thread
+        error = future.exception()
+        if error is None:
+            self.master_progress_signal.emit("Subscribing broker feed...")
+            try:
+                subscribe_one_token_per_exchange(future.result())
+            except Exception as e:
+                print(f"❌ Error subscribing broker's Feed: {e}")
+        self.master_ready_signal.emit(error is None, str(error or ""))
+
+    def _on_master_progress(self, message):
+        self.statusBar().showMessage(message)
+
+    def _on_master_ready(self, ok, error):
+        self.load_progress.hide()
+        if not ok:
+            # Nothing can be added until the master loads, so keep retrying in the background
+            self._master_failures += 1
+            self.statusBar().showMessage(
+                f"Scripmaster load failed ({self._master_failures}x): {error}. "
+                f"Retrying in {config.SCRIPMASTER_RETRY_SEC}s..."
+            )
+            QTimer.singleShot(config.SCRIPMASTER_RETRY_SEC * 1000, self.start_master_load)
+            if self._master_failures == 1:
+                QMessageBox.warning(
+                    self, "Scripmaster",
+                    f"Failed to load scripmaster:\n{error}\n\nRetrying every {config.SCRIPMASTER_RETRY_SEC}s; "
+                    "strategies can be added once it loads.",
+                )
+            return
+
+        self.master_loaded = True
+        self.strategy_list = load_strategies()
         for strat in self.strategy_list:
             self._add_strategy_to_table(strat)
             self.executor.add_strategy(strat)
-        
-        # self.executor.update_diff_signal.connect(self._on_update_diff) # Already connected
-        # self.executor.update_status_signal.connect(self._on_update_status) # Already connected
+        self.statusBar().showMessage("Scripmaster loaded", 5000)
+        # Keep circuit bands current through the session; swaps are atomic for readers
+        start_scripmaster_refresh()
         self._update_button_states()
     
     def get_all_valid_tokens(self):
-        df = load_scripmaster()
-        return set(df["scripname"].astype(str).str.upper().str.strip())
+        return get_all_scripnames()
     
+    def _on_max_loss_edited(self):
+        save_max_loss(self.max_loss_edit.text())
+        # The executor's risk engine checks the new limit from the next quote on
+        self.executor.set_max_loss(self.get_global_max_loss())
+
     def get_global_max_loss(self):
         val = self.max_loss_edit.text().strip()
         try:
@@ -817,7 +859,7 @@ class MainWindow(QMainWindow):
                     QMessageBox.warning(self, "Load Error", "CSV file is empty!")
                     return
                 self.strategy_list.clear()
-                self.table.setRowCount(0)
+                self.table_model.clear()
 
                 # Get all valid tokens from scripmaster for validation
                 valid_tokens = self.get_all_valid_tokens()
@@ -854,26 +896,26 @@ class MainWindow(QMainWindow):
                         self.executor.add_strategy(strat)
                         self._update_button_states()
                         self.manager.disable_strategy(strat.get("Strategy Name", strat.get("Name", "")))
-                        row = self.table.rowCount() - 1
+                        row = self.table_model.rowCount() - 1
                         self.update_serial_color(row)
                         # --- Force Current Diff/price update (safe, doesn't enable) ---
                         name = strat.get("Strategy Name", strat.get("Name", ""))
-                        state = self.executor.active_strategies.get(name)
+                        state = self.executor.get_state(name)
                         if state:
-                            # FIX: Use executor's lock to temporarily change status for tick
-                            with self.executor.state_lock:
+                            # FIX: Use the strategy's lock to temporarily change status for tick
+                            with state["lock"]:
                                 old_status = state["status"]
                                 state["status"] = "waiting"
                             
                             print(f"[LOAD_CSV] About to tick strategy: {strat.get('Strategy Name', strat.get('Name', ''))}")
                             self.executor._tick(state)
                             
-                            with self.executor.state_lock:
+                            with state["lock"]:
                                 state["status"] = old_status
                     else:
                         print(f"[LOAD_CSV] Skipped strategy: {strat}")
                         skipped.append(strat.get("Name") or strat.get("Strategy Name") or "Unknown")
-                if self.table.rowCount() > 0:
+                if self.table_model.rowCount() > 0:
                     self.table.selectRow(0)
                 self._update_button_states()
                 
@@ -943,10 +985,10 @@ class MainWindow(QMainWindow):
 
     def update_serial_color(self, row):
         try:
-            name = self.table.item(row, 1).text()
-            # FIX: Use lock to safely read state
-            with self.executor.state_lock:
-                state = self.executor.active_strategies.get(name, {})
+            name = self.table_model.name_at(row)
+            # FIX: Use the strategy's own lock to safely read state
+            state = self.executor.get_state(name) or {}
+            with state.get("lock") or nullcontext():
                 status = state.get("status", "disabled").lower()
                 
                 fully_traded = True
@@ -977,35 +1019,24 @@ class MainWindow(QMainWindow):
         else:
             color = QColor("red") # Default to red for any other unknown state
 
-        # 👉 Only color index 0 (S.No) column
-        item = self.table.item(row, 0)
-        if item:
-            item.setBackground(QBrush(color))
-
-        # Reset all other columns to default/white
-        for col in range(1, self.table.columnCount()):
-            item = self.table.item(row, col)
-            if item:
-                item.setBackground(QBrush(Qt.white))
+        # 👉 Only color index 0 (S.No) column; the model keeps the rest white
+        self.table_model.set_row_color(row, color)
 
     def save_strategies_to_file(self):
         save_strategies(self.strategy_list)
 
-    def _add_strategy_to_table(self, strat: dict):
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-
-        # Set fixed columns (update this if you have more/less)
-        self.table.setItem(row, 0, QTableWidgetItem(str(row + 1)))  # S.No
+    def _strategy_cells(self, strat: dict) -> dict:
+        """Display text per column for a strategy dict (S.No comes from the model)."""
         name = strat.get("Name") or strat.get("Strategy Name") or ""
-        self.table.setItem(row, 1, QTableWidgetItem(name))
-        self.table.setItem(row, 2, QTableWidgetItem(str(strat.get("Diff", strat.get("Diff Threshold", "")))))
-        self.table.setItem(row, 3, QTableWidgetItem(str(strat.get("SL", ""))))
         tp = strat.get("TP", "")
-        tp_display = str(tp) if tp not in [None, "", "0", 0] else ""
-        self.table.setItem(row, 4, QTableWidgetItem(tp_display))
-        self.table.setItem(row, 5, QTableWidgetItem(str(strat.get("PnL", "0.00")))) # P&L
-        self.table.setItem(row, 6, QTableWidgetItem(str(strat.get("Current Diff", "0.00")))) # Current Diff
+        cells = {
+            1: name,
+            2: str(strat.get("Diff", strat.get("Diff Threshold", ""))),
+            3: str(strat.get("SL", "")),
+            4: str(tp) if tp not in [None, "", "0", 0] else "",
+            5: str(strat.get("PnL", "0.00")),  # P&L
+            6: str(strat.get("Current Diff", "0.00")),  # Current Diff
+        }
 
         # Now fill up to 8 legs
         col = 7  # Start after fixed columns
@@ -1014,7 +1045,7 @@ class MainWindow(QMainWindow):
             side = str(strat.get(f"Side{i}", "") or "")
             
             # Recalculate TotalQty from Lots and LotSize if possible
-            lots_str = strat.get(f"Lots{i}", "0")
+            lots_str = str(strat.get(f"Lots{i}", "0"))
             total_qty_str = ""
             if token and lots_str.isdigit():
                 lot_size = get_lot_size(token)
@@ -1035,13 +1066,16 @@ class MainWindow(QMainWindow):
             except Exception:
                 pass
             
-            self.table.setItem(row, col,   QTableWidgetItem(token))
-            self.table.setItem(row, col+1, QTableWidgetItem(side))
-            self.table.setItem(row, col+2, QTableWidgetItem(total_qty_str)) # TotalQty
-            self.table.setItem(row, col+3, QTableWidgetItem(order_qty_str)) # OrderQty (remaining)
-            self.table.setItem(row, col+4, QTableWidgetItem(traded_qty_str)) # TradedQty
+            cells[col] = token
+            cells[col+1] = side
+            cells[col+2] = total_qty_str # TotalQty
+            cells[col+3] = order_qty_str # OrderQty (remaining)
+            cells[col+4] = traded_qty_str # TradedQty
             col += 5
-        
+        return cells
+
+    def _add_strategy_to_table(self, strat: dict):
+        row = self.table_model.append_row(self._strategy_cells(strat))
         self.table.selectRow(row)
         self._update_button_states()
 
@@ -1053,7 +1087,7 @@ class MainWindow(QMainWindow):
             self._add_strategy_to_table(new_strat)
             self.executor.add_strategy(new_strat)
             # Ensure the newly added row is selected
-            self.table.selectRow(self.table.rowCount() - 1)
+            self.table.selectRow(self.table_model.rowCount() - 1)
             self._update_button_states()
 
     
@@ -1084,11 +1118,15 @@ class MainWindow(QMainWindow):
 
         return mapping.get(key, key)
         
+    def _current_row(self):
+        index = self.table.currentIndex()
+        return index.row() if index.isValid() else -1
+
     def get_selected_strategy_name(self):
-        row = self.table.currentRow()
+        row = self._current_row()
         if row < 0:
             return None
-        return self.table.item(row, 1).text()
+        return self.table_model.name_at(row)
 
 
     def edit_strategy_dialog(self, row, column):
@@ -1113,32 +1151,29 @@ class MainWindow(QMainWindow):
             self.executor.add_strategy(new_strat)  # This sets status to "waiting" and clears entry_diff
 
             pnl_col = self.col_headers.index("P&L")
-            self.table.setItem(row, pnl_col, QTableWidgetItem("0.00"))
+            self.table_model.set_cell(row, pnl_col, "0.00")
 
             self._update_button_states()
 
     
     def get_row_by_strategy_name(self, name):
-        for row in range(self.table.rowCount()):
-            item = self.table.item(row, 1)  # Column 1 should be the "Name" column
-            if item and item.text() == name:
-                return row
-        return None
+        # O(1): the model keeps a name -> row map
+        return self.table_model.row_of(name)
 
 
     def delete_selected_strategy(self):
-        row = self.table.currentRow()
+        row = self._current_row()
         if row < 0:
             QMessageBox.warning(self, "Delete", "Select a row to delete.")
             return
-        strat_name = self.table.item(row, 1).text()
+        strat_name = self.table_model.name_at(row)
         del self.strategy_list[row]
-        self.table.removeRow(row)
+        self.table_model.remove_row(row)
         self.executor.remove_strategy(strat_name)
         self._update_button_states()
 
     def start_selected_strategy(self):
-        row = self.table.currentRow()
+        row = self._current_row()
         if row < 0:
             QMessageBox.warning(self, "Start", "Select a row to start.")
             return
@@ -1147,11 +1182,11 @@ class MainWindow(QMainWindow):
         self._update_button_states()
 
     def stop_selected_strategy(self):
-        row = self.table.currentRow()
+        row = self._current_row()
         if row < 0:
             QMessageBox.warning(self, "Stop", "Select a row to stop.")
             return
-        name = self.table.item(row, 1).text()
+        name = self.table_model.name_at(row)
         self.manager.disable_strategy(name)
         self._update_button_states()
 
@@ -1169,160 +1204,144 @@ class MainWindow(QMainWindow):
         self._update_button_states()
 
     def manual_square_off(self):
-        # FIX: Use lock to get snapshot
-        with self.executor.state_lock:
-            states_to_sqoff = [state for state in self.executor.active_strategies.values() if state["status"] == "triggered"]
-        
-        for state in states_to_sqoff:
-            self.executor.square_off(state) # This will update status internally
-            row = self.get_row_by_strategy_name(state["strategy"]["Strategy Name"])
-            if row is not None:
-                self.update_serial_color(row)
-
+        # Square-offs run on the order pool; _on_square_off_done reports each one
+        names = [state["strategy"]["Strategy Name"] for state in self.executor.states()]
+        sent = [name for name in names if self.executor.request_square_off(name)]
+        if sent:
+            self.statusBar().showMessage(f"Squaring off {len(sent)} strategies...")
         self._update_button_states()
 
-    def _on_update_pnl(self, strat_name: str, pnl: float):
-        row = self.get_row_by_strategy_name(strat_name)
-        if row is not None:
-            self.table.setItem(row, 5, QTableWidgetItem(f"{pnl:.2f}"))
-
-
-    def _on_update_status(self, name, status):
+    def _on_square_off_done(self, name, ok):
         row = self.get_row_by_strategy_name(name)
         if row is not None:
             self.update_serial_color(row)
-            
-            # FIX: Use lock to safely read strategy list
-            # This might be slow, but safer.
-            # A better fix is to have a self.strategy_map[name] -> strat_dict
-            strat = next((s for s in self.strategy_list if s.get("Strategy Name") == name), None)
-            
-            if strat:
-                tp = strat.get("TP")
-                sl = strat.get("SL")
-                tp_col_index = 4  # Your actual TP column index
-                sl_col_index = 3  # Your actual SL column index
-                self.table.setItem(row, tp_col_index, QTableWidgetItem(str(tp) if tp not in ["", None, 0, "0"] else ""))
-                self.table.setItem(row, sl_col_index, QTableWidgetItem(str(sl) if sl else ""))
+        self._update_button_states()
+        if ok:
+            self.statusBar().showMessage(f"Strategy '{name}' squared off")
+        else:
+            QMessageBox.warning(self, "Manual Square-Off", f"Strategy '{name}' was not fully squared off. Check positions at the broker.")
 
+    def _set_cell(self, row, col, text):
+        # The model only signals the view if the text actually changed
+        self.table_model.set_cell(row, col, text)
 
-    def _on_update_diff(self, strat_name, diff):
-        row = self.get_row_by_strategy_name(strat_name)
-        if row is not None:
-            # print(f"[DIFF] strat={strat_name}, diff={diff}")
-            try:
-                self.table.setItem(row, 6, QTableWidgetItem(f"{float(diff):.2f}"))
-            except Exception:
-                pass
+    def _apply_updates(self, batch):
+        """
+        Apply one coalesced executor frame {name: {"diff"/"pnl"/"qty"/"status": value}}
+        in a single pass: one row lookup per strategy, unchanged cells left alone.
+        """
+        for name, changes in batch.items():
+            row = self.table_model.row_of(name)
+            if row is None:
+                continue
+            if "diff" in changes:
+                self._set_diff_cell(row, changes["diff"])
+            if "pnl" in changes:
+                self._set_cell(row, 5, f"{changes['pnl']:.2f}")
+            if "qty" in changes:
+                self._set_qty_cells(row, changes["qty"])
+            if "status" in changes:
+                self._set_status_cells(row, name)
+            elif "qty" in changes:
+                self.update_serial_color(row)
 
+    def _set_status_cells(self, row, name):
+        self.update_serial_color(row)
+        
+        # FIX: Use lock to safely read strategy list
+        # This might be slow, but safer.
+        # A better fix is to have a self.strategy_map[name] -> strat_dict
+        strat = next((s for s in self.strategy_list if s.get("Strategy Name") == name), None)
+        
+        if strat:
+            tp = strat.get("TP")
+            sl = strat.get("SL")
+            tp_col_index = 4  # Your actual TP column index
+            sl_col_index = 3  # Your actual SL column index
+            self._set_cell(row, tp_col_index, str(tp) if tp not in ["", None, 0, "0"] else "")
+            self._set_cell(row, sl_col_index, str(sl) if sl else "")
 
-    def _on_update_qty(self, strat_name, qty_list):
+
+    def _set_diff_cell(self, row, diff):
+        # print(f"[DIFF] row={row}, diff={diff}")
+        try:
+            self._set_cell(row, 6, f"{float(diff):.2f}")
+        except Exception:
+            pass
+
+
+    def _set_qty_cells(self, row, qty_list):
         """
         qty_list is expected as a list of tuples:
         [(total_qty1, traded_qty1), (total_qty2, traded_qty2), ...]
         """
-        row = self.get_row_by_strategy_name(strat_name)
-        if row is not None:
-            for idx in range(8):  # Always 8 legs
-                if idx < len(qty_list):
-                    total_qty, traded_qty = qty_list[idx]
-                    order_qty = total_qty - traded_qty
-                    total_qty_str = str(total_qty)
-                    order_qty_str = str(order_qty) if order_qty > 0 else ""
-                    traded_qty_str = str(traded_qty)
-                else:
-                    total_qty_str = order_qty_str = traded_qty_str = ""
-                base_col = 7 + idx*5
-                self.table.setItem(r, base_col+2, QTableWidgetItem(total_qty_str)) # TotalQty
-                self.table.setItem(r, base_col+3, QTableWidgetItem(order_qty_str)) # OrderQty
-                self.table.setItem(r, base_col+4, QTableWidgetItem(traded_qty_str)) # TradedQty
-            self.update_serial_color(row)
+        for idx in range(8):  # Always 8 legs
+            if idx < len(qty_list):
+                total_qty, traded_qty = qty_list[idx]
+                order_qty = total_qty - traded_qty
+                total_qty_str = str(total_qty)
+                order_qty_str = str(order_qty) if order_qty > 0 else ""
+                traded_qty_str = str(traded_qty)
+            else:
+                total_qty_str = order_qty_str = traded_qty_str = ""
+            base_col = 7 + idx*5
+            self._set_cell(row, base_col+2, total_qty_str) # TotalQty
+            self._set_cell(row, base_col+3, order_qty_str) # OrderQty
+            self._set_cell(row, base_col+4, traded_qty_str) # TradedQty
 
 
     def _update_button_states(self):
         any_strat = bool(self.strategy_list)
-        sel_row = self.table.currentRow()
-        sel_valid = (0 <= sel_row < self.table.rowCount())
+        sel_row = self._current_row()
+        sel_valid = (0 <= sel_row < self.table_model.rowCount())
         self.btn_save.setEnabled(any_strat)
-        self.btn_load.setEnabled(True)
+        self.btn_load.setEnabled(self.master_loaded)
+        self.btn_add.setEnabled(self.master_loaded)
         self.btn_delete.setEnabled(sel_valid)
         self.btn_manual_sqoff.setEnabled(any_strat) # Can sqoff all
 
-        # FIX: Use lock to safely check states
-        with self.executor.state_lock:
-            # Start button: enabled if selected row is not enabled
-            if sel_valid:
-                name = self.table.item(sel_row, 1).text()
-                state = self.executor.active_strategies.get(name)
-                if state:
-                    st = state.get("status", "disabled")
-                    self.btn_start.setEnabled(st in ("disabled", "sl_hit", "tp_hit", "squared_off"))
-                    self.btn_stop.setEnabled(st in ("enabled", "waiting", "triggered"))
-                else:
-                    self.btn_start.setEnabled(True)
-                    self.btn_stop.setEnabled(False)
+        # FIX: Status reads are single attribute loads; only the registry snapshot needs a lock
+        states = self.executor.states()
+        # Start button: enabled if selected row is not enabled
+        if sel_valid:
+            name = self.table_model.name_at(sel_row)
+            state = self.executor.get_state(name)
+            if state:
+                st = state.get("status", "disabled")
+                self.btn_start.setEnabled(st in ("disabled", "sl_hit", "tp_hit", "squared_off"))
+                self.btn_stop.setEnabled(st in ("enabled", "waiting", "triggered"))
             else:
-                self.btn_start.setEnabled(False)
+                self.btn_start.setEnabled(True)
                 self.btn_stop.setEnabled(False)
+        else:
+            self.btn_start.setEnabled(False)
+            self.btn_stop.setEnabled(False)
 
-            # Start All: enabled if any is not enabled
-            any_not_enabled = any(
-                s.get("status", "disabled") in ("disabled", "sl_hit", "tp_hit", "squared_off")
-                for s in self.executor.active_strategies.values()
-            )
-            self.btn_start_all.setEnabled(any_not_enabled)
-
-            # Stop All: enabled if any is enabled or waiting
-            any_enabled = any(
-                s.get("status", "disabled") in ("enabled", "waiting", "triggered")
-                for s in self.executor.active_strategies.values()
-            )
-            self.btn_stop_all.setEnabled(any_enabled)
+        # Start All: enabled if any is not enabled
+        any_not_enabled = any(
+            s.get("status", "disabled") in ("disabled", "sl_hit", "tp_hit", "squared_off")
+            for s in states
+        )
+        self.btn_start_all.setEnabled(any_not_enabled)
 
-    def _update_strategy_row(self, row, strat):
-        # Update fixed columns
-        self.table.setItem(row, 0, QTableWidgetItem(str(row + 1)))  # S.No
-        name = strat.get("Name") or strat.get("Strategy Name") or ""
-        self.table.setItem(row, 1, QTableWidgetItem(name))
-        self.table.setItem(row, 2, QTableWidgetItem(str(strat.get("Diff", strat.get("Diff Threshold", "")))))
-        self.table.setItem(row, 3, QTableWidgetItem(str(strat.get("SL", ""))))
-        self.table.setItem(row, 4, QTableWidgetItem(str(strat.get("TP", ""))))
-        self.table.setItem(row, 5, QTableWidgetItem(str(strat.get("PnL", "0.00"))))
-        self.table.setItem(row, 6, QTableWidgetItem(str(strat.get("Current Diff", "0.00"))))
-        
-        # Now fill up to 8 legs 
-        col = 7
-        for i in range(1, 9):
-            token = str(strat.get(f"Token{i}", "") or "")
-            side = str(strat.get(f"Side{i}", "") or "")
-            
-            # Recalculate TotalQty
-            lots_str = strat.get(f"Lots{i}", "0")
-            total_qty_str = ""
-            if token and lots_str.isdigit():
-                lot_size = get_lot_size(token)
-                if lot_size:
-                    total_qty_str = str(int(lots_str) * lot_size)
-            
-            if not total_qty_str:
-                 total_qty_str = str(strat.get(f"TotalQty{i}", "") or "")
+        # Stop All: enabled if any is enabled or waiting
+        any_enabled = any(
+            s.get("status", "disabled") in ("enabled", "waiting", "triggered")
+            for s in states
+        )
+        self.btn_stop_all.setEnabled(any_enabled)
 
-            traded_qty_str = str(strat.get(f"TradedQty{i}", "0") or "0")
-            order_qty_str = ""
-            try:
-                tq = int(total_qty_str) if total_qty_str else 0
-                tr = int(traded_qty_str) if traded_qty_str else 0
-                order_qty = tq - tr
-                order_qty_str = str(order_qty) if order_qty > 0 else ""
-            except Exception:
-                pass
+    def _on_max_loss_hit(self, message, summary, flat):
+        # The executor already fired the kill switch; tell the user what it did
+        self._update_button_states()
+        self.statusBar().showMessage(f"Global Max Loss hit: {summary}")
+        if flat:
+            QMessageBox.warning(self, "Global Max Loss", f"{message}\n\nAll strategies stopped.\n\n{summary}")
+        else:
+            QMessageBox.critical(self, "Global Max Loss", f"{message}\n\nSquare-off is not confirmed. Check positions at the broker.\n\n{summary}")
 
-            self.table.setItem(row, col,   QTableWidgetItem(token))
-            self.table.setItem(row, col+1, QTableWidgetItem(side))
-            self.table.setItem(row, col+2, QTableWidgetItem(total_qty_str)) # TotalQty
-            self.table.setItem(row, col+3, QTableWidgetItem(order_qty_str)) # OrderQty
-            self.table.setItem(row, col+4, QTableWidgetItem(traded_qty_str)) # TradedQty
-            col += 5
+    def _update_strategy_row(self, row, strat):
+        self.table_model.set_cells(row, self._strategy_cells(strat))
 
     def handle_kill_switch(self):
         confirm = QMessageBox.question(
@@ -1331,8 +1350,16 @@ class MainWindow(QMainWindow):
             QMessageBox.Yes | QMessageBox.No
         )
         if confirm == QMessageBox.Yes:
-            self.executor.kill_switch()
-            # self.btn_start.setEnabled(True) # These are set by _update_button_states
-            # self.btn_start_all.setEnabled(True)
-            self._update_button_states()
-            QMessageBox.information(self, "Kill Switch", "All orders cancelled and all positions squared off.\nAll strategies stopped.")
\ No newline at end of file
+            # The flatten waits on the bridge; keep the GUI responsive and report in _on_kill_switch_done
+            self.btn_kill_switch.setEnabled(False)
+            self.statusBar().showMessage("Kill switch: cancelling orders and squaring off...")
+            self.executor.request_kill_switch()
+
+    def _on_kill_switch_done(self, summary, flat):
+        self.btn_kill_switch.setEnabled(True)
+        self._update_button_states()
+        self.statusBar().showMessage(f"Kill switch: {summary}")
+        if flat:
+            QMessageBox.information(self, "Kill Switch", f"All orders cancelled and all positions squared off.\nAll strategies stopped.\n\n{summary}")
+        else:
+            QMessageBox.warning(self, "Kill Switch", f"All strategies stopped, but square-off is not confirmed. Check positions at the broker.\n\n{summary}")
\ No newline at end of file
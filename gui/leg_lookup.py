@@ -0,0 +1,93 @@
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QObject, pyqtSignal
+from trading.xts_market import get_ltps, quote_feed
+from utils.load_tokken import get_lot_size
+
+
+class LegLookup(QObject):
+    """
+    Price / lot-size lookups for the legs of AddStrategyDialog, off the GUI thread.
+
+    Requests are keyed by leg and tagged with a sequence number; a result is only
+    delivered (via result_signal, on the GUI thread) if it answers the latest
+    request for that leg, so a slow response for a contract the user has since
+    changed is dropped instead of overwriting the newer one.
+    """
+    result_signal = pyqtSignal(object, str, float, int)  # leg, token, ltp, lot size
+    _done_signal = pyqtSignal(object, int, str, float, int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # One worker: bridge lookups run in order and a slow bridge cannot pile up threads
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="LegLookup")
+        self._seq = itertools.count(1)
+        self._latest = {}    # leg -> (seq, token) of the newest request
+        self._pending = set()  # legs whose newest request is not answered yet
+        self._inflight = 0   # batches submitted but not yet answered
+        self._closed = False
+        self._done_signal.connect(self._deliver)
+
+    def request(self, legs):
+        """Look up {leg: token} in one batch. Legs already waiting on the same token are skipped."""
+        batch = []
+        for leg, token in legs.items():
+            latest = self._latest.get(leg)
+            if leg in self._pending and latest[1] == token:
+                continue
+            seq = next(self._seq)
+            self._latest[leg] = (seq, token)
+            self._pending.add(leg)
+            batch.append((leg, seq, token))
+        if batch and not self._closed:
+            self._inflight += 1
+            self._pool.submit(self._lookup, batch)
+
+    def busy(self):
+        return self._inflight > 0
+
+    def forget(self, leg):
+        """Drop any pending answer for a leg (removed, or its contract is incomplete)."""
+        self._latest.pop(leg, None)
+        self._pending.discard(leg)
+
+    def close(self):
+        self._closed = True
+        self._latest.clear()
+        self._pending.clear()
+        self._pool.shutdown(wait=False)
+
+    def _lookup(self, batch):
+        # Runs on the worker thread. Tokens a live strategy already uses come from the
+        # quote feed's last poll; only the rest go to the bridge
+        ltps = {token: quote_feed.get_ltp(token) for _, _, token in batch}
+        missing = [token for token, ltp in ltps.items() if not ltp]
+        if missing:
+            try:
+                ltps.update(get_ltps(missing))
+            except Exception as e:
+                print(f"Error fetching leg prices: {e}")
+        for leg, seq, token in batch:
+            try:
+                lot = int(get_lot_size(token) or 0)
+            except Exception:
+                lot = 0
+            try:
+                self._done_signal.emit(leg, seq, token, float(ltps.get(token) or 0.0), lot)
+            except RuntimeError:
+                return  # dialog already destroyed
+        try:
+            self._done_signal.emit(None, 0, "", 0.0, 0)  # end of batch
+        except RuntimeError:
+            pass
+
+    def _deliver(self, leg, seq, token, ltp, lot):
+        # GUI thread: only the newest request per leg gets through
+        if leg is None:
+            self._inflight = max(0, self._inflight - 1)
+            return
+        latest = self._latest.get(leg)
+        if self._closed or latest is None or latest[0] != seq:
+            return
+        self._pending.discard(leg)
+        self.result_signal.emit(leg, token, ltp, lot)
@@ -0,0 +1,143 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant
+from PyQt5.QtGui import QBrush, QColor
+
+NAME_COL = 1  # "Name" column; rows are keyed by it
+
+
+class StrategyTableModel(QAbstractTableModel):
+    """
+    Table model behind MainWindow's strategy table.
+
+    Each row is a plain list of display strings plus the S.No colour, keyed by
+    strategy name through an O(1) name -> row map. Updates only touch cells whose
+    text changed and report them with one dataChanged range per row, so the view
+    repaints just those cells instead of rebuilding items. Column 0 (S.No) is
+    derived from the row number.
+    """
+
+    def __init__(self, headers, parent=None):
+        super().__init__(parent)
+        self.headers = list(headers)
+        self._rows = []          # row -> [cell text per column]
+        self._colors = []        # row -> S.No cell colour as "#AARRGGBB" (or None)
+        self._names = []         # row -> strategy name
+        self._row_of = {}        # strategy name -> row
+        self._white = QBrush(Qt.white)
+        self._brushes = {}       # "#AARRGGBB" -> QBrush
+
+    # --- Qt model interface ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+        row, col = index.row(), index.column()
+        if role == Qt.DisplayRole:
+            if col == 0:
+                return str(row + 1)
+            return self._rows[row][col]
+        if role == Qt.BackgroundRole:
+            if col == 0 and self._colors[row] is not None:
+                return self._brushes[self._colors[row]]
+            return self._white
+        return QVariant()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return QVariant()
+        if orientation == Qt.Horizontal:
+            return self.headers[section] if section < len(self.headers) else QVariant()
+        return str(section + 1)
+
+    def flags(self, index):
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    # --- Row management ---
+    def _blank(self):
+        return [""] * len(self.headers)
+
+    def _reindex(self, start=0):
+        for row in range(start, len(self._names)):
+            self._row_of[self._names[row]] = row
+
+    def append_row(self, cells):
+        """Add a row from {col: text}; returns its row number."""
+        row = len(self._rows)
+        values = self._blank()
+        for col, text in cells.items():
+            values[col] = text
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._rows.append(values)
+        self._colors.append(None)
+        self._names.append(values[NAME_COL])
+        self._row_of.setdefault(values[NAME_COL], row)
+        self.endInsertRows()
+        return row
+
+    def remove_row(self, row):
+        if not 0 <= row < len(self._rows):
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        name = self._names[row]
+        del self._rows[row]
+        del self._colors[row]
+        del self._names[row]
+        if self._row_of.get(name) == row:
+            del self._row_of[name]
+        self._reindex(row)
+        self.endRemoveRows()
+        # S.No of the rows below shifted
+        if row < len(self._rows):
+            self.dataChanged.emit(self.index(row, 0), self.index(len(self._rows) - 1, 0))
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows, self._colors, self._names, self._row_of = [], [], [], {}
+        self.endResetModel()
+
+    # --- Lookups ---
+    def row_of(self, name):
+        return self._row_of.get(name)
+
+    def name_at(self, row):
+        return self._names[row] if 0 <= row < len(self._names) else None
+
+    def text(self, row, col):
+        return self._rows[row][col]
+
+    # --- Updates ---
+    def set_cells(self, row, cells):
+        """Set {col: text} on one row; a single dataChanged covers the cells that changed."""
+        values = self._rows[row]
+        first = last = None
+        for col, text in cells.items():
+            if values[col] != text:
+                values[col] = text
+                first = col if first is None else min(first, col)
+                last = col if last is None else max(last, col)
+        if first is None:
+            return False
+        if values[NAME_COL] != self._names[row]:
+            if self._row_of.get(self._names[row]) == row:
+                del self._row_of[self._names[row]]
+            self._names[row] = values[NAME_COL]
+            self._row_of.setdefault(values[NAME_COL], row)
+        self.dataChanged.emit(self.index(row, first), self.index(row, last), [Qt.DisplayRole])
+        return True
+
+    def set_cell(self, row, col, text):
+        return self.set_cells(row, {col: text})
+
+    def set_row_color(self, row, color):
+        """color is anything QColor accepts; repaints only if it actually changed."""
+        key = QColor(color).name(QColor.HexArgb)
+        if self._colors[row] != key:
+            if key not in self._brushes:
+                self._brushes[key] = QBrush(QColor(key))
+            self._colors[row] = key
+            idx = self.index(row, 0)
+            self.dataChanged.emit(idx, idx, [Qt.BackgroundRole])
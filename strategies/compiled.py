@@ -0,0 +1,101 @@
+from utils.load_tokken import get_lot_size
+
+
+def _parse_threshold(value):
+    """
+    SL/TP cell -> (number, is_pct). "1.5%" is a percentage of the entry diff,
+    anything else an absolute number; unparsable values disable the check (0).
+    """
+    try:
+        if isinstance(value, str) and value.strip().endswith('%'):
+            return float(value.strip().rstrip('%')), True
+        return float(value), False
+    except Exception:
+        return 0.0, False
+
+
+class CompiledStrategy:
+    """
+    Per-tick view of a strategy dict, built once in StrategyExecutor.add_strategy.
+
+    Only the live legs are kept (token, side and TotalQty set), in slot order, with
+    everything _tick used to re-parse every cycle resolved up front: normalized
+    tokens, sides as +1 (BUY) / -1 (SELL), lots, lot sizes, leg quantities and the
+    parsed SL/TP. Editing a strategy goes through remove + add, so this never
+    goes stale.
+    """
+
+    __slots__ = (
+        "name", "slots", "tokens", "side_names", "sides", "lots", "lot_sizes",
+        "quantities", "buy_quantity", "threshold",
+        "sl", "sl_is_pct", "sl_mode", "tp", "tp_is_pct", "tp_mode",
+    )
+
+    def __init__(self, strat):
+        self.name = strat.get("Strategy Name", "")
+        slots, tokens, side_names, lots, lot_sizes = [], [], [], [], []
+        for i in range(1, 9):
+            token = strat.get(f"Token{i}", "").strip().upper()
+            side = strat.get(f"Side{i}", "").strip().upper()
+            qty = float(strat.get(f"TotalQty{i}", 0) or 0)
+            if not token or not side or qty == 0:
+                continue  # Skip unused/blank legs
+            try:
+                lot_size = int(get_lot_size(token) or 1)
+            except Exception:
+                lot_size = 1
+            slots.append(i)
+            tokens.append(token)
+            side_names.append(side)
+            lots.append(int(strat.get(f"Lots{i}", 1)))
+            lot_sizes.append(lot_size)
+
+        self.slots = tuple(slots)
+        self.tokens = tuple(tokens)
+        self.side_names = tuple(side_names)
+        self.sides = tuple(1 if s == "BUY" else -1 for s in side_names)
+        self.lots = tuple(lots)
+        self.lot_sizes = tuple(lot_sizes)
+        # Same skip rule as calculate_per_ratio_diff: bad lots/lot size contribute nothing
+        self.quantities = tuple(
+            abs(l) * ls if l > 0 and ls > 0 else 0 for l, ls in zip(lots, lot_sizes)
+        )
+        self.buy_quantity = sum(q for q, s in zip(self.quantities, self.sides) if s > 0)
+
+        self.threshold = float(strat.get("Diff Threshold") or 0)
+        self.sl, self.sl_is_pct = _parse_threshold(strat.get("SL", 0))
+        self.tp, self.tp_is_pct = _parse_threshold(strat.get("TP", 0))
+        self.sl_mode = strat.get("SL_Mode", "diff")
+        self.tp_mode = strat.get("TP_Mode", "diff")
+
+    @property
+    def num_legs(self):
+        return len(self.tokens)
+
+    def legs(self):
+        """(side, lots, lot_size, token) per live leg, for the order/hedge code."""
+        return list(zip(self.side_names, self.lots, self.lot_sizes, self.tokens))
+
+    def diff(self, prices):
+        """
+        calculate_per_ratio_diff for valid (> 0) prices of the live legs:
+        (total buy value - total sell value) / total buy quantity. Buy and sell
+        values are summed separately in leg order, so the result is identical.
+        """
+        buy_value = 0.0
+        sell_value = 0.0
+        for qty, side, price in zip(self.quantities, self.sides, prices):
+            if qty:
+                if side > 0:
+                    buy_value += qty * price
+                else:
+                    sell_value += qty * price
+        if self.buy_quantity > 0:
+            return (buy_value - sell_value) / self.buy_quantity
+        return 0.0
+
+    def sl_value(self, entry_diff):
+        return (self.sl / 100.0) * abs(entry_diff) if self.sl_is_pct else self.sl
+
+    def tp_value(self, entry_diff):
+        return (self.tp / 100.0) * abs(entry_diff) if self.tp_is_pct else self.tp
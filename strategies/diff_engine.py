@@ -0,0 +1,220 @@
+import threading
+import numpy as np
+
+MAX_LEGS = 8
+
+# Per-row outcome of the SL/TP test, in the order _tick checks them
+NO_EXIT, TP_HIT, SL_HIT = 0, 1, 2
+
+# Up to this many strategies per call, plain Python per strategy beats the fixed
+# cost of the numpy pass (see benchmarks/bench_diff_engine.py)
+SCALAR_MAX_ROWS = 48
+
+
+def _evaluate_one(compiled, quotes, entry):
+    """The vectorized pass for a single strategy, in plain Python; same results."""
+    prices = [quotes.get(token) or 0.0 for token in compiled.tokens]
+    valid = all(price > 0 for price in prices)
+    net = compiled.diff(prices)
+    exit_hit = NO_EXIT
+    if valid:
+        long_side = entry >= 0
+        tp = compiled.tp_value(entry)
+        sl = compiled.sl_value(entry)
+        if compiled.tp_mode == "abs":
+            tp_hit = net >= tp if long_side else net <= tp
+        else:
+            tp_hit = net >= entry + abs(tp) if long_side else net <= entry - abs(tp)
+        if compiled.sl_mode == "abs":
+            sl_hit = net <= sl if long_side else net >= sl
+        else:
+            sl_hit = net <= entry - abs(sl) if long_side else net >= entry + abs(sl)
+        if tp != 0 and tp_hit:
+            exit_hit = TP_HIT
+        elif sl != 0 and sl_hit:
+            exit_hit = SL_HIT
+    return (net, valid, valid and net >= compiled.threshold, exit_hit)
+
+
+class DiffEngine:
+    """
+    All active strategies as one padded (strategies x 8 legs) matrix, so the
+    per-ratio diff, trigger test and SL/TP test of every strategy due a tick come
+    out of a single vectorized pass over the latest prices.
+
+    Buy and sell quantities live in separate matrices and are accumulated one leg
+    column at a time, in leg order, exactly like calculate_per_ratio_diff sums its
+    Python floats. Padding legs have quantity 0 and add an exact 0.0, so the
+    result is bit-for-bit the helper's (a row-wise np.sum would use pairwise
+    summation and could differ in the last ulp).
+
+    Only the rows asked for are gathered, and their prices are written into one
+    price vector kept across calls. A call for at most SCALAR_MAX_ROWS strategies
+    (the usual case once only strategies on moved tokens are due) skips numpy and
+    evaluates them one by one with the same arithmetic.
+    """
+
+    def __init__(self, capacity=64):
+        self._lock = threading.Lock()
+        self._names = []                       # row -> strategy name
+        self._rows = {}                        # strategy name -> row
+        self._token_cols = {}                  # token -> column of the price vector
+        self._tokens = []                      # column -> token
+        self._compiled = {}                    # strategy name -> CompiledStrategy
+        self._prices = np.zeros(capacity * MAX_LEGS)  # column -> last price written
+        for attr, arr in self._alloc(capacity).items():
+            setattr(self, attr, arr)
+
+    @staticmethod
+    def _alloc(capacity):
+        return {
+            "_buy_qty": np.zeros((capacity, MAX_LEGS)),
+            "_sell_qty": np.zeros((capacity, MAX_LEGS)),
+            "_live": np.zeros((capacity, MAX_LEGS), dtype=bool),
+            "_token_ids": np.zeros((capacity, MAX_LEGS), dtype=np.intp),
+            "_buy_total": np.zeros(capacity),
+            "_threshold": np.zeros(capacity),
+            "_sl": np.zeros(capacity),
+            "_sl_pct": np.zeros(capacity, dtype=bool),
+            "_sl_abs": np.zeros(capacity, dtype=bool),
+            "_tp": np.zeros(capacity),
+            "_tp_pct": np.zeros(capacity, dtype=bool),
+            "_tp_abs": np.zeros(capacity, dtype=bool),
+        }
+
+    _ROW_ARRAYS = tuple(_alloc.__func__(0))
+
+    def _grow(self):
+        n = len(self._names)
+        for attr, arr in self._alloc(2 * len(self._buy_total)).items():
+            arr[:n] = getattr(self, attr)[:n]
+            setattr(self, attr, arr)
+
+    def _token_col(self, token):
+        col = self._token_cols.get(token)
+        if col is None:
+            col = self._token_cols[token] = len(self._tokens)
+            self._tokens.append(token)
+            if col == len(self._prices):
+                self._prices = np.concatenate([self._prices, np.zeros(len(self._prices) or MAX_LEGS)])
+        return col
+
+    def add(self, name, compiled):
+        """Insert or replace the row for a CompiledStrategy."""
+        with self._lock:
+            row = self._rows.get(name)
+            if row is None:
+                if len(self._names) == len(self._buy_total):
+                    self._grow()
+                row = len(self._names)
+                self._names.append(name)
+                self._rows[name] = row
+            self._compiled[name] = compiled
+
+            self._buy_qty[row] = 0.0
+            self._sell_qty[row] = 0.0
+            self._live[row] = False
+            self._token_ids[row] = 0
+            for leg, (token, side, qty) in enumerate(zip(compiled.tokens, compiled.sides, compiled.quantities)):
+                self._live[row, leg] = True
+                self._token_ids[row, leg] = self._token_col(token)
+                if side > 0:
+                    self._buy_qty[row, leg] = qty
+                else:
+                    self._sell_qty[row, leg] = qty
+            self._buy_total[row] = compiled.buy_quantity
+            self._threshold[row] = compiled.threshold
+            self._sl[row], self._sl_pct[row] = compiled.sl, compiled.sl_is_pct
+            self._tp[row], self._tp_pct[row] = compiled.tp, compiled.tp_is_pct
+            self._sl_abs[row] = compiled.sl_mode == "abs"
+            self._tp_abs[row] = compiled.tp_mode == "abs"
+
+    def remove(self, name):
+        """Drop a strategy's row; the last row moves into the hole."""
+        with self._lock:
+            row = self._rows.pop(name, None)
+            if row is None:
+                return
+            self._compiled.pop(name, None)
+            last = len(self._names) - 1
+            if row != last:
+                moved = self._names[last]
+                for attr in self._ROW_ARRAYS:
+                    arr = getattr(self, attr)
+                    arr[row] = arr[last]
+                self._names[row] = moved
+                self._rows[moved] = row
+            self._names.pop()
+
+    def __len__(self):
+        return len(self._names)
+
+    def evaluate(self, quotes, names=None, entry_diffs=None):
+        """
+        One pass over the given strategies (default: all) for a {token: ltp} snapshot.
+
+        Returns {name: (net, valid, trigger, exit)} where valid is False if any live
+        leg lacks a positive price (the tick skips those), trigger is net >= the
+        diff threshold and exit is NO_EXIT / TP_HIT / SL_HIT for the entry diff in
+        entry_diffs[name] (treated as a triggered position; default 0.0). Names
+        without a row are left out. Only the prices of the evaluated rows' tokens
+        are looked up.
+        """
+        entry_diffs = entry_diffs or {}
+        with self._lock:
+            if names is None:
+                row_names = list(self._names)
+            else:
+                row_names = [x for x in names if x in self._rows]
+            n = len(row_names)
+            if n == 0:
+                return {}
+            if n <= SCALAR_MAX_ROWS:
+                return {
+                    name: _evaluate_one(self._compiled[name], quotes, entry_diffs.get(name, 0.0))
+                    for name in row_names
+                }
+            rows = np.fromiter((self._rows[x] for x in row_names), dtype=np.intp, count=n)
+            token_ids = self._token_ids[rows]
+            live = self._live[rows]
+            prices = self._prices
+            for col in set(token_ids[live].tolist()):
+                prices[col] = quotes.get(self._tokens[col]) or 0.0
+            leg_prices = prices[token_ids]
+            buy_qty, sell_qty = self._buy_qty[rows], self._sell_qty[rows]
+            buy_total, threshold = self._buy_total[rows], self._threshold[rows]
+            sl, sl_pct, sl_abs = self._sl[rows], self._sl_pct[rows], self._sl_abs[rows]
+            tp, tp_pct, tp_abs = self._tp[rows], self._tp_pct[rows], self._tp_abs[rows]
+
+            valid = ~np.any(live & ~(leg_prices > 0), axis=1)
+            priced = np.where(live, leg_prices, 0.0)
+            buy_value = np.zeros(n)
+            sell_value = np.zeros(n)
+            for leg in range(MAX_LEGS):
+                buy_value += buy_qty[:, leg] * priced[:, leg]
+                sell_value += sell_qty[:, leg] * priced[:, leg]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                net = np.where(buy_total > 0, (buy_value - sell_value) / np.where(buy_total > 0, buy_total, 1.0), 0.0)
+            trigger = valid & (net >= threshold)
+
+            entry = np.fromiter((entry_diffs.get(name, 0.0) for name in row_names), dtype=float, count=n)
+            long_side = entry >= 0
+            tp_val = np.where(tp_pct, (tp / 100.0) * np.abs(entry), tp)
+            sl_val = np.where(sl_pct, (sl / 100.0) * np.abs(entry), sl)
+            tp_hit = (tp_val != 0) & np.where(
+                tp_abs,
+                np.where(long_side, net >= tp_val, net <= tp_val),
+                np.where(long_side, net >= entry + np.abs(tp_val), net <= entry - np.abs(tp_val)),
+            )
+            sl_hit = (sl_val != 0) & np.where(
+                sl_abs,
+                np.where(long_side, net <= sl_val, net >= sl_val),
+                np.where(long_side, net <= entry - np.abs(sl_val), net >= entry + np.abs(sl_val)),
+            )
+            exits = np.where(tp_hit, TP_HIT, np.where(sl_hit, SL_HIT, NO_EXIT))
+            exits = np.where(valid, exits, NO_EXIT)
+
+        return {
+            name: (float(net[i]), bool(valid[i]), bool(trigger[i]), int(exits[i]))
+            for i, name in enumerate(row_names)
+        }
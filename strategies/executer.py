@@ -1,20 +1,79 @@
 from PyQt5.QtCore import QThread, pyqtSignal
 import time
-from trading.xts_market import get_ltp as xts_get_ltp
+from trading.xts_market import get_quotes, quote_feed, subscriptions
 from utils.logger import log_event
-from trading.order_utils import check_maxqty, get_scrip_row, get_retry_prices, clamp_price, get_best_quote
-from trading.xts_order import bridge as order_bridge
-from utils.load_tokken import get_exchange_from_scripmaster
+from trading.order_utils import get_scrip_row, get_retry_prices, clamp_price
+from trading.xts_order import bridge as order_bridge, order_tracker
+from trading.order_tracker import filled_at_least
+from trading.bridge_async import abridge, bridge_loop
+from utils.load_tokken import get_exchange_from_scripmaster, wait_for_master
 import threading
+import asyncio
 import datetime
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from utils.load_tokken import get_lot_size
 from math import gcd
 from functools import reduce
 import math
 
 # Import the standardized helper function
-from utils.strategy_helpers import calculate_per_ratio_diff
- 
+from strategies.compiled import CompiledStrategy
+from strategies.diff_engine import DiffEngine, NO_EXIT, TP_HIT
+from strategies.scheduler import TickScheduler
+from strategies.order_pool import OrderPool, OrderPoolFull
+from strategies.order_engine import OrderEngine, LegOrder, Step
+from strategies.risk_engine import RiskEngine
+import config
+
+# Extra wait after an order's CancelIfNotCompleteInSeconds so the tracker sees the auto-cancel land
+ORDER_SETTLE_SEC = 0.2
+
+def _record_order(state, req_id, qty=None, lock=None):
+    """Remember an order on its strategy and hand it to the order tracker."""
+    with (lock or state["lock"]):
+        state.setdefault("order_request_ids", []).append(req_id)
+    order_tracker.track(req_id, qty)
+
+def _entry_diff(state):
+    # FIX: Use lock to read entry_diff
+    with state["lock"]:
+        return float(state.get("entry_diff", 0.0))
+
+def _book_fill(state, idx, qty, price, lock=None, risk=None):
+    """Add a fill of qty at price to leg idx's traded qty and average entry price (and to the risk engine)."""
+    strat = state["strategy"]
+    with (lock or state["lock"]):
+        traded = state.get(f"traded_qty{idx}", 0) + qty
+        total = state.get(f"entry_price_total{idx}", 0.0) + qty * price
+        state[f"traded_qty{idx}"] = traded
+        state[f"entry_price_total{idx}"] = total
+        state[f"entry_price{idx}"] = total / traded if traded > 0 else 0.0
+        token, side = strat.get(f"Token{idx}", ""), strat.get(f"Side{idx}", "BUY")
+    if risk is not None:
+        risk.on_fill(strat["Strategy Name"], idx, token, side, qty, price)
+
+def _claim_positions(state):
+    """
+    [(leg, token, counter side, qty)] for every leg still holding qty that no
+    square-off was sent for yet; the qty is marked as squared so it is only sent once.
+    """
+    strat = state["strategy"]
+    claimed = []
+    with state["lock"]:
+        for i in range(1, 9):
+            token = strat.get(f"Token{i}")
+            qty = int(state.get(f"traded_qty{i}", 0)) - int(state.get(f"squared_qty{i}", 0))
+            if token and qty > 0:
+                side = "SELL" if strat.get(f"Side{i}", "BUY").upper() == "BUY" else "BUY"
+                state[f"squared_qty{i}"] = state.get(f"squared_qty{i}", 0) + qty
+                claimed.append((i, token, side, qty))
+    return claimed
+
+def _release_position(state, leg, qty):
+    """Give back a claimed qty whose counter order never reached the bridge."""
+    with state["lock"]:
+        state[f"squared_qty{leg}"] = state.get(f"squared_qty{leg}", 0) - qty
+
 def calculate_locked_leg1_price(
     initial_leg1_price,
     initial_other_prices,
@@ -31,198 +90,14 @@ def calculate_locked_leg1_price(
         price += sign * (current_other_prices[i-1] - initial_other_prices[i-1]) * (abs(r)/abs(r1))
     return price
 
-class OrderLegWorker(threading.Thread):
-    # FIX: Accept the shared lock
-    def __init__(self, strat, state, idx, user_id, on_update, on_finish, lock):
-        super().__init__()
-        self.strat = strat
-        self.state = state
-        self.idx = idx
-        self.user_id = user_id
-        self.on_update = on_update
-        self.on_finish = on_finish
-        self._stop = threading.Event()
-        self.setDaemon(True)
-        self.lock = lock # FIX: Store the lock
-
-    def stop(self):
-        self._stop.set()
-
-    def _wait_with_killcheck(self, seconds):
-        # Wait in small increments, bail out immediately if killed
-        for _ in range(int(seconds * 10)):
-            if self._stop.is_set():
-                return True  # interrupted
-            time.sleep(0.2)
-        return False  # not interrupted
-
-    def run(self):
-        strat = self.strat
-        state = self.state
-        idx = self.idx
-
-        token = strat[f"Token{idx}"]
-        side = strat.get(f"Side{idx}", "BUY")
-        lots = int(strat.get(f"Lots{idx}", 1))
-        
-        # FIX: Use lock to safely read from state
-        with self.lock:
-            lot_size = state.get(f"order_qty{idx}", 1) // lots if lots > 0 else 1
-            order_qty = lots * lot_size
-            prev_traded = state.get(f"traded_qty{idx}", 0)
-            prev_entry_total = state.get(f"entry_price_total{idx}", 0.0)
-
-        to_trade = order_qty - prev_traded
-        fill_accum = 0
-        left_to_fill = to_trade
-
-        try:
-            check_maxqty(token, to_trade)
-            row = get_scrip_row(token)
-            lcp = float(row["lowerexchcircuitprice"])
-            ucp = float(row["upperexchcircuitprice"])
-            cmp = xts_get_ltp(token)
-            mode = side.upper()
-            exchange = get_exchange_from_scripmaster(token)
-            retry_prices = get_retry_prices(mode, cmp, lcp, ucp)
-            # --- Market order first ---
-            if left_to_fill > 0 and not self._stop.is_set():
-                if self._stop.is_set():
-                    return
-                req_id = order_bridge.IB_PlaceOrderAdv(
-                    UniqueID=0,
-                    StrategyTag=strat["Strategy Name"],
-                    UserID=self.user_id,
-                    Exchange=exchange,
-                    Symbol=token,
-                    TransactionType=mode,
-                    OrderType="MKT",
-                    ProductType="NRML",
-                    Price=0,
-                    TriggerPrice=0,
-                    ProfitValue="",
-                    StoplossValue="",
-                    Quantity=left_to_fill,
-                    CancelIfNotCompleteInSeconds=1,
-                )
-                
-                # FIX: Use lock to safely write to state
-                with self.lock:
-                    state.setdefault("order_request_ids", []).append(req_id)
-                
-                if self._wait_with_killcheck(1):
-                    return
-                if self._stop.is_set():
-                    return
-                filled_qty = order_bridge.IB_OrderFilledQty(req_id)
-                if self._stop.is_set():
-                    return
-                if filled_qty is None:
-                    filled_qty = 0
-
-                # FIX: Use lock to safely read and write state
-                with self.lock:
-                    prev_traded = state.get(f"traded_qty{idx}", 0)
-                    prev_entry_total = state.get(f"entry_price_total{idx}", 0.0)
-                    fill_price = xts_get_ltp(token) # OK to get LTP, but use lock for state change
-                    new_qty = prev_traded + filled_qty
-                    new_entry_total = prev_entry_total + filled_qty * fill_price
-                    state[f"traded_qty{idx}"] = new_qty
-                    state[f"entry_price_total{idx}"] = new_entry_total
-                    state[f"entry_price{idx}"] = new_entry_total / new_qty if new_qty > 0 else 0.0
-
-                fill_accum += filled_qty
-                left_to_fill -= filled_qty
-
-                self.on_update()
-            # --- Retry/fallback as before ---
-            for px, wait_sec in retry_prices:
-                if left_to_fill <= 0 or self._stop.is_set():
-                    break
-                if self._stop.is_set():
-                    return
-                req_id = order_bridge.IB_PlaceOrderAdv(
-                    UniqueID=0,
-                    StrategyTag=strat["Strategy Name"],
-                    UserID=self.user_id,
-                    Exchange=exchange,
-                    Symbol=token,
-                    TransactionType=mode,
-                    OrderType="LMT",
-                    ProductType="NRML",
-                    Price=px,
-                    TriggerPrice=0,
-                    ProfitValue="",
-                    StoplossValue="",
-                    Quantity=left_to_fill,
-                    CancelIfNotCompleteInSeconds=1,
-                )
-                # FIX: Use lock
-                with self.lock:
-                    state.setdefault("order_request_ids", []).append(req_id)
-                
-                if self._wait_with_killcheck(wait_sec):
-                    return
-                if self._stop.is_set():
-                    return
-                filled_qty = order_bridge.IB_OrderFilledQty(req_id)
-                if self._stop.is_set():
-                    return
-                if filled_qty is None:
-                    filled_qty = 0
-
-                # FIX: Use lock
-                with self.lock:
-                    prev_traded = state.get(f"traded_qty{idx}", 0)
-                    prev_entry_total = state.get(f"entry_price_total{idx}", 0.0)
-                    fill_price = px
-                    new_qty = prev_traded + filled_qty
-                    new_entry_total = prev_entry_total + filled_qty * fill_price
-                    state[f"traded_qty{idx}"] = new_qty
-                    state[f"entry_price_total{idx}"] = new_entry_total
-                    state[f"entry_price{idx}"] = new_entry_total / new_qty if new_qty > 0 else 0.0
-
-                fill_accum += filled_qty
-                left_to_fill -= filled_qty
-                self.on_update()
-            # --- Fallback/circuit order if still unfilled ---
-            if left_to_fill > 0 and not self._stop.is_set():
-                if self._stop.is_set():
-                    return
-                best_quote = get_best_quote(token, mode, order_bridge)
-                final_px = clamp_price(
-                    best_quote if best_quote is not None else (ucp if mode == "BUY" else lcp),
-                    lcp, ucp
-                )
-                req_id = order_bridge.IB_PlaceOrderAdv(
-                    UniqueID=0,
-                    StrategyTag=strat["Strategy Name"],
-                    UserID=self.user_id,
-                    Exchange=exchange,
-                    Symbol=token,
-                    TransactionType=mode,
-                    OrderType="LMT",
-                    ProductType="NRML",
-                    Price=final_px,
-                    TriggerPrice=0,
-                    ProfitValue="",
-                    StoplossValue="",
-                    Quantity=left_to_fill,
-                    CancelIfNotCompleteInSeconds=0,
-                )
-                # FIX: Use lock
-                with self.lock:
-                    state.setdefault("order_request_ids", []).append(req_id)
-                self.on_update()
-        except Exception as e:
-            log_event(strat["Strategy Name"], "Order Error", str(e))
-        self.on_finish(self.idx)
-
 class StrategyExecutor(QThread):
-    update_pnl_signal = pyqtSignal(str, float)
-    update_diff_signal = pyqtSignal(str, float)
-    update_status_signal = pyqtSignal(str, str)
-    update_qty_signal = pyqtSignal(str, list)  # For (order_qty, traded_qty) per leg
+    # Coalesced {name: {"diff"/"pnl"/"qty"/"status": latest value}} per GUI frame
+    update_batch_signal = pyqtSignal(dict)
+    # Global Max Loss breach: (message, kill switch summary, confirmed flat)
+    max_loss_signal = pyqtSignal(str, str, bool)
+    # GUI-requested flattening finished: (strategy name, every leg sent) / (kill switch summary, confirmed flat)
+    square_off_done_signal = pyqtSignal(str, bool)
+    kill_switch_done_signal = pyqtSignal(str, bool)
 
     def __init__(self, user_id, parent=None, max_loss_global=float('inf')):
         super().__init__(parent)
@@ -230,21 +105,121 @@ class StrategyExecutor(QThread):
         self.active_strategies = {}
         self.running = True
         self.market = getattr(parent, "market", None) if parent is not None else None
-        self.leg_workers = {}
-        self.leg_workers_finished = {}
         self.max_loss_global = max_loss_global
         self.global_stop = False
+        # Per-leg / per-strategy / portfolio MTM, moved by every quote and fill; a
+        # breach of max_loss_global flattens everything through the kill switch
+        self.risk = RiskEngine(max_loss_global, on_breach=self._on_max_loss)
+        # Lock order (always acquire left to right, never the other way):
+        #   state_lock -> state["lock"] -> diff_engine / _changed_lock / feed locks
+        # state_lock only guards the registry (active_strategies, _token_index).
+        # Each strategy's fields (status, qtys, entry prices, order ids, its strategy
+        # dict) are guarded by that strategy's own state["lock"], so fills, ticks and
+        # GUI reads on one strategy never wait on another. Never hold a strategy lock
+        # while taking state_lock, and never hold two strategy locks at once.
         self.state_lock = threading.Lock() # FIX: Add the lock
+        # Latest {token: ltp} snapshot pushed by the quote feed; _tick only reads this
+        self._quotes = {}
+        # token -> names of the strategies with a live leg on it (guarded by state_lock)
+        self._token_index = {}
+        # Tokens whose price moved since the tick loop last looked, and strategies
+        # that need a tick regardless (just added); both guarded by _changed_lock
+        self._changed_tokens = set()
+        self._dirty_strategies = set()
+        self._changed_lock = threading.Lock()
+        # Every active strategy's diff in one vectorized pass per cycle
+        self.diff_engine = DiffEngine()
+        # Open positions ("triggered", and any other non-waiting status) are checked
+        # on their own, faster cadence than strategies still waiting for entry
+        self.schedulers = {
+            "triggered": TickScheduler("triggered", config.TICK_INTERVAL_TRIGGERED_MS / 1000.0),
+            "waiting": TickScheduler("waiting", config.TICK_INTERVAL_WAITING_MS / 1000.0),
+        }
+        self._wake = threading.Event()  # set by stop() to cut the cadence sleep short
+        # Hedge / leg order ladders as state machines on one thread, driven by fills and deadlines
+        self.order_engine = OrderEngine(abridge, bridge_loop, order_tracker, settle=ORDER_SETTLE_SEC)
+        # Pre-started workers for entry / square-off tasks; one strategy's tasks run in order
+        self.order_pool = OrderPool(workers=config.ORDER_POOL_WORKERS, max_pending=config.ORDER_POOL_MAX_PENDING)
+        # GUI updates are queued here and published at most GUI_MAX_FPS times a second;
+        # only the latest value of each kind per strategy survives to the next frame
+        self._ui_pending = {}
+        self._ui_lock = threading.Lock()
+        self._ui_frame = 1.0 / config.GUI_MAX_FPS
+        self._ui_last_flush = 0.0
+
+    def _on_quotes(self, snapshot):
+        # Runs on the feed thread: note which prices moved, re-mark open positions on
+        # them (max loss is checked on every quote, not on the tick cadence) and swap
+        # the reference; the tick loop picks the changes up on its next cadence
+        previous = self._quotes
+        changed = {token for token, price in snapshot.items() if previous.get(token) != price}
+        self.risk.on_quotes(snapshot, changed)
+        self._quotes = snapshot
+        if changed:
+            with self._changed_lock:
+                self._changed_tokens |= changed
+
+    def _queue_ui(self, kind, name, value):
+        with self._ui_lock:
+            self._ui_pending.setdefault(name, {})[kind] = value
+
+    def flush_ui(self, force=False):
+        """Emit everything queued since the last frame as one update_batch_signal."""
+        now = time.monotonic()
+        if not force and now - self._ui_last_flush < self._ui_frame:
+            return
+        with self._ui_lock:
+            batch, self._ui_pending = self._ui_pending, {}
+        self._ui_last_flush = now
+        if batch:
+            self.update_batch_signal.emit(batch)
+
+    def _take_pending(self):
+        """Swap out the changed-token / dirty-strategy sets accumulated since the last cycle."""
+        with self._changed_lock:
+            changed, self._changed_tokens = self._changed_tokens, set()
+            dirty, self._dirty_strategies = self._dirty_strategies, set()
+        return changed, dirty
+
+    def _feed_ltps(self, tokens):
+        """
+        Latest pushed LTPs for tokens, in order. Tokens the feed has not published yet
+        are fetched together with one batched get_quotes() call.
+        """
+        keys = [t.strip().upper() for t in tokens]
+        prices = [self._quotes.get(k, quote_feed.get_ltp(k)) for k in keys]
+        missing = [k for k, p in zip(keys, prices) if p is None]
+        if missing:
+            quotes = get_quotes(missing, fields=("LTP",))
+            prices = [quotes[k].ltp if p is None else p for k, p in zip(keys, prices)]
+        return prices
+
+    @staticmethod
+    def _strategy_tokens(strat):
+        return {
+            strat.get(f"Token{i}", "").strip().upper()
+            for i in range(1, 9)
+            if strat.get(f"Token{i}") and int(strat.get(f"Lots{i}", 0) or 0) > 0
+        }
 
     def add_strategy(self, strat):
         name = strat.get("Strategy Name")
         if not name:
             return
+
+        # Lot sizes come from the scripmaster, which may still be loading in the background
+        try:
+            wait_for_master(timeout=config.SCRIPMASTER_WAIT_SEC)
+        except FutureTimeoutError:
+            message = f"Scripmaster not loaded after {config.SCRIPMASTER_WAIT_SEC}s; strategy not added."
+            log_event(name, "Add Strategy Error", message)
+            raise RuntimeError(f"{name}: {message}") from None
             
         # FIX: Use lock to safely modify the shared strategies dict
         with self.state_lock:
             state = {
                 "strategy": strat,
+                "lock": threading.RLock(),
                 "status": "waiting",
                 "last_diff": 0.0,
                 "entry_diff": 0.0,
@@ -266,328 +241,450 @@ class StrategyExecutor(QThread):
                     strat[f"TradedQty{i}"] = 0
                     strat[f"TotalQty{i}"] = 0
 
+            state["compiled"] = CompiledStrategy(strat)
             self.active_strategies[name] = state
+            self.diff_engine.add(name, state["compiled"])
+            for token in state["compiled"].tokens:
+                self._token_index.setdefault(token, set()).add(name)
+
+        # First evaluation on the next cycle, even if none of its prices move
+        with self._changed_lock:
+            self._dirty_strategies.add(name)
+
+        # Subscribe + pre-warm every leg token now, not on the first trigger
+        subscriptions.acquire(self._strategy_tokens(strat))
 
     def remove_strategy(self, name):
         # FIX: Use lock
         with self.state_lock:
-            if name in self.active_strategies:
-                del self.active_strategies[name]
+            if name not in self.active_strategies:
+                return
+            removed = self.active_strategies.pop(name)
+            self.diff_engine.remove(name)
+            for token in removed["compiled"].tokens:
+                names = self._token_index.get(token)
+                if names is not None:
+                    names.discard(name)
+                    if not names:
+                        del self._token_index[token]
+
+        self.risk.remove(name)
+        subscriptions.release(self._strategy_tokens(removed["strategy"]))
+
+        # Stop its hedge ladders, then stop tracking its orders once their last fills are in
+        def forget_orders(_):
+            with removed["lock"]:
+                request_ids = list(removed.get("order_request_ids", []))
+            order_tracker.forget(request_ids)
+        self.order_engine.cancel(name).add_done_callback(forget_orders)
+
+    def get_state(self, name):
+        """Registry lookup; callers then use state["lock"] for the strategy's fields."""
+        with self.state_lock:
+            return self.active_strategies.get(name)
+
+    def states(self):
+        with self.state_lock:
+            return list(self.active_strategies.values())
+
+    def get_status(self, name):
+        """A strategy's status read under its lock, or None if it is not active."""
+        state = self.get_state(name)
+        if state is None:
+            return None
+        with state["lock"]:
+            return state["status"]
 
     def resume_strategy(self, name):
+        state = self.get_state(name)
+        if state is None:
+            return
+        if self.global_stop:
+            log_event(name, "Resume Blocked", "Global Max Loss was hit; raise the limit to resume strategies.")
+            return
         # FIX: Use lock
-        with self.state_lock:
-            if name in self.active_strategies:
-                state = self.active_strategies[name]
-                if state["status"] == "disabled":
-                    state["status"] = "waiting"
-                    self.update_status_signal.emit(name, "waiting")
-                    log_event(name, "Strategy Resumed", "Strategy status reset to waiting after being disabled.")
+        with state["lock"]:
+            if state["status"] == "disabled":
+                state["status"] = "waiting"
+                self._queue_ui("status", name, "waiting")
+                log_event(name, "Strategy Resumed", "Strategy status reset to waiting after being disabled.")
         
         # Tick outside the lock to avoid deadlock
-        if 'state' in locals():
-             self._tick(state)   # Ensure logic is re-activated!
+        self._tick(state)   # Ensure logic is re-activated!
 
 
     def pause_strategy(self, name):
+        """Disable a strategy; returns False if it is not active."""
+        state = self.get_state(name)
+        if state is None:
+            return False
         # FIX: Use lock
-        with self.state_lock:
-            if name in self.active_strategies:
-                self.active_strategies[name]["status"] = "disabled"
+        with state["lock"]:
+            state["status"] = "disabled"
+        self._queue_ui("status", name, "disabled")
+        return True
 
     def stop(self):
         self.running = False
+        self._wake.set()
+        self.order_pool.shutdown(wait=False)  # queued order tasks still run
+        self.order_engine.stop()
         self.quit()
         self.wait()
 
+    def tick_stats(self):
+        """Cycles, overruns and skipped cycles per cadence class."""
+        return {name: sched.stats() for name, sched in self.schedulers.items()}
+
+    def order_pool_stats(self):
+        return self.order_pool.stats()
+
+    def order_engine_stats(self):
+        return self.order_engine.stats()
+
+    def risk_stats(self):
+        return self.risk.stats()
+
+    def set_max_loss(self, max_loss):
+        """New Global Max Loss from the GUI; lifts a previous stop once the portfolio is inside it."""
+        self.max_loss_global = max_loss
+        self.risk.set_max_loss(max_loss)
+        if self.global_stop and not self.risk.tripped:
+            self.global_stop = False
+            log_event("SYSTEM", "Global Max Loss", f"Limit set to {max_loss}; strategies may be resumed.")
+
+    def _on_max_loss(self, total):
+        # Called on the quote feed (or fill) thread the moment the portfolio breaches the limit
+        self.global_stop = True
+        message = f"Portfolio MTM {total:.2f} breached Global Max Loss {self.max_loss_global}; flattening everything."
+        log_event("SYSTEM", "Global Max Loss", message)
+        threading.Thread(target=self._max_loss_kill_switch, args=(message,), name="MaxLossKillSwitch", daemon=True).start()
+
+    def _max_loss_kill_switch(self, message):
+        report = self.kill_switch()
+        self.max_loss_signal.emit(message, report["summary"], bool(report.get("flat")))
+
+    def request_kill_switch(self):
+        """Run kill_switch() off the caller's thread; kill_switch_done_signal carries the result."""
+        threading.Thread(target=self._requested_kill_switch, name="KillSwitch", daemon=True).start()
+
+    def _requested_kill_switch(self):
+        report = self.kill_switch()
+        self.kill_switch_done_signal.emit(report["summary"], bool(report.get("flat")))
+
+    def request_square_off(self, name):
+        """
+        Square off a triggered strategy on the order pool, behind its earlier order
+        tasks; square_off_done_signal carries the result. Returns False if the
+        strategy is not active or not triggered.
+        """
+        state = self.get_state(name)
+        if state is None:
+            return False
+        with state["lock"]:
+            if state["status"] != "triggered":
+                return False
+
+        def _done(ok):
+            self.square_off_done_signal.emit(name, bool(ok))
+
+        fut = self._submit_order_task(name, self.square_off, state)
+        if fut is None:
+            # Pool full: a square-off must still go out, just not on the caller's thread
+            threading.Thread(target=lambda: _done(self.square_off(state)), name=f"SquareOff-{name}", daemon=True).start()
+        else:
+            fut.add_done_callback(lambda f: _done(not f.cancelled() and f.exception() is None and f.result()))
+        return True
+
+    def _hedge_leg_order(self, state, strat, k, qty_k, tokens, sides, leg1_fill_price, entry_diff, side1):
+        """
+        LegOrder for hedge leg k (0-based): a limit anchored on leg 1's fill, the
+        retry ladder from there, then best quote / circuit until filled or cancelled.
+        """
+        token_k = tokens[k]
+        side_k = sides[k].upper()
+
+        # Step 1: Anchored limit price logic
+        if side1 == "BUY" and side_k == "SELL":
+            limit_price_k = leg1_fill_price - entry_diff
+        elif side1 == "SELL" and side_k == "BUY":
+            limit_price_k = leg1_fill_price + entry_diff
+        else:
+            limit_price_k = leg1_fill_price
+
+        row_k = get_scrip_row(token_k)
+        lcp_k = row_k.lower_circuit
+        ucp_k = row_k.upper_circuit
+        limit_price_k = clamp_price(limit_price_k, lcp_k, ucp_k)
+
+        steps = [Step("LMT", limit_price_k, 1)]
+        steps += [Step("LMT", px, wait) for px, wait in get_retry_prices(side_k, limit_price_k, lcp_k, ucp_k)]
+        steps.append(Step("BEST", None, None))  # Good till filled/cancelled
+
+        return LegOrder(
+            strat["Strategy Name"], token_k, side_k, qty_k, steps,
+            get_exchange_from_scripmaster(token_k), self.user_id, (lcp_k, ucp_k),
+            ref_price=limit_price_k,
+            on_order=lambda req_id, qty: _record_order(state, req_id, qty),
+            on_fill=lambda qty, price: _book_fill(state, k + 1, qty, price, risk=self.risk),
+        )
+
+    def _submit_order_task(self, name, fn, *args, inline_if_full=False):
+        """
+        Run an order task on the pool behind the strategy's earlier ones. Returns the
+        Future, or None if the pool was full (after running fn inline if asked to).
+        """
+        try:
+            fut = self.order_pool.submit(name, fn, *args)
+        except OrderPoolFull as e:
+            log_event(name, "Order Pool Full", str(e))
+            if inline_if_full:
+                fn(*args)
+            return None
+
+        def _log_failure(f):
+            if not f.cancelled() and f.exception() is not None:
+                log_event(name, "Order Task Error", str(f.exception()))
+        fut.add_done_callback(_log_failure)
+        return fut
+
     
     def run(self):
+        quote_feed.add_listener(self._on_quotes)
+        quote_feed.ensure_started()
+        pending = set()  # strategies with a moved price (or just added) not ticked yet
         while self.running:
+            # Sleep until the nearest cadence deadline; deadlines are fixed, so time
+            # spent ticking is absorbed instead of accumulating as drift
+            now = time.monotonic()
+            delay = min(sched.time_until_due(now) for sched in self.schedulers.values())
+            if delay > 0:
+                self._wake.wait(delay)
+                continue
+            due = [name for name, sched in self.schedulers.items() if sched.is_due(now)]
+
+            changed, dirty = self._take_pending()
             # FIX: Safely get a list of states to iterate over
+            # Only strategies with a leg on a moved token are re-evaluated, and only
+            # when their cadence class is due; the rest stay pending
+            states_to_tick = []
             with self.state_lock:
-                states_to_tick = list(self.active_strategies.values())
-                
-            for state in states_to_tick:
-                self._tick(state, force_emit_diff=True)
-            time.sleep(0.1)
+                pending |= dirty
+                for token in changed:
+                    pending |= self._token_index.get(token, set())
+                for name in list(pending):
+                    state = self.active_strategies.get(name)
+                    if state is None:
+                        pending.discard(name)
+                        continue
+                    cadence = "waiting" if state["status"] == "waiting" else "triggered"
+                    if cadence in due:
+                        states_to_tick.append(state)
+                        pending.discard(name)
+
+            if states_to_tick:
+                # Diffs and tick prices come from the same snapshot
+                quotes = self._quotes
+                # Only the strategies due this cycle; trigger and SL/TP come out of the same pass
+                results = self.diff_engine.evaluate(
+                    quotes,
+                    names=[state["strategy"].get("Strategy Name") for state in states_to_tick],
+                    entry_diffs={state["strategy"].get("Strategy Name"): _entry_diff(state) for state in states_to_tick},
+                )
+                for state in states_to_tick:
+                    result = results.get(state["strategy"].get("Strategy Name"))
+                    self._tick(state, force_emit_diff=True, result=result, quotes=quotes)
+
+            # Fills/status changes from order threads are queued too; publish once per frame
+            self.flush_ui()
+
+            finished = time.monotonic()
+            for name in due:
+                # Overruns and skipped cycles are counted in tick_stats()
+                self.schedulers[name].complete(now, finished)
+        self.flush_ui(force=True)
+        quote_feed.remove_listener(self._on_quotes)
+
+    async def _send_counter_order(self, state, leg, token, side, qty):
+        """Market order closing qty of one leg. Returns its request id, or None if it was not placed."""
+        strat = state["strategy"]
+        try:
+            req_id = await abridge.IB_PlaceOrderAdv(
+                UniqueID=0,
+                StrategyTag=strat["Strategy Name"],
+                UserID=self.user_id,
+                Exchange=get_exchange_from_scripmaster(token),
+                Symbol=token,
+                TransactionType=side,
+                OrderType="MKT",
+                ProductType="NRML",
+                Price=0,
+                TriggerPrice=0,
+                ProfitValue="",
+                StoplossValue="",
+                Quantity=qty,
+                CancelIfNotCompleteInSeconds=0,
+            )
+        except Exception as e:
+            _release_position(state, leg, qty)
+            log_event(strat["Strategy Name"], "Square Off Error", f"Leg {leg}: {e}")
+            return None
+        if not req_id:
+            _release_position(state, leg, qty)
+            log_event(strat["Strategy Name"], "Square Off Error", f"Leg {leg}: bridge did not accept market {side} {qty} of {token}")
+            return None
+        _record_order(state, req_id, qty)
+        log_event(strat["Strategy Name"], "Square Off", f"Market {side} {qty} of {token}")
+        order_tracker.watch(req_id, until=filled_at_least(qty)).add_done_callback(
+            lambda f: self._book_close(strat["Strategy Name"], leg, token, side, f.result())
+        )
+        return req_id
+
+    def _book_close(self, name, leg, token, side, status):
+        """Counter order done: its fill closes the leg in the risk engine."""
+        if status.filled_qty > 0:
+            price = status.avg_price if status.avg_price > 0 else self._quotes.get(token.strip().upper(), 0.0)
+            self.risk.on_fill(name, leg, token, side, status.filled_qty, price)
+
+    async def _send_counter_orders(self, claims):
+        """
+        All counter orders for [(state, claimed legs)] at once. Returns ([(req_id, qty)]
+        of those placed, number that could not be placed).
+        """
+        sends = [(state, leg) for state, legs in claims for leg in legs]
+        req_ids = await asyncio.gather(*(self._send_counter_order(state, *leg) for state, leg in sends))
+        placed = [(req_id, leg[3]) for req_id, (_, leg) in zip(req_ids, sends) if req_id]
+        return placed, len(sends) - len(placed)
+
+    async def _cancel_orders(self, states, event):
+        """Cancel every app-placed order the tracker does not already know is done, all at once. Returns (sent, failed)."""
+        cancels = []
+        for state in states:
+            with state["lock"]:
+                order_ids = list(state.get("order_request_ids", []))
+            for order_id in order_ids:
+                status = order_tracker.status(order_id)
+                if status is None or not status.done:
+                    cancels.append((state["strategy"]["Strategy Name"], order_id))
+        results = await asyncio.gather(
+            *(abridge.IB_CancelOrExitOrder(order_id) for _, order_id in cancels), return_exceptions=True
+        )
+        failed = 0
+        for (name, order_id), ok in zip(cancels, results):
+            if ok is True:
+                log_event(name, event, f"Cancelled Order {order_id}")
+            else:
+                failed += 1
+                log_event(name, f"{event} Error", f"Order {order_id}: {ok}")
+        return len(cancels), failed
 
     def square_off(self, state):
+        """Stop the strategy's order flow and close its open legs. Returns False if some legs could not be sent."""
         strat = state["strategy"]
+        name = strat["Strategy Name"]
 
-        for i in range(1, 9):  # Up to 8 legs
-            token_key = f"Token{i}"
-            side_key = f"Side{i}"
-            lots_key = f"Lots{i}"
-            traded_key = f"traded_qty{i}"
-
-
-            token_value = strat.get(token_key) # Get the actual token string
-            if token_value: # Check if the token string exists
-                total_qty = int(strat.get(lots_key, 0))
-                
-                # FIX: Use lock to safely read state
-                with self.state_lock:
-                    traded_qty = int(state.get(traded_key, 0))
-                
-                open_qty = total_qty - traded_qty
-                
-                # Use the 'token_value' here, not 'token_key'
-                exchange = get_exchange_from_scripmaster(token_value) 
+        # Hedge ladders first (their last fills get booked), then the other working
+        # orders, so nothing fills after the position is closed
+        try:
+            self.order_engine.cancel(name).result(timeout=config.KILL_SWITCH_DEADLINE_SEC)
+        except Exception as e:
+            log_event(name, "Square Off Error", f"Hedge orders not confirmed stopped: {e!r}")
+        bridge_loop.run(self._cancel_orders([state], "Square Off"))
+
+        # FIX: Close the qty actually traded (was Lots - traded qty); every leg goes out concurrently
+        claimed = _claim_positions(state)
+        failed = 0
+        if claimed:
+            _, failed = bridge_loop.run(self._send_counter_orders([(state, claimed)]))
+        if failed:
+            log_event(name, "Square Off Error", f"{failed} of {len(claimed)} legs could not be sent; position still open.")
+            return False
 
-                if open_qty > 0:
-                    original_side = strat.get(side_key, "BUY").upper()
-                    counter_side = "SELL" if original_side == "BUY" else "BUY"
-                    try:
-                        req_id = order_bridge.IB_PlaceOrderAdv(
-                            UniqueID=0,
-                            StrategyTag=strat["Strategy Name"],
-                            UserID=state["user_id"],
-                            Exchange=exchange,  
-                            Symbol=strat[token_key],
-                            TransactionType=counter_side,
-                            OrderType="MKT",
-                            ProductType="NRML",
-                            Price=0,
-                            TriggerPrice=0,
-                            ProfitValue="",
-                            StoplossValue="",
-                            Quantity=open_qty,
-                            CancelIfNotCompleteInSeconds=0,
-                        )
-                        # FIX: Use lock
-                        with self.state_lock:
-                            state.setdefault("order_request_ids", []).append(req_id)
-                        log_event(strat["Strategy Name"], "Square Off", f"Market {counter_side} {open_qty} of {strat[token_key]}")
-                    except Exception as e:
-                        log_event(strat["Strategy Name"], "Square Off Error", f"Leg {i}: {e}")
-        
         # FIX: Use lock
-        with self.state_lock:
+        with state["lock"]:
             state["status"] = "squared_off"
-        self.update_status_signal.emit(strat["Strategy Name"], "squared_off")
-        log_event(strat["Strategy Name"], "Square Off", "All open positions sent for square off at market.")
+        self._queue_ui("status", name, "squared_off")
+        log_event(name, "Square Off", "All open positions sent for square off at market.")
+        return True
 
-    def _tick(self, state, force_emit_diff=False):
+    def _tick(self, state, force_emit_diff=False, result=None, quotes=None):
         # FIX: Use lock to get a consistent snapshot of strategy and status
-        with self.state_lock:
+        with state["lock"]:
             strat = state["strategy"]
             status = state["status"]
             # Create local copies of qty data
             order_qtys_local = [state.get(f"order_qty{i}", 0) for i in range(1, 9)]
             traded_qtys_local = [state.get(f"traded_qty{i}", 0) for i in range(1, 9)]
 
-        legs = []
-        prices = []
-        lot_sizes = []
-        has_bad_price = False
+        # Legs, sides, lot sizes and SL/TP were resolved once in add_strategy
+        compiled = state["compiled"]
+        legs = compiled.legs()
+        lot_sizes = list(compiled.lot_sizes)
 
-        # Collect only valid legs
-        for i in range(1, 9):
-            token = strat.get(f"Token{i}", "").strip().upper()
-            side = strat.get(f"Side{i}", "").strip().upper()
-            qty = float(strat.get(f"TotalQty{i}", 0) or 0)
-            if not token or not side or qty == 0:
-                continue  # Skip unused/blank legs
-            
-            price = xts_get_ltp(token)
-            
-            # FIX: Critical bug fix for bad LTP
+        # Non-blocking: prices come from the last feed snapshot
+        if quotes is None:
+            quotes = self._quotes
+        prices = [quotes.get(token) for token in compiled.tokens]
+        # FIX: Critical bug fix for bad LTP
+        has_bad_price = False
+        for k, price in enumerate(prices):
             if price is None or price <= 0:
                 has_bad_price = True # Mark that we have a bad price
-                prices.append(0.0) # Append a placeholder
-            else:
-                prices.append(price)
-
-            try:
-                lot_size = int(get_lot_size(token) or 1)
-            except Exception:
-                lot_size = 1
-            lots = int(strat.get(f"Lots{i}", 1))
-            legs.append((side, lots, price, lot_size, token))
-            lot_sizes.append(lot_size)
-            
-        num_legs = len(legs)
+                prices[k] = 0.0 # Placeholder
+
+        num_legs = compiled.num_legs
         if num_legs == 0:
-            self.update_diff_signal.emit(strat.get("Strategy Name", ""), 0.0)
+            self._queue_ui("diff", strat.get("Strategy Name", ""), 0.0)
             return
 
         # FIX: Do not calculate or trigger if any leg has a bad price
         if has_bad_price:
-            self.update_diff_signal.emit(strat.get("Strategy Name", ""), state.get("last_diff", 0.0))
+            self._queue_ui("diff", strat.get("Strategy Name", ""), state.get("last_diff", 0.0))
             # Emit current qty status even if price is bad
-            self.update_qty_signal.emit(strat.get("Strategy Name", ""), list(zip(order_qtys_local, traded_qtys_local)))
+            self._queue_ui("qty", strat.get("Strategy Name", ""), list(zip(order_qtys_local, traded_qtys_local)))
             return
 
-        # --- MODIFICATION START ---
-        # --- Use helper function for diff calculation ---
-        # Create the 'legs' structure expected by the helper
-        helper_legs = []
-        for i in range(num_legs):
-             helper_legs.append({'side': legs[i][0], 'lots': legs[i][1]})
-        
-        net = calculate_per_ratio_diff(helper_legs, prices, lot_sizes)
-        # --- MODIFICATION END ---
+        # (net, valid, trigger, exit) from the batch diff engine; run() passes the
+        # cycle's result, other callers get a one-row pass on the same snapshot
+        if result is None:
+            name = strat.get("Strategy Name", "")
+            result = self.diff_engine.evaluate(quotes, names=[name], entry_diffs={name: _entry_diff(state)}).get(name)
+            if result is None:
+                return  # removed meanwhile
+        net, _, trigger, exit_hit = result
         
         # Store last valid diff
-        with self.state_lock:
+        with state["lock"]:
             state["last_diff"] = net
 
 
         # Always emit diff for GUI, even if disabled
-        self.update_diff_signal.emit(strat.get("Strategy Name", ""), net)
-        self.update_qty_signal.emit(strat.get("Strategy Name", ""), list(zip(order_qtys_local, traded_qtys_local)))
-
-        threshold = float(strat.get("Diff Threshold") or 0)
+        self._queue_ui("diff", strat.get("Strategy Name", ""), net)
+        self._queue_ui("qty", strat.get("Strategy Name", ""), list(zip(order_qtys_local, traded_qtys_local)))
 
         if status == "waiting":
-            if net>=threshold:
+            if trigger:
                 # FIX: Use lock to update state
-                with self.state_lock:
+                with state["lock"]:
                     state["entry_diff"] = net
                     state["status"] = "triggered"
                 
-                self.update_status_signal.emit(strat["Strategy Name"], "triggered")
+                self._queue_ui("status", strat["Strategy Name"], "triggered")
                 log_event(strat["Strategy Name"], "Triggered", f"at diff {net:.2f}")
 
-                def fire_leg_k(k, qty_k, state, strat, tokens, sides, self_ref, leg1_fill_price, entry_diff, side1):
-                    try:
-                        token_k = tokens[k]
-                        side_k = sides[k].upper()
-                        exchange_k = get_exchange_from_scripmaster(token_k)
-
-                        # Step 1: Anchored limit price logic
-                        if side1 == "BUY" and side_k == "SELL":
-                            limit_price_k = leg1_fill_price - entry_diff
-                        elif side1 == "SELL" and side_k == "BUY":
-                            limit_price_k = leg1_fill_price + entry_diff
-                        else:
-                            limit_price_k = leg1_fill_price
-
-                        row_k = get_scrip_row(token_k)
-                        lcp_k = float(row_k["lowerexchcircuitprice"])
-                        ucp_k = float(row_k["upperexchcircuitprice"])
-                        limit_price_k = clamp_price(limit_price_k, lcp_k, ucp_k)
-
-                        # First attempt: limit order at anchored price
-                        reqid_k = order_bridge.IB_PlaceOrderAdv(
-                            UniqueID=0,
-                            StrategyTag=strat["Strategy Name"],
-                            UserID=self_ref.user_id,
-                            Exchange=exchange_k,
-                            Symbol=token_k,
-                            TransactionType=side_k,
-                            OrderType="LMT",
-                            ProductType="NRML",
-                            Price=limit_price_k,
-                            TriggerPrice=0,
-                            ProfitValue="",
-                            StoplossValue="",
-                            Quantity=qty_k,
-                            CancelIfNotCompleteInSeconds=1,
-                        )
-                        # FIX: Use lock
-                        with self_ref.state_lock:
-                            state.setdefault("order_request_ids", []).append(reqid_k)
-
-                        filled_qty_k = 0
-                        elapsed = 0
-                        poll_interval = 0.1
-                        while elapsed < 1.0:
-                            filled_qty_now = order_bridge.IB_OrderFilledQty(reqid_k) or 0
-                            if filled_qty_now > 0:
-                                filled_qty_k = filled_qty_now
-                                break
-                            time.sleep(poll_interval)
-                            elapsed += poll_interval
-
-                        # If still unfilled, use retry ladder
-                        if filled_qty_k < qty_k:
-                            unfilled_qty = qty_k - filled_qty_k
-                            cmp = limit_price_k
-                            retry_prices = get_retry_prices(side_k, cmp, lcp_k, ucp_k)
-                            for retry_price, wait_sec in retry_prices:
-                                reqid_k_retry = order_bridge.IB_PlaceOrderAdv(
-                                    UniqueID=0,
-                                    StrategyTag=strat["Strategy Name"],
-                                    UserID=self_ref.user_id,
-                                    Exchange=exchange_k,
-                                    Symbol=token_k,
-                                    TransactionType=side_k,
-                                    OrderType="LMT",
-                                    ProductType="NRML",
-                                    Price=retry_price,
-                                    TriggerPrice=0,
-                                    ProfitValue="",
-                                    StoplossValue="",
-                                    Quantity=unfilled_qty,
-                                    CancelIfNotCompleteInSeconds=wait_sec,
-                                )
-                                # FIX: Use lock
-                                with self_ref.state_lock:
-                                    state.setdefault("order_request_ids", []).append(reqid_k_retry)
-                                
-                                # Wait for fill or timeout
-                                elapsed_retry = 0
-                                while elapsed_retry < wait_sec:
-                                    filled_qty_now = order_bridge.IB_OrderFilledQty(reqid_k_retry) or 0
-                                    if filled_qty_now > 0:
-                                        filled_qty_k += filled_qty_now
-                                        break
-                                    time.sleep(poll_interval)
-                                    elapsed_retry += poll_interval
-                                if filled_qty_k >= qty_k:
-                                    break  # done
-
-                            # If still not filled, fallback to best quote or circuit
-                            if filled_qty_k < qty_k:
-                                best_quote = get_best_quote(token_k, side_k, order_bridge)
-                                fallback_price = (
-                                    best_quote if best_quote is not None else (ucp_k if side_k == "BUY" else lcp_k)
-                                )
-                                reqid_k_fallback = order_bridge.IB_PlaceOrderAdv(
-                                    UniqueID=0,
-                                    StrategyTag=strat["Strategy Name"],
-                                    UserID=self_ref.user_id,
-                                    Exchange=exchange_k,
-                                    Symbol=token_k,
-                                    TransactionType=side_k,
-                                    OrderType="LMT",
-                                    ProductType="NRML",
-                                    Price=fallback_price,
-                                    TriggerPrice=0,
-                                    ProfitValue="",
-                                    StoplossValue="",
-                                    Quantity=qty_k - filled_qty_k,
-                                    CancelIfNotCompleteInSeconds=0,  # Good till filled/cancelled
-                                )
-                                # FIX: Use lock
-                                with self_ref.state_lock:
-                                    state.setdefault("order_request_ids", []).append(reqid_k_fallback)
-                                # No wait: let risk management or manual intervention handle further
-                        
-                        # FIX: Use lock to update state
-                        with self_ref.state_lock:
-                            prev_traded_k = state.get(f"traded_qty{k+1}", 0)
-                            state[f"traded_qty{k+1}"] = prev_traded_k + filled_qty_k
-                            state[f"entry_price_total{k+1}"] = state.get(f"entry_price_total{k+1}", 0.0) + filled_qty_k * limit_price_k
-                            state[f"entry_price{k+1}"] = (
-                                state[f"entry_price_total{k+1}"] / state[f"traded_qty{k+1}"] if state[f"traded_qty{k+1}"] > 0 else 0.0
-                            )
-                    except Exception as e:
-                        log_event(strat["Strategy Name"], f"Leg {k+1} hedge order error", str(e))
-
                 def leg1_diff_locked_executor():
                     num_legs = len(legs)
                     sides = [leg[0] for leg in legs]
                     ratios = [leg[1] for leg in legs]
-                    lot_sizes_list = [leg[3] for leg in legs] # Use the locally gathered list
+                    lot_sizes_list = [leg[2] for leg in legs] # Use the locally gathered list
                     tokens = [strat[f"Token{i}"] for i in range(1, num_legs+1)]
-                    initial_ltps = [xts_get_ltp(t) for t in tokens]
+                    # Anchor on the same snapshot that produced the trigger
+                    initial_ltps = list(prices)
                     initial_leg1_price = initial_ltps[0]
                     initial_other_prices = initial_ltps[1:]
 
                     # FIX: Use lock to read state
-                    with self.state_lock:
+                    with state["lock"]:
                         order_qtys_list = [state.get(f"order_qty{i+1}", ratios[i] * lot_sizes_list[i]) for i in range(num_legs)]
                         traded_qtys_list = [state.get(f"traded_qty{i+1}", 0) for i in range(num_legs)]
                     
@@ -596,8 +693,8 @@ class StrategyExecutor(QThread):
                         return
 
                     row = get_scrip_row(tokens[0])
-                    lcp = float(row["lowerexchcircuitprice"])
-                    ucp = float(row["upperexchcircuitprice"])
+                    lcp = row.lower_circuit
+                    ucp = row.upper_circuit
                     mode = sides[0].upper()
                     exchange = get_exchange_from_scripmaster(tokens[0])
                     leg1_price = clamp_price(initial_leg1_price, lcp, ucp)
@@ -618,8 +715,7 @@ class StrategyExecutor(QThread):
                         CancelIfNotCompleteInSeconds=1,
                     )
                     # FIX: Use lock
-                    with self.state_lock:
-                        state.setdefault("order_request_ids", []).append(req_id)
+                    _record_order(state, req_id, to_trade)
                     
                     last_leg1_price = leg1_price
                     total_filled_leg1 = 0
@@ -633,7 +729,7 @@ class StrategyExecutor(QThread):
                         iter_start = time.time()
                         if iter_start >= deadline:
                             break
-                        current_other_prices = [xts_get_ltp(t) for t in tokens[1:]]
+                        current_other_prices = self._feed_ltps(tokens[1:])
                         new_leg1_price = calculate_locked_leg1_price(
                             initial_leg1_price,
                             initial_other_prices,
@@ -649,13 +745,27 @@ class StrategyExecutor(QThread):
                             except Exception as e:
                                 log_event(strat["Strategy Name"], "Order Modify Error", str(e))
 
-                        filled_now = order_bridge.IB_OrderFilledQty(req_id) or 0
+                        # Latest sweep from the order tracker; no bridge call of our own
+                        status1 = order_tracker.status(req_id)
+                        filled_now = status1.filled_qty if status1 else 0
                         partial_filled = filled_now - already_filled
                         
                         # This is the quantity of LEG 1 that just got filled in this iteration
                         filled_qty_leg1 = partial_filled 
 
                         if filled_qty_leg1 > 0:
+                            # FIX: Advance the fill baseline, otherwise every later iteration
+                            # re-hedged the cumulative fill, and book leg 1's fill on the state
+                            already_filled = filled_now
+                            total_filled_leg1 = filled_now
+                            fill_px1 = status1.avg_price if status1.avg_price > 0 else last_leg1_price
+                            _book_fill(state, 1, filled_qty_leg1, fill_px1, risk=self.risk)
+                            # Disabled (kill switch / user) while we were working: no new hedges
+                            with state["lock"]:
+                                stopped = state["status"] == "disabled"
+                            if stopped:
+                                log_event(strat["Strategy Name"], "Hedge Skipped", f"Strategy disabled; leg 1 fill of {filled_qty_leg1} not hedged.")
+                                break
                             qty1 = order_qtys_list[0] 
                             if qty1 > 0:
                                 for k in range(1, num_legs):
@@ -664,37 +774,33 @@ class StrategyExecutor(QThread):
                                     hedge_qty = int((qty_k / qty1) * filled_qty_leg1) 
                                     
                                     if hedge_qty > 0:
-                                        t = threading.Thread(
-                                            target=fire_leg_k,
-                                            args=(
-                                                k,  # Use the 0-based index 'k'
-                                                hedge_qty,
-                                                state,
-                                                strat,
-                                                tokens,
-                                                sides,
-                                                self,
-                                                last_leg1_price,
-                                                state["entry_diff"],
-                                                sides[0].upper()
-                                            )
-                                        )
-                                        t.daemon = True
-                                        t.start()
+                                        # All hedge legs work concurrently on the order engine, no thread per leg
+                                        try:
+                                            self.order_engine.submit(self._hedge_leg_order(
+                                                state, strat, k, hedge_qty, tokens, sides,
+                                                last_leg1_price, state["entry_diff"], sides[0].upper(),
+                                            ))
+                                        except Exception as e:
+                                            log_event(strat["Strategy Name"], f"Leg {k+1} hedge order error", str(e))
                             
                             # FIX: BUG REMOVED. This block was a copy-paste error and caused a duplicate order.
                             # if hedge_qty > 0:
                             #     ... (stray code removed) ...
 
                             # FIX: Read qtys from local snapshot
-                            with self.state_lock:
+                            with state["lock"]:
                                 qtys_now = [(order_qtys_list[i], state.get(f"traded_qty{i+1}", 0)) for i in range(num_legs)]
-                            self.update_qty_signal.emit(strat.get("Strategy Name", ""), qtys_now)
+                            self._queue_ui("qty", strat.get("Strategy Name", ""), qtys_now)
 
                         iter_end = time.time()
-                        if iter_end - start_time >= 1.0:
+                        if iter_end - start_time >= 1.0 or (status1 is not None and status1.done):
                                 break
-                        time.sleep(max(0,0.05-(iter_end - iter_start)))
+                        # Block until the tracker reports a new fill, or the next 50 ms re-price
+                        order_tracker.wait(
+                            req_id,
+                            until=lambda s, seen=filled_now: s.filled_qty > seen or s.done,
+                            timeout=max(0, 0.05 - (iter_end - iter_start)),
+                        )
                     try:
                         order_bridge.IB_CancelOrExitOrder(req_id)
                         log_event(strat["Strategy Name"], "Order Cancel", f"Unfilled qty cancelled after 1s")
@@ -702,16 +808,16 @@ class StrategyExecutor(QThread):
                         log_event(strat["Strategy Name"], "Cancel error", str(e))
                     
                     # FIX: Use lock to read state
-                    with self.state_lock:
+                    with state["lock"]:
                         total_filled_leg1 = state.get("traded_qty1", 0)
                         target_qty = state.get("order_qty1", 0)
                         current_status = state["status"] # Check status inside lock
 
                     if total_filled_leg1 == 0:
                         if current_status != "disabled":
-                            with self.state_lock:
+                            with state["lock"]:
                                 state["status"] = "waiting"
-                            self.update_status_signal.emit(strat["Strategy Name"], "waiting")
+                            self._queue_ui("status", strat["Strategy Name"], "waiting")
                             log_event(strat["Strategy Name"], "LEG1_CANCELLED", "No fill after all retries, status reset to waiting.")
                         else:
                             log_event(strat["Strategy Name"], "LEG1_CANCELLED", "No fill, but user disabled strategy, so not resetting to waiting.")
@@ -719,9 +825,9 @@ class StrategyExecutor(QThread):
 
                     if total_filled_leg1 < target_qty:
                         if current_status != "disabled":
-                            with self.state_lock:
+                            with state["lock"]:
                                 state["status"] = "waiting"
-                            self.update_status_signal.emit(strat["Strategy Name"], "waiting")
+                            self._queue_ui("status", strat["Strategy Name"], "waiting")
                             log_event(
                                 strat["Strategy Name"],
                                 "LEG1_PARTIAL_CANCEL",
@@ -735,164 +841,151 @@ class StrategyExecutor(QThread):
                             )
                         return
 
-                thread = threading.Thread(target=leg1_diff_locked_executor)
-                thread.daemon = True
-                thread.start()
-                self.update_status_signal.emit(strat.get("Strategy Name", ""), state["status"])
-                self.update_pnl_signal.emit(strat.get("Strategy Name", ""), 0.0)
+                # A pre-started pool worker picks this up; no thread creation on the trigger path
+                if self._submit_order_task(strat["Strategy Name"], leg1_diff_locked_executor) is None:
+                    with state["lock"]:
+                        state["status"] = "waiting"
+                    log_event(strat["Strategy Name"], "Trigger Skipped", "Order pool full, status reset to waiting.")
+                self._queue_ui("status", strat.get("Strategy Name", ""), state["status"])
+                self._queue_ui("pnl", strat.get("Strategy Name", ""), 0.0)
                 
         # ---- ABSOLUTE P&L CALCULATION ----
         if status == "triggered":
-            abs_pnl = 0
-            for idx, (side, lots, _, lot_size, token) in enumerate(legs, 1):
-                # FIX: Use local snapshot of qtys
-                traded_qty = traded_qtys_local[idx-1]
-                
-                # FIX: Use lock to read entry price
-                with self.state_lock:
-                    entry_price = state.get(f"entry_price{idx}", None)
-                
-                if traded_qty > 0 and entry_price is not None:
-                    current_price = xts_get_ltp(token)
-                    if side == "BUY":
-                        leg_pnl = (current_price - entry_price) * traded_qty
-                    else:
-                        leg_pnl = (entry_price - current_price) * traded_qty
-                    abs_pnl += leg_pnl
-            
+            # Kept current by the risk engine on every quote and fill; nothing to sum here
+            abs_pnl = self.risk.strategy_pnl(strat["Strategy Name"])
+
             # FIX: Use lock to update P&L in strategy dict
-            with self.state_lock:
+            with state["lock"]:
                 strat['P&L'] = round(abs_pnl, 2)
-            self.update_pnl_signal.emit(strat['Strategy Name'], abs_pnl)
+            self._queue_ui("pnl", strat['Strategy Name'], abs_pnl)
 
-            # FIX: Use lock to read entry_diff
-            with self.state_lock:
-                entry_diff = float(state.get("entry_diff", net))
-
-            sl_raw = strat.get("SL", 0)
-            tp_raw = strat.get("TP", 0)
-            sl_mode = strat.get("SL_Mode", "diff")
-            tp_mode = strat.get("TP_Mode", "diff")
-
-            def parse_sl_tp(value, entry):
-                try:
-                    if isinstance(value, str) and value.strip().endswith('%'):
-                        pct = float(value.strip().rstrip('%'))
-                        return (pct / 100.0) * abs(entry)
-                    return float(value)
-                except Exception:
-                    return 0
-
-            tp = parse_sl_tp(tp_raw, entry_diff)
-            sl = parse_sl_tp(sl_raw, entry_diff)
-
-            # TP logic
-            if tp:
-                if tp_mode == "abs":
-                    if entry_diff >= 0 and net >= tp:
-                        with self.state_lock: # FIX: Use lock
-                            state["status"] = "tp_hit"
-                        log_event(strat["Strategy Name"], "TP Hit", f"(Abs, Buy) net={net:.2f} >= tp={tp:.2f}")
-                        self.square_off(state)
-                        self.update_status_signal.emit(strat.get("Strategy Name", ""), "tp_hit")
-                        return
-                    elif entry_diff < 0 and net <= tp:
-                        with self.state_lock: # FIX: Use lock
-                            state["status"] = "tp_hit"
-                        log_event(strat["Strategy Name"], "TP Hit", f"(Abs, Sell) net={net:.2f} <= tp={tp:.2f}")
-                        self.square_off(state)
-                        self.update_status_signal.emit(strat.get("Strategy Name", ""), "tp_hit")
-                        return
-                else:  
-                    if entry_diff >= 0 and net >= entry_diff + abs(tp):
-                        with self.state_lock: # FIX: Use lock
-                            state["status"] = "tp_hit"
-                        log_event(strat["Strategy Name"], "TP Hit", f"(Diff, Buy) net={net:.2f} >= entry+tp={entry_diff+abs(tp):.2f}")
-                        self.square_off(state)
-                        self.update_status_signal.emit(strat.get("Strategy Name", ""), "tp_hit")
-                        return
-                    elif entry_diff < 0 and net <= entry_diff - abs(tp):
-                        with self.state_lock: # FIX: Use lock
-                            state["status"] = "tp_hit"
-                        log_event(strat["Strategy Name"], "TP Hit", f"(Diff, Sell) net={net:.2f} <= entry-tp={entry_diff-abs(tp):.2f}")
-                        self.square_off(state)
-                        self.update_status_signal.emit(strat.get("Strategy Name", ""), "tp_hit")
-                        return
+            entry_diff = _entry_diff(state)
 
-            if sl:
-                if sl_mode == "abs":
-                    if entry_diff >= 0 and net <= sl:
-                        with self.state_lock: # FIX: Use lock
-                            state["status"] = "sl_hit"
-                        log_event(strat["Strategy Name"], "SL Hit", f"(Abs, Buy) net={net:.2f} <= sl={sl:.2f}")
-                        self.square_off(state)
-                        self.update_status_signal.emit(strat.get("Strategy Name", ""), "sl_hit")
-                        return
-                    elif entry_diff < 0 and net >= sl:
-                        with self.state_lock: # FIX: Use lock
-                            state["status"] = "sl_hit"
-                        log_event(strat["Strategy Name"], "SL Hit", f"(Abs, Sell) net={net:.2f} >= sl={sl:.2f}")
-                        self.square_off(state)
-                        self.update_status_signal.emit(strat.get("Strategy Name", ""), "sl_hit")
-                        return
-                else:  # Diff mode
-                    if entry_diff >= 0 and net <= entry_diff - abs(sl):
-                        with self.state_lock: # FIX: Use lock
-                            state["status"] = "sl_hit"
-                        log_event(strat["Strategy Name"], "SL Hit", f"(Diff, Buy) net={net:.2f} <= entry-sl={entry_diff-abs(sl):.2f}")
-                        self.square_off(state)
-                        self.update_status_signal.emit(strat.get("Strategy Name", ""), "sl_hit")
-                        return
-                    elif entry_diff < 0 and net >= entry_diff + abs(sl):
-                        with self.state_lock: # FIX: Use lock
-                            state["status"] = "sl_hit"
-                        log_event(strat["Strategy Name"], "SL Hit", f"(Diff, Sell) net={net:.2f} >= entry+sl={entry_diff+abs(sl):.2f}")
-                        self.square_off(state)
-                        self.update_status_signal.emit(strat.get("Strategy Name", ""), "sl_hit")
-                        return
+            # TP is checked before SL, as the engine orders them
+            if exit_hit != NO_EXIT:
+                if exit_hit == TP_HIT:
+                    hit, label, key, mode, limit = "tp_hit", "TP Hit", "tp", compiled.tp_mode, compiled.tp_value(entry_diff)
+                else:
+                    hit, label, key, mode, limit = "sl_hit", "SL Hit", "sl", compiled.sl_mode, compiled.sl_value(entry_diff)
+                with state["lock"]: # FIX: Use lock
+                    state["status"] = hit
+                log_event(
+                    strat["Strategy Name"], label,
+                    f"({'Abs' if mode == 'abs' else 'Diff'}, {'Buy' if entry_diff >= 0 else 'Sell'}) "
+                    f"net={net:.2f} entry={entry_diff:.2f} {key}={limit:.2f}",
+                )
+                self._submit_order_task(strat["Strategy Name"], self.square_off, state, inline_if_full=True)
+                self._queue_ui("status", strat.get("Strategy Name", ""), hit)
+                return
         if status == "disabled" and not force_emit_diff:
             return
 
         # FIX: Use lock to update strategy dict
-        with self.state_lock:
+        with state["lock"]:
             for idx in range(1, num_legs + 1):
                 strat[f"OrderQty{idx}"] = state.get(f"order_qty{idx}", 0)
                 strat[f"TradedQty{idx}"] = state.get(f"traded_qty{idx}", 0)
         
-        self.update_qty_signal.emit(strat.get("Strategy Name", ""), list(zip(order_qtys_local, traded_qtys_local)))
-
-
-    def kill_switch(self):
-        # FIX: Use lock to get a snapshot of strategies
-        with self.state_lock:
-            strategies_to_kill = list(self.active_strategies.items())
-
-        for strat_name, state in strategies_to_kill:
-            strat = state["strategy"]
-            
-            # FIX: Use lock to read order IDs
-            with self.state_lock:
-                order_ids = list(state.get("order_request_ids", []))
-            
-            # --- Cancel all app-placed orders ---
-            for order_id in order_ids:
-                try:
-                    order_bridge.IB_CancelOrExitOrder(order_id)
-                    log_event(strat["Strategy Name"], "Kill Switch", f"Cancelled Order {order_id}")
-                except Exception as e:
-                    log_event(strat["Strategy Name"], "Kill Switch Error", f"Order {order_id}: {str(e)}")
-
-            # --- Square off any open positions from this strategy ---
-            try:
-                self.square_off(state) # square_off is internally thread-safe
-                log_event(strat["Strategy Name"], "Kill Switch", "Strategy squared off.")
-            except Exception as e:
-                log_event(strat["Strategy Name"], "Kill Switch Error", f"Square-off: {str(e)}")
-
-            # --- Stop the strategy ---
+        self._queue_ui("qty", strat.get("Strategy Name", ""), list(zip(order_qtys_local, traded_qtys_local)))
+
+
+    async def _bulk_square_off(self, claims):
+        """
+        Bridge-side square-off per config.KILL_SWITCH_BULK. Returns the claims the
+        bridge did not take, which still need counter orders of their own.
+        """
+        if config.KILL_SWITCH_BULK == "all":
+            if await abridge.IB_SquareOffAll():
+                log_event("SYSTEM", "Kill Switch", "Bridge squared off all positions.")
+                for state, _ in claims:
+                    self.risk.mark_flat(state["strategy"]["Strategy Name"])
+                return []
+            log_event("SYSTEM", "Kill Switch Error", "IB_SquareOffAll failed; sending counter orders per leg.")
+            return claims
+        if config.KILL_SWITCH_BULK == "strategy":
+            names = [state["strategy"]["Strategy Name"] for state, _ in claims]
+            results = await asyncio.gather(*(abridge.IB_SquareOffStrategy(name) for name in names), return_exceptions=True)
+            left = []
+            for claim, name, ok in zip(claims, names, results):
+                if ok is True:
+                    log_event(name, "Kill Switch", "Bridge squared off strategy.")
+                    self.risk.mark_flat(name)
+                else:
+                    log_event(name, "Kill Switch Error", "IB_SquareOffStrategy failed; sending counter orders per leg.")
+                    left.append(claim)
+            return left
+        return claims
+
+    async def _flatten(self, states, deadline, engine_stopped):
+        """Cancel every working order at once, then send every counter order at once, then wait for them."""
+        start = time.monotonic()
+        report = {"strategies": len(states), "cancels": 0, "cancel_errors": 0, "bulk": 0,
+                  "counter_orders": 0, "not_placed": 0, "unconfirmed": 0}
+
+        report["cancels"], report["cancel_errors"] = await self._cancel_orders(states, "Kill Switch")
+        # Hedge ladders book the last fills of their pulled orders before positions are claimed
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(engine_stopped), max(0.0, deadline - time.monotonic()))
+        except Exception as e:
+            log_event("SYSTEM", "Kill Switch Error", f"Hedge orders not confirmed stopped: {e!r}")
+        report["cancel_ms"] = (time.monotonic() - start) * 1000.0
+
+        # --- Square off every open position ---
+        claims = [(state, legs) for state in states for legs in [_claim_positions(state)] if legs]
+        left = await self._bulk_square_off(claims)
+        report["bulk"] = len(claims) - len(left)
+        placed, report["not_placed"] = await self._send_counter_orders(left)
+        report["counter_orders"] = len(placed)
+        report["sent_ms"] = (time.monotonic() - start) * 1000.0
+
+        # --- Flat once every counter order has filled (bulk square-offs count once acknowledged) ---
+        statuses = await asyncio.gather(*(
+            order_tracker.wait_async(req_id, until=filled_at_least(qty), timeout=max(0.0, deadline - time.monotonic()))
+            for req_id, qty in placed
+        ))
+        # Legs whose counter order never reached the bridge are still open
+        report["unconfirmed"] = report["not_placed"] + sum(
+            1 for s, (_, qty) in zip(statuses, placed) if s is None or s.filled_qty < qty
+        )
+        report["flat"] = report["unconfirmed"] == 0
+        report["flat_ms"] = (time.monotonic() - start) * 1000.0
+        return report
+
+    def kill_switch(self, deadline=None):
+        """
+        Stop every strategy and flatten: all cancels go out concurrently, then all
+        square-offs, then we wait up to `deadline` seconds (KILL_SWITCH_DEADLINE_SEC)
+        for the counter orders to fill. Returns a report with the time to flat.
+        """
+        deadline = config.KILL_SWITCH_DEADLINE_SEC if deadline is None else deadline
+        start = time.monotonic()
+        strategies_to_kill = self.states()
+
+        # --- Stop the strategies first so nothing new triggers while we flatten ---
+        for state in strategies_to_kill:
             # FIX: Use lock to update status
-            with self.state_lock:
+            with state["lock"]:
                 state["status"] = "disabled"
+        # Hedge ladders stop placing rungs and pull their working orders
+        engine_stopped = self.order_engine.cancel()
 
-        self.update_status_signal.emit("SYSTEM", "All strategies stopped by kill switch.")
-        print("[SYSTEM] Kill Switch All strategies stopped by kill switch.")
\ No newline at end of file
+        try:
+            report = bridge_loop.run(self._flatten(strategies_to_kill, start + deadline, engine_stopped), timeout=deadline + 1)
+        except Exception as e:
+            log_event("SYSTEM", "Kill Switch Error", repr(e))
+            report = {"strategies": len(strategies_to_kill), "flat": False, "error": repr(e)}
+        report["flat_ms"] = (time.monotonic() - start) * 1000.0
+
+        for state in strategies_to_kill:
+            self._queue_ui("status", state["strategy"]["Strategy Name"], "disabled")
+        summary = (
+            f"{'Flat' if report['flat'] else 'NOT confirmed flat'} after {report['flat_ms']:.0f} ms "
+            f"({report.get('cancels', 0)} cancels, {report.get('bulk', 0)} bridge square-offs, "
+            f"{report.get('counter_orders', 0)} counter orders, {report.get('not_placed', 0)} not placed, "
+            f"{report.get('unconfirmed', 0)} unconfirmed)"
+        )
+        log_event("SYSTEM", "Kill Switch", summary)
+        self._queue_ui("status", "SYSTEM", "All strategies stopped by kill switch.")
+        print(f"[SYSTEM] Kill Switch All strategies stopped by kill switch. {summary}")
+        report["summary"] = summary
+        return report
@@ -8,33 +8,36 @@ class StrategyManager:
         self.executor = executor
         self.disabled_strategies = set()
 
+    # Every read/write of a strategy goes through the executor, which takes its lock
     def disable_strategy(self, name):
-        if name in self.executor.active_strategies:
+        if self.executor.pause_strategy(name):
             self.disabled_strategies.add(name)
-            self.executor.active_strategies[name]['status'] = 'disabled'
-            self.executor.update_status_signal.emit(name, "disabled")
-
             print(f"🚫 Strategy '{name}' has been disabled")
 
     def enable_strategy(self, name):
-        if name in self.disabled_strategies or (name in self.executor.active_strategies and self.executor.active_strategies[name]['status'] == 'disabled'):
+        if name in self.disabled_strategies or self.executor.get_status(name) == 'disabled':
             self.disabled_strategies.discard(name)
             self.executor.resume_strategy(name)
             print(f"✅ Strategy '{name}' re-enabled")
 
     def edit_strategy(self, name, field, new_value):
-        if name in self.executor.active_strategies:
-            self.executor.active_strategies[name]['data'][field] = new_value
+        state = self.executor.get_state(name)
+        if state is not None:
+            with state["lock"]:
+                state["strategy"][field] = new_value
             print(f"✏️ Updated {field} of '{name}' to {new_value}")
 
     def square_off_all(self):
             # 'strat_state' here is the 'state' object from the executor
-            for name, strat_state in self.executor.active_strategies.items(): 
-                if strat_state['status'] == 'triggered':
-                    # Call square_off with just the state object
-                    self.executor.square_off(strat_state) 
-                    
-                    strat_state['status'] = 'squared_off'
-                    strat_state['position'] = 'closed'
+            for strat_state in self.executor.states():
+                name = strat_state["strategy"]["Strategy Name"]
+                with strat_state["lock"]:
+                    triggered = strat_state['status'] == 'triggered'
+                if triggered:
+                    # FIX: square_off sets the status itself, and only if every leg went out
+                    if not self.executor.square_off(strat_state):
+                        print(f"⚠️ Strategy '{name}' not fully squared off")
+                        continue
+                    with strat_state["lock"]:
+                        strat_state['position'] = 'closed'
                     print(f"🔁 Strategy '{name}' squared off")
-            
\ No newline at end of file
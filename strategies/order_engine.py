@@ -0,0 +1,384 @@
+import heapq
+import itertools
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+from trading.order_utils import clamp_price
+from utils.logger import log_event
+
+# One rung of a leg's order ladder. order_type is "MKT", "LMT" or "BEST" (a limit
+# at the best bid/ask, else the circuit, fetched when the rung is reached).
+# wait is how long the order may work before the next rung; None = until done.
+Step = namedtuple("Step", ["order_type", "price", "wait"])
+
+# Leg states. STOPPING: cancel() pulled the working order; its last fills are
+# still booked until the tracker reports it done
+PENDING, QUOTING, PLACING, WORKING, CANCELLING, STOPPING, DONE, STOPPED = (
+    "pending", "quoting", "placing", "working", "cancelling", "stopping", "done", "stopped",
+)
+_LIVE = (PENDING, QUOTING, PLACING, WORKING, CANCELLING, STOPPING)
+
+
+class LegOrder:
+    """
+    Everything the engine needs to work one leg's qty through its ladder.
+
+    on_order(req_id, qty) is called for every order placed and on_fill(qty, price)
+    for every fill booked, both on the engine thread. future resolves with the
+    qty filled once the leg is done, stopped or out of rungs.
+    """
+
+    def __init__(self, key, token, side, qty, steps, exchange, user_id, circuit,
+                 ref_price=0.0, on_order=None, on_fill=None):
+        self.key = key                    # strategy name; also the StrategyTag
+        self.token = token
+        self.side = side.upper()
+        self.qty = qty
+        self.steps = list(steps)
+        self.exchange = exchange
+        self.user_id = user_id
+        self.lcp, self.ucp = circuit
+        self.ref_price = ref_price        # booking price for a MKT fill without avg price
+        self.on_order = on_order
+        self.on_fill = on_fill
+        self.state = PENDING
+        self.step_no = -1
+        self.filled = 0
+        self.req_id = None
+        self.price = 0.0                  # price the working order was sent at
+        self.seen = 0                     # fill of the working order already booked
+        self.seen_value = 0.0             # seen * its avg price
+        self.stop_at = None               # when a stopping leg gives up waiting for its order
+        self.future = Future()
+
+    @property
+    def remaining(self):
+        return self.qty - self.filled
+
+
+class OrderEngine(threading.Thread):
+    """
+    Event-driven executor for leg order ladders.
+
+    Every leg is an explicit state machine (quoting -> placing -> working ->
+    cancelling -> next rung ... -> done / stopped). Bridge calls go out as
+    coroutines on the bridge loop, fills arrive from the order tracker, and
+    per-rung deadlines sit in one timer heap, so this single thread drives any
+    number of concurrent legs and never sleeps on behalf of one of them. Each
+    rung's deadline is exact: its order works for `wait` seconds (the same
+    CancelIfNotCompleteInSeconds the bridge gets), then gets `settle` seconds for
+    the bridge's cancel and any last fill to show up before the next rung.
+    A stopped leg keeps booking fills of its pulled order until the tracker
+    reports it done (or stop_wait passes), so on_fill sees every filled qty.
+    """
+
+    def __init__(self, api, loop, tracker, settle=0.2, stop_wait=2.0):
+        super().__init__(name="OrderEngine")
+        self.daemon = True
+        self.api = api
+        self.loop = loop
+        self.tracker = tracker
+        self.settle = settle
+        self.stop_wait = stop_wait
+        self._events = queue.SimpleQueue()
+        self._timers = []                 # heap of (deadline, seq, leg, step_no)
+        self._seq = itertools.count()
+        self._legs = set()
+        self._lock = threading.Lock()
+        self._launched = False
+        self._stop_event = threading.Event()
+        self.events_handled = 0
+        self.max_timer_lag_ms = 0.0
+
+    def ensure_started(self):
+        with self._lock:
+            if self._launched:
+                return
+            self._launched = True
+        self.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._post(("wake", None, None, None))
+
+    # --- public API (any thread) ---
+    def submit(self, leg):
+        """Start working a LegOrder. Returns leg.future."""
+        self.ensure_started()
+        self._post(("start", leg, None, None))
+        return leg.future
+
+    def cancel(self, key=None):
+        """
+        Stop every live leg of strategy `key` (all legs if None) and cancel their
+        working orders. The Future resolves once those legs have booked their last
+        fills and finished.
+        """
+        done = Future()
+        self.ensure_started()
+        self._post(("cancel", None, None, (key, done)))
+        return done
+
+    def stats(self):
+        with self._lock:
+            states = {}
+            for leg in self._legs:
+                states[leg.state] = states.get(leg.state, 0) + 1
+            return {
+                "live_legs": len(self._legs),
+                "states": states,
+                "timers": len(self._timers),
+                "events_handled": self.events_handled,
+                "max_timer_lag_ms": self.max_timer_lag_ms,
+            }
+
+    # --- engine thread ---
+    def _post(self, event):
+        self._events.put(event)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            timeout = None
+            if self._timers:
+                timeout = max(0.0, self._timers[0][0] - time.monotonic())
+            try:
+                event = self._events.get(timeout=timeout)
+            except queue.Empty:
+                event = None
+            if event is not None:
+                try:
+                    self._handle(*event)
+                except Exception as e:
+                    print(f"[OrderEngine] Error handling {event[0]}: {e}")
+                self.events_handled += 1
+            self._fire_timers()
+
+    def _fire_timers(self):
+        now = time.monotonic()
+        while self._timers and self._timers[0][0] <= now:
+            deadline, _, leg, step_no = heapq.heappop(self._timers)
+            if leg.step_no != step_no or leg.state not in (WORKING, CANCELLING, STOPPING):
+                continue  # the rung already moved on
+            self.max_timer_lag_ms = max(self.max_timer_lag_ms, (now - deadline) * 1000.0)
+            try:
+                if leg.state == STOPPING:
+                    if now >= leg.stop_at:  # not the rung's own deadline from before the stop
+                        self._on_stop_deadline(leg)
+                else:
+                    self._on_deadline(leg)
+            except Exception as e:
+                print(f"[OrderEngine] Error at deadline for {leg.key} {leg.token}: {e}")
+
+    def _handle(self, kind, leg, step_no, payload):
+        if kind == "start":
+            with self._lock:
+                self._legs.add(leg)
+            self._next_step(leg)
+        elif kind == "cancel":
+            key, done = payload
+            self._when_finished(self._cancel_legs(key), done)
+        elif kind == "cancelled":
+            if payload is not True:
+                log_event(leg.key, "Order Engine Error", f"cancel of {leg.token} order {leg.req_id} not accepted")
+        elif kind in ("quote", "placed", "status"):
+            if leg.step_no != step_no or leg.state not in _LIVE:
+                # Stale reply for an earlier rung; an order placed after a stop is pulled
+                if kind == "placed" and leg.state == STOPPED and payload:
+                    self._send_cancel(leg, payload)
+                return
+            getattr(self, f"_on_{kind}")(leg, payload)
+
+    def _next_step(self, leg):
+        if leg.remaining <= 0 or leg.step_no + 1 >= len(leg.steps):
+            self._finish(leg, DONE)
+            return
+        leg.step_no += 1
+        leg.req_id, leg.seen, leg.seen_value = None, 0, 0.0
+        step = leg.steps[leg.step_no]
+        if step.order_type == "BEST":
+            leg.state = QUOTING
+            # Fetched now, not read from the quote feed: the feed polls LTP only, and
+            # this rung exists because earlier limits missed the touch
+            quote = self.api.IB_ASK if leg.side == "BUY" else self.api.IB_BID
+            self._when_done(self.loop.submit(quote(leg.exchange, leg.token)), "quote", leg)
+        else:
+            self._place(leg, step.order_type, step.price or 0)
+
+    def _place(self, leg, order_type, price):
+        step = leg.steps[leg.step_no]
+        leg.state = PLACING
+        leg.price = price
+        coro = self.api.IB_PlaceOrderAdv(
+            UniqueID=0,
+            StrategyTag=leg.key,
+            UserID=leg.user_id,
+            Exchange=leg.exchange,
+            Symbol=leg.token,
+            TransactionType=leg.side,
+            OrderType=order_type,
+            ProductType="NRML",
+            Price=price,
+            TriggerPrice=0,
+            ProfitValue="",
+            StoplossValue="",
+            Quantity=leg.remaining,
+            CancelIfNotCompleteInSeconds=step.wait or 0,
+        )
+        self._when_done(self.loop.submit(coro), "placed", leg)
+
+    def _when_done(self, fut, kind, leg):
+        step_no = leg.step_no
+
+        def post(f):
+            if f.cancelled():
+                return
+            error = f.exception()
+            if error is not None:
+                log_event(leg.key, "Order Engine Error", f"{kind} {leg.token}: {error}")
+            self._post((kind, leg, step_no, None if error is not None else f.result()))
+        fut.add_done_callback(post)
+
+    def _on_quote(self, leg, best):
+        if best is None or best <= 0:
+            best = leg.ucp if leg.side == "BUY" else leg.lcp
+        self._place(leg, "LMT", clamp_price(best, leg.lcp, leg.ucp))
+
+    def _on_placed(self, leg, req_id):
+        if leg.state == STOPPING:
+            # Stopped while this order was on its way: pull it and book whatever filled
+            if req_id:
+                self._adopt(leg, req_id)
+                self._send_cancel(leg, req_id)
+                self._watch(leg)
+            else:
+                self._finish(leg, STOPPED)
+            return
+        if not req_id:
+            log_event(leg.key, "Order Rejected", f"{leg.token} step {leg.step_no + 1}: bridge returned no request id")
+            self._next_step(leg)
+            return
+        leg.state = WORKING
+        self._adopt(leg, req_id)
+        step = leg.steps[leg.step_no]
+        if step.wait:
+            self._add_timer(leg, step.wait + self.settle)
+        self._watch(leg)
+
+    def _adopt(self, leg, req_id):
+        leg.req_id = req_id
+        self.tracker.track(req_id, leg.remaining)
+        if leg.on_order:
+            leg.on_order(req_id, leg.remaining)
+
+    def _watch(self, leg):
+        seen = leg.seen
+        fut = self.tracker.watch(leg.req_id, until=lambda s: s.filled_qty > seen or s.done)
+        self._when_done(fut, "status", leg)
+
+    def _on_status(self, leg, status):
+        self._book(leg, status)
+        if leg.state == STOPPING:
+            if status.done or leg.remaining <= 0:
+                self._finish(leg, STOPPED)
+            else:
+                self._watch(leg)
+        elif leg.remaining <= 0:
+            self._finish(leg, DONE)
+        elif status.done:
+            self._next_step(leg)
+        else:
+            self._watch(leg)
+
+    def _on_deadline(self, leg):
+        status = self.tracker.status(leg.req_id)
+        if status is not None:
+            self._book(leg, status)
+        if leg.remaining <= 0:
+            self._finish(leg, DONE)
+        elif leg.state == WORKING and (status is None or not status.done):
+            # The bridge should have cancelled it by now; make sure, and give the
+            # cancel (and any last fill) one more settle period before moving on
+            leg.state = CANCELLING
+            self._send_cancel(leg, leg.req_id)
+            self._add_timer(leg, self.settle)
+        else:
+            if leg.state == CANCELLING and (status is None or not status.done):
+                log_event(leg.key, "Order Engine", f"{leg.token} order {leg.req_id} not confirmed cancelled; moving on")
+            self._next_step(leg)
+
+    def _on_stop_deadline(self, leg):
+        status = self.tracker.status(leg.req_id)
+        if status is not None:
+            self._book(leg, status)
+        log_event(leg.key, "Order Engine", f"{leg.token} order {leg.req_id} not confirmed done after stop; last fill booked")
+        self._finish(leg, STOPPED)
+
+    def _book(self, leg, status):
+        delta = status.filled_qty - leg.seen
+        if delta <= 0:
+            return
+        if status.avg_price > 0:
+            value = status.avg_price * status.filled_qty
+            price = (value - leg.seen_value) / delta
+            leg.seen_value = value
+        else:
+            price = leg.price or leg.ref_price
+            leg.seen_value += price * delta
+        leg.seen = status.filled_qty
+        leg.filled += delta
+        if leg.on_fill:
+            try:
+                leg.on_fill(delta, price)
+            except Exception as e:
+                log_event(leg.key, "Order Engine Error", f"booking fill on {leg.token}: {e}")
+
+    def _add_timer(self, leg, delay):
+        heapq.heappush(self._timers, (time.monotonic() + delay, next(self._seq), leg, leg.step_no))
+
+    def _send_cancel(self, leg, req_id):
+        self._when_done(self.loop.submit(self.api.IB_CancelOrExitOrder(req_id)), "cancelled", leg)
+
+    def _cancel_legs(self, key):
+        """Stop the matching legs; returns them (those with an order out finish later)."""
+        with self._lock:
+            legs = [leg for leg in self._legs if key is None or leg.key == key]
+        for leg in legs:
+            if leg.state == STOPPING:
+                continue  # already being stopped
+            if leg.state in (WORKING, CANCELLING) and leg.req_id:
+                self._stopping(leg)
+                self._send_cancel(leg, leg.req_id)
+            elif leg.state == PLACING:
+                self._stopping(leg)  # _on_placed pulls the order when the reply comes
+            else:
+                self._finish(leg, STOPPED)
+        return legs
+
+    def _stopping(self, leg):
+        leg.state = STOPPING
+        leg.stop_at = time.monotonic() + self.stop_wait
+        self._add_timer(leg, self.stop_wait)
+
+    def _when_finished(self, legs, done):
+        """Resolve done once every leg's future is resolved (callbacks run on this thread)."""
+        waiting = [leg.future for leg in legs if not leg.future.done()]
+        if not waiting:
+            done.set_result(None)
+            return
+        left = [len(waiting)]
+
+        def one_finished(_):
+            left[0] -= 1
+            if left[0] == 0 and not done.done():
+                done.set_result(None)
+        for fut in waiting:
+            fut.add_done_callback(one_finished)
+
+    def _finish(self, leg, state):
+        leg.state = state
+        with self._lock:
+            self._legs.discard(leg)
+        if not leg.future.done():
+            leg.future.set_result(leg.filled)
@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class OrderPoolFull(RuntimeError):
+    """Raised by OrderPool.submit when max_pending tasks are already queued."""
+
+
+class OrderPool:
+    """
+    Fixed set of pre-started worker threads for order tasks.
+
+    Tasks are submitted under a key (the strategy name). Tasks with the same key
+    run one at a time in submission order, so a strategy's square-off can never
+    overtake its entry; different keys run in parallel on up to `workers`
+    threads. At most `max_pending` tasks may wait at once; beyond that submit()
+    raises OrderPoolFull instead of queueing without bound, and the caller
+    decides what to do (the executor leaves the strategy waiting for the next
+    trigger). No thread is created on the trigger path.
+    """
+
+    def __init__(self, workers=8, max_pending=64, name="OrderPool"):
+        self.name = name
+        self.max_pending = max_pending
+        self._queues = {}        # key -> deque of (fn, args, Future, submitted_at)
+        self._ready = deque()    # keys with queued work and no task running
+        self._running = set()    # keys with a task on a worker right now
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._stats = {
+            "submitted": 0, "completed": 0, "failed": 0, "rejected": 0,
+            "max_pending": 0, "max_wait_ms": 0.0, "total_wait_ms": 0.0, "max_run_ms": 0.0,
+        }
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"{name}-{i}", daemon=True) for i in range(workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, key, fn, *args):
+        """Queue fn(*args) behind earlier tasks for key. Returns a Future."""
+        fut = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"{self.name} is shut down")
+            if self._pending >= self.max_pending:
+                self._stats["rejected"] += 1
+                raise OrderPoolFull(f"{self.name}: {self._pending} order tasks already queued")
+            queue = self._queues.setdefault(key, deque())
+            queue.append((fn, args, fut, time.monotonic()))
+            self._pending += 1
+            self._stats["submitted"] += 1
+            self._stats["max_pending"] = max(self._stats["max_pending"], self._pending)
+            if len(queue) == 1 and key not in self._running:
+                self._ready.append(key)
+                self._cond.notify()
+        return fut
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._ready and not self._closed:
+                    self._cond.wait()
+                if not self._ready:
+                    return
+                key = self._ready.popleft()
+                fn, args, fut, submitted = self._queues[key].popleft()
+                self._running.add(key)
+                self._pending -= 1
+                wait_ms = (time.monotonic() - submitted) * 1000.0
+                self._stats["total_wait_ms"] += wait_ms
+                self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], wait_ms)
+
+            started = time.monotonic()
+            if fut.set_running_or_notify_cancel():
+                try:
+                    fut.set_result(fn(*args))
+                    failed = False
+                except BaseException as e:
+                    fut.set_exception(e)
+                    failed = True
+            else:
+                failed = False
+            run_ms = (time.monotonic() - started) * 1000.0
+
+            with self._cond:
+                self._running.discard(key)
+                self._stats["failed" if failed else "completed"] += 1
+                self._stats["max_run_ms"] = max(self._stats["max_run_ms"], run_ms)
+                if self._queues[key]:
+                    self._ready.append(key)
+                    self._cond.notify()
+                else:
+                    del self._queues[key]
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            started = stats["completed"] + stats["failed"] + len(self._running)
+            stats["avg_wait_ms"] = stats.pop("total_wait_ms") / started if started else 0.0
+            stats["pending"] = self._pending
+            stats["active"] = len(self._running)
+            stats["workers"] = len(self._threads)
+            return stats
+
+    def shutdown(self, wait=True):
+        """Stop accepting work; workers exit once the queued tasks have run."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            for t in self._threads:
+                t.join()
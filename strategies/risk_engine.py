@@ -0,0 +1,162 @@
+import threading
+
+
+def _limit(max_loss):
+    """A missing, zero or negative Global Max Loss means no limit."""
+    return max_loss if max_loss and max_loss > 0 else float("inf")
+
+
+class _Leg:
+    __slots__ = ("name", "leg", "token", "qty", "cost", "mark")
+
+    def __init__(self, name, leg, token):
+        self.name = name
+        self.leg = leg
+        self.token = token
+        self.qty = 0        # signed: + long, - short
+        self.cost = 0.0     # signed sum of qty * fill price
+        self.mark = None    # last price the leg was marked at
+
+    @property
+    def mtm(self):
+        return self.qty * self.mark - self.cost if self.mark is not None else 0.0
+
+
+class RiskEngine:
+    """
+    Running mark-to-market for every leg, every strategy and the whole portfolio.
+
+    A leg's MTM is qty * mark - cost, which covers realized and open P&L alike.
+    Fills move qty and cost; quotes move the mark, and only legs on a token whose
+    price changed are touched. Strategy and portfolio totals are adjusted by each
+    change rather than summed again, so reading them is O(1). Every quote and fill
+    checks the portfolio against max_loss; the first breach calls on_breach(total)
+    once, on the calling thread, until rearm() or set_max_loss() clears it.
+    """
+
+    def __init__(self, max_loss=float("inf"), on_breach=None):
+        self.max_loss = _limit(max_loss)
+        self.on_breach = on_breach
+        self._legs = {}          # (name, leg) -> _Leg
+        self._by_token = {}      # token -> [_Leg] with a position or a cost to mark
+        self._strategy = {}      # name -> MTM
+        self._total = 0.0
+        self._lock = threading.Lock()
+        self.tripped = False
+        self.quotes_seen = 0
+        self.worst_total = 0.0
+
+    def set_max_loss(self, max_loss):
+        """New limit; re-arms the breach check if the portfolio is back inside it."""
+        with self._lock:
+            self.max_loss = _limit(max_loss)
+            if self._total > -self.max_loss:
+                self.tripped = False
+        self._check()
+
+    def rearm(self):
+        with self._lock:
+            self.tripped = False
+
+    # --- events ---
+    def on_fill(self, name, leg, token, side, qty, price):
+        """Book a fill of qty at price; side is the order's side (BUY adds qty)."""
+        if qty <= 0:
+            return
+        signed = qty if side.upper() == "BUY" else -qty
+        token = token.strip().upper()  # as the quote feed keys it
+        with self._lock:
+            key = (name, leg)
+            entry = self._legs.get(key)
+            if entry is None:
+                entry = self._legs[key] = _Leg(name, leg, token)
+                self._by_token.setdefault(token, []).append(entry)
+            before = entry.mtm
+            if entry.mark is None:
+                entry.mark = price
+            entry.qty += signed
+            entry.cost += signed * price
+            self._move(name, entry.mtm - before)
+        self._check()
+
+    def on_quotes(self, snapshot, changed=None):
+        """
+        Re-mark every leg whose token moved in this {token: ltp} snapshot; pass the
+        moved tokens as changed (when the caller already knows them) to skip the rest.
+        """
+        with self._lock:
+            self.quotes_seen += 1
+            if changed is None:
+                moved = self._by_token.items()
+            else:
+                moved = [(token, self._by_token[token]) for token in changed if token in self._by_token]
+            for token, legs in moved:
+                price = snapshot.get(token)
+                if not price:
+                    continue  # not polled, or the poll failed (0.0): keep the last mark
+                for entry in legs:
+                    if entry.mark != price:
+                        delta = entry.qty * (price - entry.mark) if entry.mark is not None else 0.0
+                        entry.mark = price
+                        if delta:
+                            self._move(entry.name, delta)
+        self._check()
+
+    def mark_flat(self, name):
+        """The bridge closed this strategy's positions without fills we can see: close at the last mark."""
+        with self._lock:
+            for entry in self._legs.values():
+                if entry.name == name and entry.qty and entry.mark is not None:
+                    entry.cost -= entry.qty * entry.mark
+                    entry.qty = 0
+
+    def remove(self, name):
+        with self._lock:
+            for key in [k for k in self._legs if k[0] == name]:
+                entry = self._legs.pop(key)
+                self._by_token[entry.token].remove(entry)
+                if not self._by_token[entry.token]:
+                    del self._by_token[entry.token]
+            self._total -= self._strategy.pop(name, 0.0)
+
+    # --- reads ---
+    def total(self):
+        return self._total
+
+    def strategy_pnl(self, name):
+        return self._strategy.get(name, 0.0)
+
+    def leg_pnl(self, name, leg):
+        entry = self._legs.get((name, leg))
+        return entry.mtm if entry is not None else 0.0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "total": self._total,
+                "worst_total": self.worst_total,
+                "max_loss": self.max_loss,
+                "tripped": self.tripped,
+                "legs": len(self._legs),
+                "tokens": len(self._by_token),
+                "quotes_seen": self.quotes_seen,
+            }
+
+    # --- internals ---
+    def _move(self, name, delta):
+        # Caller holds _lock
+        self._strategy[name] = self._strategy.get(name, 0.0) + delta
+        self._total += delta
+        self.worst_total = min(self.worst_total, self._total)
+
+    def _check(self):
+        with self._lock:
+            if self.tripped or self._total > -self.max_loss:
+                return
+            self.tripped = True
+            total = self._total
+        if self.on_breach is not None:
+            try:
+                self.on_breach(total)
+            except Exception as e:
+                print(f"[RiskEngine] Breach handler error: {e}")
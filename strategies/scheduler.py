@@ -0,0 +1,59 @@
+import time
+
+
+class TickScheduler:
+    """
+    Fixed-cadence deadline for one class of strategies.
+
+    Deadlines advance by whole intervals from the schedule, not from when the
+    last cycle finished, so slow cycles do not push every later tick back
+    (no drift). A cycle that finishes past its next deadline counts as an
+    overrun; whole intervals that passed while it ran are skipped rather than
+    replayed back to back, and counted.
+    """
+
+    def __init__(self, name, interval):
+        self.name = name
+        self.interval = interval
+        self.next_due = None
+        self.cycles = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.max_lateness = 0.0  # seconds a cycle started after its deadline
+        self.max_duration = 0.0
+
+    def time_until_due(self, now=None):
+        now = time.monotonic() if now is None else now
+        if self.next_due is None:
+            self.next_due = now
+        return max(0.0, self.next_due - now)
+
+    def is_due(self, now=None):
+        return self.time_until_due(now) == 0.0
+
+    def complete(self, started, finished=None):
+        """Record a cycle that started at `started` and schedule the next deadline."""
+        finished = time.monotonic() if finished is None else finished
+        self.cycles += 1
+        self.max_lateness = max(self.max_lateness, started - self.next_due)
+        self.max_duration = max(self.max_duration, finished - started)
+        self.next_due += self.interval
+        if finished > self.next_due:
+            self.overruns += 1
+            missed = int((finished - self.next_due) // self.interval)
+            if missed:
+                # Run once, late, instead of bursting through every missed slot
+                self.skipped += missed
+                self.next_due += missed * self.interval
+            return missed
+        return 0
+
+    def stats(self):
+        return {
+            "interval_ms": self.interval * 1000.0,
+            "cycles": self.cycles,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "max_lateness_ms": self.max_lateness * 1000.0,
+            "max_duration_ms": self.max_duration * 1000.0,
+        }
@@ -0,0 +1,148 @@
+"""
+Scripmaster download (utils.load_tokken) against a local HTTP stand-in for the
+broker's CSV endpoint: parallel per-exchange fetch, the ETag / Last-Modified
+sidecar, 304 reuse of the kept master and the missing-column error.
+
+Run from the repo root:  python -m pytest -q tests
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+
+import utils.load_tokken as lt
+
+LAST_MODIFIED = "Sat, 17 Oct 2026 08:00:00 GMT"
+
+
+def _master_csv(exch, rows=20, drop=None):
+    code = "NIFTY" if exch == "NSEFO" else "BSX"
+    df = pd.DataFrame({
+        "ScripName": [f"{code} 27-NOV-2025 CE {10000 + 50 * i}" for i in range(rows)],
+        "ExchangeName": exch,
+        "MarketLot": "75",
+        "LowerExchCircuitPrice": "0.05",
+        "UpperExchCircuitPrice": "999.0",
+        "MaxQtyPerOrder": "1800",
+    })
+    if drop:
+        df = df.drop(columns=drop)
+    return df.to_csv(index=False).encode()
+
+
+class _MasterHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        exch = parse_qs(urlparse(self.path).query).get("name", [""])[0]
+        with server.lock:
+            server.requests.append((exch, dict(self.headers)))
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            if server.barrier is not None:
+                # Only passes once every exchange's request is open at the same time
+                server.barrier.wait()
+            body = server.bodies[exch]
+            etag = f'"{exch}-{len(body)}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/csv")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", LAST_MODIFIED)
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def master_server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _MasterHandler)
+    server.daemon_threads = True
+    server.bodies = {exch: _master_csv(exch) for exch in lt.SCRIPMASTER_EXCHANGES}
+    server.requests = []
+    server.in_flight = server.max_in_flight = 0
+    server.barrier = None
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(
+        lt, "SCRIPMASTER_URL",
+        f"http://127.0.0.1:{server.server_address[1]}/getscripmastercsv?name={{exchange}}",
+    )
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_all_exchanges_download_in_parallel(master_server, tmp_path):
+    master_server.barrier = threading.Barrier(len(lt.SCRIPMASTER_EXCHANGES), timeout=5)
+
+    df, changed = lt._fetch_all_masters(tmp_path, None)
+
+    assert changed
+    assert master_server.max_in_flight == len(lt.SCRIPMASTER_EXCHANGES)
+    assert sorted(df["exchangename"].unique()) == sorted(lt.SCRIPMASTER_EXCHANGES)
+    assert len(df) == 20 * len(lt.SCRIPMASTER_EXCHANGES)
+    assert list(df.columns) == lt.MASTER_COLUMNS
+
+
+def test_download_keeps_master_and_validator_sidecar(master_server, tmp_path):
+    df, changed = lt._fetch_exchange_master("NSEFO", tmp_path)
+
+    assert changed
+    assert "If-None-Match" not in master_server.requests[0][1]
+    pd.testing.assert_frame_equal(pd.read_pickle(tmp_path / "scripmaster_NSEFO.pkl"), df)
+    meta = json.loads((tmp_path / "scripmaster_NSEFO.json").read_text())
+    assert meta == {
+        "etag": f'"NSEFO-{len(master_server.bodies["NSEFO"])}"',
+        "last_modified": LAST_MODIFIED,
+    }
+
+
+def test_not_modified_reuses_kept_master(master_server, tmp_path):
+    first, _ = lt._fetch_exchange_master("NSEFO", tmp_path)
+    progress = []
+
+    again, changed = lt._fetch_exchange_master("NSEFO", tmp_path, progress=progress.append)
+
+    assert not changed
+    headers = master_server.requests[-1][1]
+    assert headers["If-None-Match"] == f'"NSEFO-{len(master_server.bodies["NSEFO"])}"'
+    assert headers["If-Modified-Since"] == LAST_MODIFIED
+    assert progress == ["NSEFO scripmaster unchanged"]
+    pd.testing.assert_frame_equal(again, first)
+
+
+def test_not_modified_with_unreadable_copy_downloads_again(master_server, tmp_path):
+    first, _ = lt._fetch_exchange_master("NSEFO", tmp_path)
+    (tmp_path / "scripmaster_NSEFO.pkl").write_bytes(b"not a pickle")
+
+    again, changed = lt._fetch_exchange_master("NSEFO", tmp_path)
+
+    assert changed
+    assert "If-None-Match" not in master_server.requests[-1][1]
+    pd.testing.assert_frame_equal(again, first)
+
+
+def test_missing_column_is_reported_by_name(master_server, tmp_path):
+    master_server.bodies["NSEFO"] = _master_csv("NSEFO", drop=["MaxQtyPerOrder"])
+
+    with pytest.raises(ValueError, match="missing required column.*maxqtyperorder"):
+        lt._fetch_exchange_master("NSEFO", tmp_path)
+
+    assert not (tmp_path / "scripmaster_NSEFO.pkl").exists()
+    assert not (tmp_path / "scripmaster_NSEFO.json").exists()
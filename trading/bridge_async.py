@@ -0,0 +1,6 @@
+from utils.pyIB_APIS_async import AsyncIB_APIS, BridgeLoop
+import config
+
+# One event-loop thread and one async connection pool for all concurrent bridge fan-out
+abridge = AsyncIB_APIS(config.BRIDGE_URL, pool_size=config.BRIDGE_POOL_SIZE)
+bridge_loop = BridgeLoop()
@@ -0,0 +1,98 @@
+import threading
+import time
+
+
+class MarketDataCache:
+    """
+    Short-lived cache in front of the bridge's LTP/BID/ASK calls.
+
+    An entry is served while it belongs to the current cycle epoch and is younger
+    than `ttl` seconds. The quote feed bumps the epoch once per poll, so every token
+    is fetched at most once per cycle no matter how many strategies/legs use it.
+    """
+
+    def __init__(self, ttl=0.2):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._epoch = 0
+        self._entries = {}  # (field, symbol) -> (value, monotonic stamp, epoch, wall-clock time)
+        self._lock = threading.Lock()
+
+    def new_cycle(self):
+        """Start a new epoch; everything cached before it is treated as stale."""
+        with self._lock:
+            self._epoch += 1
+            return self._epoch
+
+    def get(self, field, symbol, fetch):
+        """
+        Return the cached value for (field, symbol), calling fetch() on a miss.
+        Failed fetches (None) are not cached so the next caller retries.
+        """
+        key = (field, symbol)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, fetched_at, epoch, _ = entry
+                if epoch == self._epoch and time.monotonic() - fetched_at < self.ttl:
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            epoch = self._epoch
+
+        value = fetch()
+        if value is not None:
+            with self._lock:
+                self._entries[key] = (value, time.monotonic(), epoch, time.time())
+        return value
+
+    def get_many(self, keys, fetch_many):
+        """
+        Batch form of get() over (field, symbol) keys. Cached keys are served directly;
+        the rest are passed together to fetch_many(missing) -> {key: value} in a single
+        call. Returns {key: (value, fetched_at)} with fetched_at as wall-clock time.
+        """
+        result = {}
+        missing = []
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[2] == self._epoch and now - entry[1] < self.ttl:
+                    self.hits += 1
+                    result[key] = (entry[0], entry[3])
+                else:
+                    self.misses += 1
+                    missing.append(key)
+            epoch = self._epoch
+
+        if missing:
+            fetched = fetch_many(missing)
+            stamp, wall = time.monotonic(), time.time()
+            with self._lock:
+                for key in missing:
+                    value = fetched.get(key)
+                    result[key] = (value, wall)
+                    if value is not None:
+                        self._entries[key] = (value, stamp, epoch, wall)
+        return result
+
+    def invalidate(self, symbol=None):
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[1] == symbol]:
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / total) if total else 0.0,
+                "entries": len(self._entries),
+                "epoch": self._epoch,
+            }
@@ -0,0 +1,284 @@
+import asyncio
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+class OrderStatus(namedtuple(
+    "OrderStatus",
+    ["request_id", "filled_qty", "avg_price", "is_open", "is_cancelled", "is_rejected", "is_completed", "updated_at"],
+)):
+    __slots__ = ()
+
+    @property
+    def done(self):
+        """The order can no longer fill (completed, cancelled or rejected)."""
+        return bool(self.is_completed or self.is_cancelled or self.is_rejected)
+
+
+# Flags fetched once an order is no longer open, to tell how it ended
+_END_FLAGS = (
+    ("is_cancelled", "IB_IsOrderCancelled"),
+    ("is_rejected", "IB_IsOrderRejected"),
+    ("is_completed", "IB_IsOrderCompleted"),
+)
+
+
+def filled_at_least(qty):
+    """Predicate: at least qty filled, or the order is done."""
+    return lambda s: s.filled_qty >= qty or s.done
+
+
+def is_done(s):
+    return s.done
+
+
+class OrderTracker(threading.Thread):
+    """
+    Single poller for the status of every open order request.
+
+    Each sweep fetches the fill qty of every tracked request id concurrently on
+    the bridge loop, publishes one OrderStatus per id and wakes whoever is
+    waiting on them. The other fields are only asked for when they can have
+    changed: the average price when the fill moved, IsOrderOpen every
+    open_every sweeps, and the cancelled / rejected / completed flags once an
+    order is no longer open. An order that fills the qty it was tracked with is
+    complete without asking.
+    Order code blocks on wait() / wait_async() / watch() instead of polling
+    IB_OrderFilledQty itself, so N concurrent orders cost one sweep per
+    interval rather than N polling loops. Orders that are done drop out of the
+    sweep; their last status stays readable until forget().
+    """
+
+    def __init__(self, api, loop, interval=0.05, concurrency=16, open_every=4):
+        super().__init__(name="OrderTracker")
+        self.daemon = True
+        self.api = api
+        self.loop = loop
+        self.interval = interval
+        self.concurrency = concurrency
+        self.open_every = max(1, open_every)
+        self._open = set()
+        self._qty = {}        # request_id -> order qty, when known
+        self._status = {}
+        self._watchers = []   # (request_id, predicate, Future)
+        self._cond = threading.Condition()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._launched = False
+        self.sweeps = 0
+        self.last_sweep_ms = 0.0
+
+    def ensure_started(self):
+        with self._cond:
+            if self._launched:
+                return
+            self._launched = True
+        self.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake.set()
+
+    def track(self, request_id, qty=None):
+        """Start following an order (of qty, if known); the next sweep runs right away."""
+        if request_id in (None, False, ""):
+            return
+        with self._cond:
+            if request_id not in self._status or not self._status[request_id].done:
+                self._open.add(request_id)
+                if qty:
+                    self._qty[request_id] = qty
+        self.ensure_started()
+        self._wake.set()
+
+    def forget(self, request_ids):
+        """Stop following these orders and drop their status; their watch() futures are cancelled."""
+        request_ids = set(request_ids)
+        with self._cond:
+            for rid in request_ids:
+                self._open.discard(rid)
+                self._status.pop(rid, None)
+                self._qty.pop(rid, None)
+            dropped = [fut for rid, _, fut in self._watchers if rid in request_ids]
+            self._watchers = [w for w in self._watchers if w[0] not in request_ids]
+            self._cond.notify_all()
+        for fut in dropped:
+            fut.cancel()
+
+    def status(self, request_id):
+        """Latest OrderStatus, or None before the first sweep has seen it."""
+        return self._status.get(request_id)
+
+    def open_orders(self):
+        with self._cond:
+            return set(self._open)
+
+    def interrupt(self):
+        """Wake every wait() so callers can re-check their own cancel flags."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def wait(self, request_id, until=is_done, timeout=None, cancel=None):
+        """
+        Block until until(status) holds, timeout passes or cancel (an Event) is set.
+        Returns the latest OrderStatus (None if never seen).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                status = self._status.get(request_id)
+                if status is not None and until(status):
+                    return status
+                if cancel is not None and cancel.is_set():
+                    return status
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return status
+                self._cond.wait(remaining)
+
+    def watch(self, request_id, until=is_done):
+        """concurrent.futures.Future resolved with the first OrderStatus satisfying until."""
+        fut = Future()
+        with self._cond:
+            status = self._status.get(request_id)
+            if status is not None and until(status):
+                fut.set_result(status)
+                return fut
+            self._watchers.append((request_id, until, fut))
+        return fut
+
+    async def wait_async(self, request_id, until=is_done, timeout=None):
+        """wait() for coroutines on the bridge loop; never blocks the loop."""
+        fut = self.watch(request_id, until)
+        try:
+            # asyncio.wait, not wait_for: a watcher cancelled by forget() just ends the wait
+            await asyncio.wait({asyncio.wrap_future(fut)}, timeout=timeout)
+        finally:
+            fut.cancel()
+        if fut.done() and not fut.cancelled():
+            return fut.result()
+        return self._status.get(request_id)
+
+    async def _gather(self, calls):
+        """Run [(key, bridge method, request_id)] concurrently -> {key: value or None}."""
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def call(name, rid):
+            async with limit:
+                return await getattr(self.api, name)(rid)
+
+        results = await asyncio.gather(*(call(name, rid) for _, name, rid in calls), return_exceptions=True)
+        return {key: (None if isinstance(value, Exception) else value) for (key, _, _), value in zip(calls, results)}
+
+    async def _fetch(self, ids, prev, qtys, ask_open):
+        # Round 1: fill qty for everyone, IsOrderOpen on every open_every-th sweep
+        calls = [((rid, "filled_qty"), "IB_OrderFilledQty", rid) for rid in ids]
+        if ask_open:
+            calls += [((rid, "is_open"), "IB_IsOrderOpen", rid) for rid in ids]
+        raw = await self._gather(calls)
+
+        # Round 2, only where something moved: avg price on a new fill; once an order
+        # closes, its end flags plus a re-read of the fill (it may have filled between
+        # the two round-1 calls)
+        calls = []
+        for rid in ids:
+            old = prev.get(rid)
+            filled = raw.get((rid, "filled_qty"))
+            fully_filled = filled is not None and rid in qtys and filled >= qtys[rid]
+            if raw.get((rid, "is_open")) is False and not fully_filled:
+                calls += [((rid, field), name, rid) for field, name in _END_FLAGS]
+                calls += [((rid, "filled_qty"), "IB_OrderFilledQty", rid), ((rid, "avg_price"), "IB_OrderAvgPrice", rid)]
+            elif filled and (old is None or filled != old.filled_qty):
+                calls.append(((rid, "avg_price"), "IB_OrderAvgPrice", rid))
+        if calls:
+            raw.update(await self._gather(calls))
+        # An order that filled the qty it was tracked with is complete; no need to ask
+        for rid, qty in qtys.items():
+            filled = raw.get((rid, "filled_qty"))
+            if filled is not None and filled >= qty:
+                raw[(rid, "is_open")] = False
+                raw[(rid, "is_completed")] = True
+        return raw
+
+    def sweep_once(self):
+        with self._cond:
+            ids = list(self._open)
+            prev = {rid: self._status.get(rid) for rid in ids}
+            qtys = {rid: self._qty[rid] for rid in ids if rid in self._qty}
+        if not ids:
+            return {}
+        start = time.monotonic()
+        ask_open = self.sweeps % self.open_every == 0
+        try:
+            raw = self.loop.run(self._fetch(ids, prev, qtys, ask_open))
+        except Exception as e:
+            print(f"[OrderTracker] Error polling {len(ids)} orders: {e}")
+            return {}
+        now = time.time()
+        fired = []
+        statuses = {}
+        with self._cond:
+            for rid in ids:
+                old = prev.get(rid)
+
+                def pick(field, cast, default):
+                    # Not asked, or the call failed: keep the last known value
+                    value = raw.get((rid, field))
+                    if value is not None:
+                        return cast(value)
+                    return getattr(old, field) if old is not None else default
+
+                status = OrderStatus(
+                    request_id=rid,
+                    filled_qty=pick("filled_qty", int, 0),
+                    avg_price=pick("avg_price", float, 0.0),
+                    is_open=pick("is_open", bool, None),
+                    is_cancelled=pick("is_cancelled", bool, None),
+                    is_rejected=pick("is_rejected", bool, None),
+                    is_completed=pick("is_completed", bool, None),
+                    updated_at=now,
+                )
+                if rid not in self._open and rid not in self._status:
+                    continue  # forgotten while we were polling
+                self._status[rid] = statuses[rid] = status
+                if status.done:
+                    self._open.discard(rid)
+                    self._qty.pop(rid, None)
+            pending = []
+            for rid, until, fut in self._watchers:
+                if fut.done():
+                    continue
+                status = self._status.get(rid)
+                if status is not None and until(status):
+                    fired.append((fut, status))
+                else:
+                    pending.append((rid, until, fut))
+            self._watchers = pending
+            self.sweeps += 1
+            self.last_sweep_ms = (time.monotonic() - start) * 1000.0
+            self._cond.notify_all()
+        for fut, status in fired:
+            if fut.set_running_or_notify_cancel():
+                fut.set_result(status)
+        return statuses
+
+    def stats(self):
+        with self._cond:
+            return {
+                "open_orders": len(self._open),
+                "known_orders": len(self._status),
+                "watchers": len(self._watchers),
+                "sweeps": self.sweeps,
+                "last_sweep_ms": self.last_sweep_ms,
+            }
+
+    def run(self):
+        while not self._stop_event.is_set():
+            start = time.monotonic()
+            self._wake.clear()
+            if self.sweep_once() or self.open_orders():
+                self._stop_event.wait(max(0.0, self.interval - (time.monotonic() - start)))
+            else:
+                # Nothing open: sleep until track() hands us something
+                self._wake.wait()
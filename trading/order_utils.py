@@ -1,20 +1,20 @@
-from utils.load_tokken import load_scripmaster, get_exchange_from_scripmaster
+from utils.load_tokken import get_instrument
+from trading.xts_market import get_quotes
 import time
 
 def get_scrip_row(token):
     """
-    Returns the row from the scripmaster DataFrame for the given token.
-    Uses your dynamic, auto-cached loader.
+    Returns the Instrument record (exchange, lot size, circuit limits, max qty)
+    for the given token from the scripmaster index.
     """
-    df = load_scripmaster()
-    s = df[df["scripname"].str.strip().str.upper() == token.strip().upper()]
-    if s.empty:
+    inst = get_instrument(token)
+    if inst is None:
         raise ValueError(f"Scrip '{token}' not found in scripmaster!")
-    return s.iloc[0]
+    return inst
 
 def check_maxqty(token, order_qty):
     row = get_scrip_row(token)
-    max_qty = int(row["maxqtyperorder"])
+    max_qty = int(row.max_qty)
     if order_qty > max_qty:
         raise ValueError(f"Order quantity {order_qty} exceeds max allowed per order {max_qty} for {token}")
 
@@ -49,19 +49,16 @@ def get_retry_prices(mode, cmp, lcp, ucp):
 def clamp_price(price, lcp, ucp):
     return min(max(price, lcp), ucp)
 
-def get_best_quote(token, mode, bridge):
+def get_best_quote(token, mode):
     """
-    Fetches best ASK (for buy) or BID (for sell) using your bridge API.
+    Fetches best ASK (for buy) or BID (for sell) through the shared quote cache.
     Returns None if not available.
     """
-    exchange = get_exchange_from_scripmaster(token)
     try:
-        if mode == 'BUY':
-            px = bridge.IB_ASK(exchange, token)
-        else:
-            px = bridge.IB_BID(exchange, token)
+        quote = get_quotes([token], fields=("ASK",) if mode == 'BUY' else ("BID",))[token]
+        px = quote.ask if mode == 'BUY' else quote.bid
         if px is not None and px > 0:
             return px
         return None
     except Exception:
-        return None
\ No newline at end of file
+        return None
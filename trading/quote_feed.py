@@ -0,0 +1,108 @@
+import threading
+import time
+
+
+class QuoteFeed(threading.Thread):
+    """
+    Background poller for every watched token.
+
+    Each cycle it pulls a fresh LTP for the union of watched tokens, publishes an
+    immutable {token: ltp} snapshot and hands it to every registered listener.
+    Consumers read the latest snapshot with get_ltp()/snapshot(), which never
+    touch the network.
+    """
+
+    def __init__(self, fetch_ltp, begin_cycle=None, interval=0.1, fetch_many=None):
+        super().__init__(name="QuoteFeed")
+        self.daemon = True
+        self.fetch_ltp = fetch_ltp
+        self.fetch_many = fetch_many  # optional tokens -> {token: ltp} in one round trip
+        self.begin_cycle = begin_cycle
+        self.interval = interval
+        self._tokens = set()
+        self._listeners = []
+        self._snapshot = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._launched = False
+
+    def ensure_started(self):
+        with self._lock:
+            if self._launched:
+                return
+            self._launched = True
+        self.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def watch(self, tokens):
+        with self._lock:
+            self._tokens.update(t.strip().upper() for t in tokens if t)
+
+    def unwatch(self, tokens):
+        with self._lock:
+            for t in tokens:
+                if t:
+                    self._tokens.discard(t.strip().upper())
+
+    def watched(self):
+        with self._lock:
+            return set(self._tokens)
+
+    def add_listener(self, callback):
+        """callback(snapshot) is invoked on the feed thread after every poll."""
+        with self._lock:
+            if callback not in self._listeners:
+                self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def get_ltp(self, token):
+        """Latest polled LTP for token, or None if it has not been polled yet."""
+        return self._snapshot.get(token.strip().upper())
+
+    def snapshot(self):
+        return self._snapshot
+
+    def poll_once(self):
+        with self._lock:
+            tokens = list(self._tokens)
+            listeners = list(self._listeners)
+        if self.begin_cycle is not None:
+            self.begin_cycle()
+
+        snapshot = {}
+        if self.fetch_many is not None and tokens:
+            try:
+                fetched = self.fetch_many(tokens)
+                snapshot = {t: float(fetched.get(t) or 0.0) for t in tokens}
+            except Exception as e:
+                print(f"[QuoteFeed] Error polling {len(tokens)} tokens: {e}")
+                snapshot = {t: 0.0 for t in tokens}
+        else:
+            for token in tokens:
+                try:
+                    snapshot[token] = float(self.fetch_ltp(token) or 0.0)
+                except Exception as e:
+                    print(f"[QuoteFeed] Error polling {token}: {e}")
+                    snapshot[token] = 0.0
+
+        # Swap in a new dict instead of mutating, so readers never see a partial cycle
+        self._snapshot = snapshot
+        for callback in listeners:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"[QuoteFeed] Listener error: {e}")
+        return snapshot
+
+    def run(self):
+        while not self._stop_event.is_set():
+            start = time.monotonic()
+            self.poll_once()
+            elapsed = time.monotonic() - start
+            self._stop_event.wait(max(0.0, self.interval - elapsed))
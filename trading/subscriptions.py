@@ -0,0 +1,97 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SubscriptionRegistry:
+    """
+    Reference-counted feed subscriptions for the tokens used by active strategies.
+
+    The first acquire() of a token subscribes it on the bridge and pre-warms it with
+    one LTP call (the bridge's first LTP for a symbol can take seconds) on a worker
+    pool, so several tokens warm up concurrently. Only warmed tokens are handed to
+    the quote feed, so a cold symbol never stalls a poll cycle. The last release()
+    stops the feed polling it. The bridge subscription itself is kept, since the
+    bridge treats subscribing as a one-time activity per symbol.
+    """
+
+    def __init__(self, subscribe, warm, feed=None, max_workers=8):
+        self.subscribe = subscribe
+        self.warm = warm
+        self.feed = feed
+        self._counts = {}
+        self._subscribed = set()
+        self._pending = {}  # token -> Future of an in-flight subscribe/warm
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="Subscribe")
+
+    @staticmethod
+    def _norm(token):
+        return token.strip().upper()
+
+    def acquire(self, tokens):
+        """
+        Add one reference to each token. Returns {token: Future} for tokens that
+        still need a subscribe/warm-up; the futures resolve to the token once it is
+        live, or to None if the bridge subscribe failed (the next acquire retries).
+        """
+        futures = {}
+        to_watch = []
+        with self._lock:
+            for token in {self._norm(t) for t in tokens if t}:
+                self._counts[token] = self._counts.get(token, 0) + 1
+                if token in self._pending:
+                    futures[token] = self._pending[token]
+                    continue
+                if token not in self._subscribed:
+                    # First use, or an earlier subscribe failed: (re)try it
+                    fut = self._pool.submit(self._subscribe_and_warm, token)
+                    self._pending[token] = fut
+                    futures[token] = fut
+                elif self._counts[token] == 1:
+                    to_watch.append(token)
+        if self.feed is not None and to_watch:
+            self.feed.watch(to_watch)
+        return futures
+
+    def release(self, tokens):
+        to_unwatch = []
+        with self._lock:
+            for token in {self._norm(t) for t in tokens if t}:
+                count = self._counts.get(token, 0) - 1
+                if count > 0:
+                    self._counts[token] = count
+                    continue
+                self._counts.pop(token, None)
+                to_unwatch.append(token)
+        if self.feed is not None and to_unwatch:
+            self.feed.unwatch(to_unwatch)
+
+    def _subscribe_and_warm(self, token):
+        try:
+            self.subscribe(token)
+        except Exception as e:
+            print(f"[Subscriptions] Error subscribing {token}: {e}")
+            with self._lock:
+                self._pending.pop(token, None)
+            return None
+        try:
+            self.warm(token)
+        except Exception as e:
+            # Subscribed; the feed's first poll just pays the cold LTP instead
+            print(f"[Subscriptions] Error warming {token}: {e}")
+        with self._lock:
+            self._pending.pop(token, None)
+            self._subscribed.add(token)
+            # Released while warming up: leave it subscribed but don't poll it
+            still_wanted = self._counts.get(token, 0) > 0
+        if still_wanted and self.feed is not None:
+            self.feed.watch([token])
+        return token
+
+    def refcount(self, token):
+        with self._lock:
+            return self._counts.get(self._norm(token), 0)
+
+    def active_tokens(self):
+        with self._lock:
+            return set(self._counts)
@@ -1,8 +1,17 @@
 from utils.load_tokken import get_exchange_from_scripmaster
 from utils.pyIB_APIS import IB_APIS
+from trading.market_cache import MarketDataCache
+from trading.quote_feed import QuoteFeed
+from trading.subscriptions import SubscriptionRegistry
+from trading.bridge_async import abridge, bridge_loop
+from collections import namedtuple
+import asyncio
+import config
 import random
 
-bridge = IB_APIS("http://127.0.0.1:21000")
+bridge = IB_APIS(config.BRIDGE_URL, pool_size=config.BRIDGE_POOL_SIZE)
+quote_cache = MarketDataCache(ttl=config.QUOTE_CACHE_TTL_MS / 1000.0)
+
 def subscribe_one_token_per_exchange(df):
     """
     At startup, subscribe one random NSEFO and one random BSEFO token from scripmaster.
@@ -20,11 +29,97 @@ def subscribe_one_token_per_exchange(df):
             except Exception as e:
                 print(f"❌ Error subscribing broker's Feed")
 
-def get_ltp(symbol):
-    exchange = get_exchange_from_scripmaster(symbol)
+def _cached_quote(field, symbol, api_call):
+    # The exchange lookup is only needed on a cache miss
+    return quote_cache.get(field, symbol, lambda: api_call(get_exchange_from_scripmaster(symbol), symbol))
 
+def get_ltp(symbol):
     try:
-        return float(bridge.IB_LTP(exchange, symbol))
+        return float(_cached_quote("LTP", symbol, bridge.IB_LTP))
     except Exception as e:
         print(f"Error fetching LTP: {e}")
-        return 0.0
\ No newline at end of file
+        return 0.0
+
+def get_bid(symbol):
+    try:
+        return float(_cached_quote("BID", symbol, bridge.IB_BID))
+    except Exception as e:
+        print(f"Error fetching BID: {e}")
+        return 0.0
+
+def get_ask(symbol):
+    try:
+        return float(_cached_quote("ASK", symbol, bridge.IB_ASK))
+    except Exception as e:
+        print(f"Error fetching ASK: {e}")
+        return 0.0
+
+Quote = namedtuple("Quote", ["ltp", "bid", "ask", "fetched_at"])
+
+_QUOTE_FIELDS = ("LTP", "BID", "ASK")
+
+async def _gather_quotes(pending):
+    # Semaphore bounds how many bridge calls are in flight at once
+    limit = asyncio.Semaphore(config.QUOTE_FETCH_CONCURRENCY)
+
+    async def fetch(field, symbol, exchange):
+        async with limit:
+            return await getattr(abridge, f"IB_{field}")(exchange, symbol)
+
+    results = await asyncio.gather(*(fetch(*p) for p in pending), return_exceptions=True)
+    return {
+        (field, symbol): (None if isinstance(value, Exception) else value)
+        for (field, symbol, _), value in zip(pending, results)
+    }
+
+def _fetch_many(keys):
+    # All cache misses go out concurrently on the bridge loop: one round trip, not N
+    exchanges = {symbol: get_exchange_from_scripmaster(symbol) for _, symbol in keys}
+    try:
+        return bridge_loop.run(_gather_quotes([(f, s, exchanges[s]) for f, s in keys]))
+    except Exception as e:
+        print(f"Error fetching quotes: {e}")
+        return {}
+
+def get_quotes(symbols, fields=_QUOTE_FIELDS):
+    """
+    Quote(ltp, bid, ask, fetched_at) for many symbols at once, as {symbol: Quote}.
+    Cached values are reused and every missing (field, symbol) is fetched in
+    parallel. Fields not requested or not available are 0.0; fetched_at is the
+    wall-clock time of the oldest value in the record.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    raw = quote_cache.get_many([(f, s) for s in symbols for f in fields], _fetch_many)
+    quotes = {}
+    for symbol in symbols:
+        values = {f: raw[(f, symbol)] for f in fields}
+        quotes[symbol] = Quote(
+            ltp=float(values["LTP"][0] or 0.0) if "LTP" in values else 0.0,
+            bid=float(values["BID"][0] or 0.0) if "BID" in values else 0.0,
+            ask=float(values["ASK"][0] or 0.0) if "ASK" in values else 0.0,
+            fetched_at=min(v[1] for v in values.values()),
+        )
+    return quotes
+
+def get_ltps(symbols):
+    """
+    LTP for many symbols at once as {symbol: float}; failed lookups are 0.0.
+    """
+    return {symbol: q.ltp for symbol, q in get_quotes(symbols, fields=("LTP",)).items()}
+
+def new_quote_cycle():
+    """Called once per feed poll so each token is fetched once per cycle."""
+    return quote_cache.new_cycle()
+
+def get_cache_stats():
+    return quote_cache.stats()
+
+# Background poller for every token used by live strategies. Each poll starts a
+# new cache epoch, so get_ltp() callers between polls are served from the cache.
+quote_feed = QuoteFeed(get_ltp, new_quote_cycle, interval=config.QUOTE_FEED_INTERVAL_MS / 1000.0, fetch_many=get_ltps)
+
+def _subscribe_token(symbol):
+    bridge.IB_Subscribe(get_exchange_from_scripmaster(symbol), symbol, "MotilalXTS")
+
+# Ref-counted IB_Subscribe + warm-up for strategy tokens; feeds quote_feed's watch list
+subscriptions = SubscriptionRegistry(_subscribe_token, get_ltp, quote_feed)
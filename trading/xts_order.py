@@ -1,5 +1,17 @@
 from utils.pyIB_APIS import IB_APIS
-bridge = IB_APIS("http://127.0.0.1:21000") # Set your bridge URL
+from trading.bridge_async import abridge, bridge_loop
+from trading.order_tracker import OrderTracker
+import config
+# Shares the keep-alive session (and its connection pool) with trading.xts_market.bridge
+bridge = IB_APIS(config.BRIDGE_URL, pool_size=config.BRIDGE_POOL_SIZE)
+
+# Fill / status polling for every open order request, in one batched sweep
+order_tracker = OrderTracker(
+    abridge, bridge_loop,
+    interval=config.ORDER_TRACKER_INTERVAL_MS / 1000.0,
+    concurrency=config.ORDER_TRACKER_CONCURRENCY,
+    open_every=config.ORDER_TRACKER_OPEN_EVERY,
+)
 
 def place_order(unique_id, strategy_tag, user_id, exchange, symbol, transaction_type, quantity):
     try:
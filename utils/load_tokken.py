@@ -1,6 +1,11 @@
+import json
+import threading
 import requests
 import pandas as pd
-from io import StringIO
+import config
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
 
 # Directory in the user’s home where we store cached scripmaster files
@@ -16,109 +21,378 @@ UNDERLYING_MAP = {
     "BANKEX":    "BKX",
 }
 
-_MASTER_DF = None
+# Compact per-contract record kept in the instrument index
+Instrument = namedtuple(
+    "Instrument",
+    ["scripname", "exchange", "lot_size", "lower_circuit", "upper_circuit", "max_qty"],
+)
 
-def load_scripmaster() -> pd.DataFrame:
+# Everything derived from one master, swapped in as a single reference so readers
+# (order workers, hedge legs, the GUI) never see a half-built table:
+#   df          - compact master DataFrame
+#   date        - day it was loaded for
+#   index       - normalized scripname -> Instrument
+#   chain       - underlying -> ([sorted expiries], {expiry: {"CE"/"PE": [sorted strikes]}})
+#   prefix_lots - memoized prefix-scan results of get_lot_size for this master
+MasterSnapshot = namedtuple("MasterSnapshot", ["df", "date", "index", "chain", "prefix_lots"])
+
+_MASTER = None  # current MasterSnapshot; read without locking, replaced whole
+_LOAD_LOCK = threading.Lock()  # one load/refresh at a time; concurrent callers wait for it
+_MASTER_READY = Future()  # resolved with the master once the first load succeeds
+_REFRESH_STOP = threading.Event()
+_REFRESH_THREAD = None
+
+def _to_int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _build_index(df) -> dict:
+    """
+    One pass over the master: normalized scripname -> Instrument. The first row
+    wins for duplicate names, same as the old `.iloc[0]` lookups.
+    """
+    index = {}
+    names = df["scripname"].astype(str).str.strip().str.upper()
+    for name, exch, lot, lcp, ucp, max_qty in zip(
+        names,
+        df["exchangename"],
+        df["marketlot"],
+        df["lowerexchcircuitprice"],
+        df["upperexchcircuitprice"],
+        df["maxqtyperorder"],
+    ):
+        if name in index:
+            continue
+        index[name] = Instrument(
+            scripname=name,
+            exchange="NFO" if exch == "NSEFO" else "BFO",
+            lot_size=_to_int(lot),
+            lower_circuit=_to_float(lcp),
+            upper_circuit=_to_float(ucp),
+            max_qty=_to_int(max_qty),
+        )
+    return index
+
+def _expiry_sort_key(ds):
+    for fmt in ("%d-%b-%Y", "%d-%b-%y"):
+        try:
+            return datetime.strptime(ds, fmt)
+        except ValueError:
+            continue
+    try:
+        return pd.Timestamp(ds).to_pydatetime()
+    except Exception:
+        return datetime.max
+
+def _strike_sort_key(strike):
+    try:
+        return float(strike)
+    except ValueError:
+        return float("inf")
+
+def _build_chain(names) -> dict:
+    """
+    Option-chain tree over "CODE EXPIRY TYPE STRIKE" scripnames:
+    underlying -> expiry -> option type -> strikes, with expiries and strikes
+    parsed and sorted once here instead of on every combo-box change.
+    """
+    tree = {}
+    for name in names:
+        parts = name.split()
+        if len(parts) < 4:
+            continue
+        code, expiry, opt_type, strike = parts[0], parts[1], parts[2], parts[3]
+        tree.setdefault(code, {}).setdefault(expiry, {}).setdefault(opt_type, set()).add(strike)
+
+    chain = {}
+    for code, expiries in tree.items():
+        strikes_by_expiry = {
+            expiry: {t: sorted(strikes, key=_strike_sort_key) for t, strikes in types.items()}
+            for expiry, types in expiries.items()
+        }
+        chain[code] = (sorted(expiries, key=_expiry_sort_key), strikes_by_expiry)
+    return chain
+
+def _set_master(df, date):
+    """Build the index and chain for df, then publish them in one assignment."""
+    global _MASTER
+    index = _build_index(df)
+    _MASTER = MasterSnapshot(df=df, date=date, index=index, chain=_build_chain(index), prefix_lots={})
+    if not _MASTER_READY.done():
+        _MASTER_READY.set_result(df)
+    return df
+
+def _current_master() -> MasterSnapshot:
+    master = _MASTER
+    if master is None:
+        load_scripmaster()
+        master = _MASTER
+    return master
+
+# Only the columns the app reads are kept in the daily binary cache
+MASTER_COLUMNS = [
+    "scripname",
+    "exchangename",
+    "marketlot",
+    "lowerexchcircuitprice",
+    "upperexchcircuitprice",
+    "maxqtyperorder",
+]
+
+def _compact_master(df) -> pd.DataFrame:
+    """
+    Reduce a raw master to MASTER_COLUMNS with compact dtypes: exchange as a
+    category, lot/max qty as nullable ints and circuit limits as floats.
+    Raises ValueError naming any MASTER_COLUMNS the master lacks.
+    """
+    df.columns = [c.strip().lower() for c in df.columns]
+    missing = [c for c in MASTER_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Scripmaster is missing required column(s): {', '.join(missing)}")
+    df = df[MASTER_COLUMNS].copy()
+    df["scripname"] = df["scripname"].astype(str).str.strip().str.upper()
+    df["exchangename"] = df["exchangename"].astype("category")
+    for col in ("marketlot", "maxqtyperorder"):
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
+    for col in ("lowerexchcircuitprice", "upperexchcircuitprice"):
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    return df.reset_index(drop=True)
+
+# Use ./cache in the current directory
+MASTER_CACHE_DIR = Path("./cache")
+SCRIPMASTER_URL = "https://openapi.motilaloswal.com/getscripmastercsv?name={exchange}"
+SCRIPMASTER_EXCHANGES = ("NSEFO", "BSEFO")
+
+def _fetch_exchange_master(exch, cache_dir, progress=None, session=None):
+    """
+    Download one exchange's master, streaming the response straight into the CSV
+    parser. The last download is kept as cache_dir/scripmaster_{exch}.pkl with its
+    ETag / Last-Modified in a .json sidecar; those are sent back as If-None-Match /
+    If-Modified-Since, and on 304 Not Modified the kept copy is reused.
+    Returns (DataFrame, changed) where changed is False for a 304.
+    """
+    progress = progress or (lambda message: None)
+    data_path = Path(cache_dir) / f"scripmaster_{exch}.pkl"
+    meta_path = Path(cache_dir) / f"scripmaster_{exch}.json"
+
+    headers = {}
+    if data_path.exists() and meta_path.exists():
+        try:
+            meta = json.loads(meta_path.read_text())
+        except Exception:
+            meta = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    url = SCRIPMASTER_URL.format(exchange=exch)
+    with (session or requests).get(url, headers=headers, stream=True, timeout=30) as resp:
+        if resp.status_code == 304:
+            try:
+                progress(f"{exch} scripmaster unchanged")
+                return pd.read_pickle(data_path), False
+            except Exception as e:
+                # Kept copy is gone/corrupt: drop the validators and fetch in full
+                print(f"[Scripmaster] Unreadable {data_path}, re-downloading: {e}")
+                meta_path.unlink(missing_ok=True)
+                return _fetch_exchange_master(exch, cache_dir, progress, session)
+        resp.raise_for_status()
+        progress(f"Downloading {exch} scripmaster...")
+        resp.raw.decode_content = True  # let urllib3 undo gzip while streaming
+        # Most likely the first row is the header
+        df = _compact_master(pd.read_csv(resp.raw, dtype=str))
+        etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+
+    df.to_pickle(data_path)
+    if etag or last_modified:
+        meta_path.write_text(json.dumps({"etag": etag, "last_modified": last_modified}))
+    else:
+        meta_path.unlink(missing_ok=True)
+    return df, True
+
+def _fetch_all_masters(cache_dir, progress):
+    """Fetch every exchange in parallel. Returns (combined compact master, changed)."""
+    # Each exchange is conditional on its last download
+    with ThreadPoolExecutor(max_workers=len(SCRIPMASTER_EXCHANGES), thread_name_prefix="ScripmasterDownload") as pool:
+        results = list(pool.map(lambda exch: _fetch_exchange_master(exch, cache_dir, progress), SCRIPMASTER_EXCHANGES))
+    frames = [df for df, _ in results]
+    return _compact_master(pd.concat(frames, ignore_index=True)), any(changed for _, changed in results)
+
+def load_scripmaster(progress=None) -> pd.DataFrame:
     """
     Load (or download) today’s scripmaster files from Motilal Oswal and cache in ./cache.
     Returns a DataFrame with both NSEFO and BSEFO data concatenated.
+    The daily cache is a compact pickle (see MASTER_COLUMNS), and the parsed master
+    and its instrument index are kept in memory for the day. A new day's master is
+    only downloaded if the server reports it changed (see _fetch_exchange_master).
+    progress(message), if given, is called at each loading stage.
     """
-    global _MASTER_DF
+    today = pd.Timestamp.now().strftime("%Y-%m-%d")
+    master = _MASTER
+    if master is not None and master.date == today:
+        return master.df
+    with _LOAD_LOCK:
+        master = _MASTER
+        if master is not None and master.date == today:
+            return master.df
+        return _load_scripmaster(today, progress or (lambda message: None))
 
-    # Use ./cache in the current directory
-    CACHE_DIR = Path("./cache")
+def _load_scripmaster(today, progress) -> pd.DataFrame:
+    CACHE_DIR = MASTER_CACHE_DIR
     CACHE_DIR.mkdir(exist_ok=True)
-    today = pd.Timestamp.now().strftime("%Y-%m-%d")
-    cache_path = CACHE_DIR / f"scripmaster_{today}.csv"
+    cache_path = CACHE_DIR / f"scripmaster_{today}.pkl"
+    legacy_csv_path = CACHE_DIR / f"scripmaster_{today}.csv"
 
     if cache_path.exists():
-        _MASTER_DF = pd.read_csv(cache_path, dtype=str)
-        return _MASTER_DF
+        progress("Reading scripmaster cache...")
+        try:
+            return _set_master(pd.read_pickle(cache_path), today)
+        except Exception as e:
+            print(f"[Scripmaster] Unreadable cache {cache_path}, re-downloading: {e}")
 
-    frames = []
-    for exch in ["NSEFO", "BSEFO"]:
-        url = f"https://openapi.motilaloswal.com/getscripmastercsv?name={exch}"
-        resp = requests.get(url, timeout=30)
-        resp.raise_for_status()
-        # Most likely the first row is the header
-        df = pd.read_csv(StringIO(resp.text), dtype=str)
-        frames.append(df)
-    
-    master_df = pd.concat(frames, ignore_index=True)
-    # Standardize columns
-    master_df.columns = [c.strip().lower() for c in master_df.columns]
-    if "scripname" in master_df.columns:
-        master_df["scripname"] = master_df["scripname"].str.strip().str.upper()
+    if legacy_csv_path.exists():
+        # Written by an older version today: convert once instead of re-downloading
+        progress("Converting scripmaster cache...")
+        master_df = _compact_master(pd.read_csv(legacy_csv_path, dtype=str))
+        master_df.to_pickle(cache_path)
+        return _set_master(master_df, today)
+
+    progress("Downloading scripmaster...")
+    master_df, _ = _fetch_all_masters(CACHE_DIR, progress)
+
+    progress("Building instrument index...")
     # Save to disk
-    master_df.to_csv(cache_path, index=False)
+    master_df.to_pickle(cache_path)
+    return _set_master(master_df, today)
 
-    _MASTER_DF = master_df.copy()
-    return _MASTER_DF
+def load_scripmaster_async(progress=None) -> Future:
+    """
+    Run load_scripmaster() on a background thread. Returns a Future for this
+    attempt; master_ready() resolves once any attempt succeeds.
+    """
+    future = Future()
+
+    def _run():
+        try:
+            future.set_result(load_scripmaster(progress))
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=_run, name="ScripmasterLoader", daemon=True).start()
+    return future
+
+def refresh_scripmaster(progress=None) -> bool:
+    """
+    Re-fetch the masters intraday (circuit bands move during the session) and, if
+    either exchange changed, build a new index/chain on this thread and swap it in.
+    Readers keep using the previous snapshot until the swap and never wait on it.
+    Returns True if a new master was published.
+    """
+    progress = progress or (lambda message: None)
+    with _LOAD_LOCK:
+        today = pd.Timestamp.now().strftime("%Y-%m-%d")
+        MASTER_CACHE_DIR.mkdir(exist_ok=True)
+        master_df, changed = _fetch_all_masters(MASTER_CACHE_DIR, progress)
+        master = _MASTER
+        if not changed and master is not None and master.date == today:
+            return False
+        master_df.to_pickle(MASTER_CACHE_DIR / f"scripmaster_{today}.pkl")
+        _set_master(master_df, today)
+        progress("Scripmaster refreshed")
+        return True
+
+def start_scripmaster_refresh(interval=None):
+    """
+    Run refresh_scripmaster() every `interval` seconds (default
+    config.SCRIPMASTER_REFRESH_SEC) on a daemon thread. Safe to call twice.
+    """
+    global _REFRESH_THREAD
+    interval = interval or config.SCRIPMASTER_REFRESH_SEC
+    if _REFRESH_THREAD is not None and _REFRESH_THREAD.is_alive():
+        return _REFRESH_THREAD
+    _REFRESH_STOP.clear()
+
+    def _run():
+        while not _REFRESH_STOP.wait(interval):
+            try:
+                refresh_scripmaster()
+            except Exception as e:
+                print(f"[Scripmaster] Intraday refresh failed, keeping current master: {e}")
+
+    _REFRESH_THREAD = threading.Thread(target=_run, name="ScripmasterRefresh", daemon=True)
+    _REFRESH_THREAD.start()
+    return _REFRESH_THREAD
+
+def stop_scripmaster_refresh():
+    _REFRESH_STOP.set()
+
+def master_ready() -> Future:
+    return _MASTER_READY
+
+def wait_for_master(timeout=None) -> pd.DataFrame:
+    """Block until the scripmaster is loaded (by the background loader or anyone else)."""
+    return _MASTER_READY.result(timeout)
+
+def get_instrument(token: str):
+    """O(1) lookup of the Instrument record for a scripname, or None."""
+    return _current_master().index.get(token.strip().upper())
+
+def get_all_scripnames() -> set:
+    return set(_current_master().index)
 
 
 def get_valid_expiries(code: str) -> list:
-    global _MASTER_DF
-    if _MASTER_DF is None:
-        load_scripmaster()
+    master = _current_master()
     code = code.strip().upper()
-
     code = UNDERLYING_MAP.get(code, code)  # Map to scripmaster code
-    expiries = set()
-    for s in _MASTER_DF["scripname"]:
-        parts = s.split()
-        if len(parts) >= 4 and parts[0].upper() == code:
-            expiries.add(parts[1])
-    return sorted(expiries, key=lambda x: pd.Timestamp(x))
+    expiries, _ = master.chain.get(code, ([], {}))
+    return list(expiries)
 
 
 def get_valid_strikes(code: str, expiry: str, opt_type: str) -> list:
-    global _MASTER_DF
-    if _MASTER_DF is None:
-        load_scripmaster()
+    master = _current_master()
     code = code.strip().upper()
     code = UNDERLYING_MAP.get(code, code)
     expiry = expiry.strip().upper()
     opt_type = opt_type.strip().upper()
-    strikes = set()
-    for s in _MASTER_DF["scripname"]:
-        parts = s.split()
-        if (len(parts) >= 4 and
-            parts[0].upper() == code and
-            parts[1].upper() == expiry and
-            parts[2].upper() == opt_type):
-            strikes.add(parts[3])
-    return sorted(strikes, key=lambda x: float(x))
+    _, strikes_by_expiry = master.chain.get(code, ([], {}))
+    return list(strikes_by_expiry.get(expiry, {}).get(opt_type, []))
 
 def get_lot_size(token: str):
-    global _MASTER_DF
-    if _MASTER_DF is None:
-        load_scripmaster()
+    master = _current_master()
     parts = token.strip().split()
     if len(parts) < 4:
         return None
     code, expiry, opt_type, strike = parts[0].upper(), parts[1].upper(), parts[2].upper(), parts[3]
     # Apply mapping for SENSEX/BANKEX etc
-    from utils.load_tokken import UNDERLYING_MAP
     code = UNDERLYING_MAP.get(code, code)
-    row = _MASTER_DF[
-        (_MASTER_DF["scripname"].str.upper() == f"{code} {expiry} {opt_type} {strike}") |
-        (_MASTER_DF["scripname"].str.upper().str.startswith(f"{code} {expiry} {opt_type} {strike}"))
-    ]
+    name = f"{code} {expiry} {opt_type} {strike}".upper()
+    inst = master.index.get(name)
+    if inst is not None:
+        return inst.lot_size
+    # Rare: only a prefix match exists, fall back to a (memoized) scan
+    if name in master.prefix_lots:
+        return master.prefix_lots[name]
+    lot_size = None
+    df = master.df
+    row = df[df["scripname"].str.upper().str.startswith(name)]
     if not row.empty:
         try:
-            return int(row.iloc[0]["marketlot"])
+            lot_size = int(row.iloc[0]["marketlot"])
         except Exception:
             pass
-    return None
+    master.prefix_lots[name] = lot_size
+    return lot_size
 
 def get_exchange_from_scripmaster(token: str):
-    global _MASTER_DF
-    if _MASTER_DF is None:
-        load_scripmaster()
-    row = _MASTER_DF[_MASTER_DF["scripname"].str.upper() == token.upper()]
-    if not row.empty:
-        if row.iloc[0]["exchangename"]=="NSEFO":
-            return "NFO"
-        else:
-            return "BFO"
-    return None
+    inst = get_instrument(token)
+    return inst.exchange if inst is not None else None
@@ -1,9 +1,38 @@
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import HTTPError
 
+DEFAULT_POOL_SIZE = 16
+
+_shared_sessions = {}
+_shared_sessions_lock = threading.Lock()
+
+def shared_session(pool_size=DEFAULT_POOL_SIZE):
+    '''
+    Description: Returns the process-wide keep-alive session for the given pool size.
+
+        Every IB_APIS instance built with the same pool size shares one session, so
+        all bridge objects reuse the same persistent TCP connections. The underlying
+        urllib3 connection pool is thread-safe; pool_size is the number of idle
+        connections kept open per host, i.e. how many threads can hit the bridge
+        concurrently without opening a new socket.
+    '''
+    with _shared_sessions_lock:
+        session = _shared_sessions.get(pool_size)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["Connection"] = "keep-alive"
+            _shared_sessions[pool_size] = session
+        return session
+
 class IB_APIS:
     source_url = ""
     timeout    = 0
+    session    = None
 
     # Response code
     OK_STATUS          = 200 #OK means Success
@@ -20,9 +49,10 @@ class IB_APIS:
     INTERNAL_SERV_ERROR = 500 #Internal Server Error means Failure
     '''
 
-    def __init__(self, source_url, timeout=0):
+    def __init__(self, source_url, timeout=0, session=None, pool_size=DEFAULT_POOL_SIZE):
         self.source_url = source_url
         self.timeout    = timeout
+        self.session    = session if session is not None else shared_session(pool_size)
 
     def _Check_Status(self, response):
         if ("status" not in response.text):
@@ -51,7 +81,7 @@ class IB_APIS:
         '''
         url = self.source_url + "/Ping"
         try:
-            response = requests.get(url)
+            response = self.session.get(url)
             if(self._Check_Status(response)):
                 return True
             else:
@@ -83,7 +113,7 @@ class IB_APIS:
         url = self.source_url + "/SquareOff"
         data = {'UserId': UserID }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return True
             else:
@@ -105,7 +135,7 @@ class IB_APIS:
         '''
         url = self.source_url + "/SquareOffAll"
         try:
-            response = requests.post(url)
+            response = self.session.post(url)
             if(self._Check_Status(response)):
                 return True
             else:
@@ -135,7 +165,7 @@ class IB_APIS:
         url = self.source_url + "/SquareOffStrategy"
         data = {'StrategyTag': StrategyTag }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return True
             else:
@@ -161,7 +191,7 @@ class IB_APIS:
         url = self.source_url + "/MTM"
         data = {'UserID': UserID }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return True
             else:
@@ -189,7 +219,7 @@ class IB_APIS:
         url = self.source_url + "/AvailableMargin"
         data = {'UserID': UserID }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return float(response.json()['response'])
 
@@ -217,7 +247,7 @@ class IB_APIS:
         url = self.source_url + "/AvailableMarginCommodity"
         data = {'UserID': UserID }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return float(response.json()['response'])
 
@@ -270,7 +300,7 @@ class IB_APIS:
                 'OptionsType':OptionsType, 
                 'ScheduleTime': ScheduleTime }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return int(response.json()['response'])
 
@@ -320,7 +350,7 @@ class IB_APIS:
                 'SignalLTP':SignalLTP, 
                 'OptionsType':OptionsType }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return int(response.json()['response'])
 
@@ -360,7 +390,7 @@ class IB_APIS:
                 'Quantity':Quantity,                 
                 'SignalLTP':SignalLTP }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return int(response.json()['response'])
 
@@ -390,7 +420,7 @@ class IB_APIS:
                 'TransactionType':TransactionType,                
                 'SignalLTP':SignalLTP }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return int(response.json()['response'])
 
@@ -449,7 +479,7 @@ class IB_APIS:
                 'SignalLTP':SignalLTP, 
                 'DataProvider': DataProvider }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return int(response.json()['response'])
 
@@ -519,7 +549,7 @@ class IB_APIS:
                 'TriggerSpread':TriggerSpread, 
                 'CancelIfNotCompleteInSeconds':CancelIfNotCompleteInSeconds }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return int(response.json()['response'])
 
@@ -561,7 +591,7 @@ class IB_APIS:
                 'TgtTrailingValue':TgtTrailingValue, 
                 'BreakEvenPoint':BreakEvenPoint }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return True
             else:
@@ -595,7 +625,7 @@ class IB_APIS:
         url = self.source_url + "/CancelOrExitOrder"
         data = {'RequestID': RequestID }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return True
             else:
@@ -623,7 +653,7 @@ class IB_APIS:
                 'Symbol': Symbol,
                 'DataProvider': DataProvider }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return
                 
@@ -647,7 +677,7 @@ class IB_APIS:
                 'Symbol': Symbol,
                 'DataProvider': DataProvider }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return float(response.json()['response'])
 
@@ -671,7 +701,7 @@ class IB_APIS:
                 'Symbol': Symbol,
                 'DataProvider': DataProvider }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return float(response.json()['response'])
 
@@ -695,7 +725,7 @@ class IB_APIS:
                 'Symbol': Symbol,
                 'DataProvider': DataProvider }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return float(response.json()['response'])
 
@@ -723,7 +753,7 @@ class IB_APIS:
                 'BID': BID,
                 'ASK': ASK }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return
 
@@ -743,7 +773,7 @@ class IB_APIS:
         url = self.source_url + "/OrderID"
         data = {'RequestID': RequestID }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return str(response.json()['response'])
 
@@ -762,7 +792,7 @@ class IB_APIS:
         url = self.source_url + "/LastOrderID"
         data = {'UserID': UserID }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return str(response.json()['response'])
 
@@ -792,7 +822,7 @@ class IB_APIS:
         url = self.source_url + "/OrderStatus"
         data = {'RequestID': RequestID }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return str(response.json()['response'])
 
@@ -812,7 +842,7 @@ class IB_APIS:
         url = self.source_url + "/OrderQty"
         data = {'OrderID': OrderID }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return int(response.json()['response'])
 
@@ -832,7 +862,7 @@ class IB_APIS:
         url = self.source_url + "/OrderFilledQty"
         data = {'OrderID': OrderID }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return int(response.json()['response'])
 
@@ -852,7 +882,7 @@ class IB_APIS:
         url = self.source_url + "/OrderAvgPrice"
         data = {'OrderID': OrderID }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return float(response.json()['response'])
 
@@ -872,7 +902,7 @@ class IB_APIS:
         url = self.source_url + "/IsOrderOpen"
         data = {'RequestID': RequestID }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return True
             else:
@@ -894,7 +924,7 @@ class IB_APIS:
         url = self.source_url + "/IsOrderRejected"
         data = {'RequestID': RequestID }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return True
             else:
@@ -916,7 +946,7 @@ class IB_APIS:
         url = self.source_url + "/IsOrderCompleted"
         data = {'RequestID': RequestID }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return True
             else:
@@ -939,7 +969,7 @@ class IB_APIS:
         url = self.source_url + "/IsOrderCancelled"
         data = {'UniqueID': RequestID }
         try:
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if(self._Check_Status(response)):
                 return True
             else:
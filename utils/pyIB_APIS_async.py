@@ -0,0 +1,213 @@
+import asyncio
+import threading
+import aiohttp
+
+from utils.pyIB_APIS import DEFAULT_POOL_SIZE
+
+
+class AsyncIB_APIS:
+    '''
+    Description: asyncio counterpart of utils.pyIB_APIS.IB_APIS.
+
+        Same method names, parameters and return values, but every call is a coroutine
+        so many bridge requests can be in flight at once on a single event loop, e.g.
+        await asyncio.gather(*(api.IB_LTP(ex, sym) for ex, sym in legs)).
+        All calls share one aiohttp session whose connector keeps up to pool_size
+        keep-alive connections open to the bridge.
+    '''
+
+    def __init__(self, source_url, timeout=0, pool_size=DEFAULT_POOL_SIZE):
+        self.source_url = source_url
+        self.timeout    = timeout
+        self.pool_size  = pool_size
+        self._session   = None
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            timeout = aiohttp.ClientTimeout(total=self.timeout) if self.timeout else None
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def _call(self, endpoint, data=None, method="POST"):
+        '''
+        Sends one request and applies the same checks as IB_APIS._Check_Status.
+        Returns the decoded JSON on success, False on a bridge-reported error and
+        None if the bridge could not be reached.
+        '''
+        url = self.source_url + endpoint
+        form = {k: str(v) for k, v in data.items()} if data else None
+        try:
+            session = await self._get_session()
+            async with session.request(method, url, data=form) as response:
+                text = await response.text()
+                if ("status" not in text):
+                    raise ValueError("LOG_ERROR::  " + text)
+                if response.status != 200:
+                    raise ValueError("LOG_ERROR_CODE::  Getting Error code:" + str(response.status))
+                payload = await response.json(content_type=None)
+            if payload['status'] == 'error':
+                print("LOG_RESPONSE_ERROR::  " + payload['error'])
+                return False
+            return payload
+        except ValueError as er:
+            print(er.args)
+        except Exception:
+            print("LOG_INFO:: Host Server Not Reachable")
+        return None
+
+    async def _bool(self, endpoint, data=None, method="POST"):
+        payload = await self._call(endpoint, data, method)
+        if payload is None:
+            return None
+        return payload is not False
+
+    async def _value(self, endpoint, data, cast):
+        payload = await self._call(endpoint, data)
+        if payload:
+            return cast(payload['response'])
+        return None
+
+    # Bridge / account
+    async def IB_Ping(self):
+        return await self._bool("/Ping", method="GET")
+
+    async def IB_SquareOff(self, UserID:str):
+        return await self._bool("/SquareOff", {'UserId': UserID})
+
+    async def IB_SquareOffAll(self):
+        return await self._bool("/SquareOffAll")
+
+    async def IB_SquareOffStrategy(self, StrategyTag:str):
+        return await self._bool("/SquareOffStrategy", {'StrategyTag': StrategyTag})
+
+    # Orders
+    async def IB_PlaceOrder(self, UniqueID:int, StrategyTag:str, UserID:str, Exchange:str, Symbol:str,
+                            TransactionType:str, OrderType:str, ProductType:str, Price:float,
+                            TriggerPrice:float, ProfitValue:str, StoplossValue:str, Quantity:int,
+                            Validity:str="", SLTrailingValue:str="", DisclosedQuantity:str="",
+                            SignalLTP:str="", DataProvider:str=""):
+        data = {'UniqueID': UniqueID, 'StrategyTag': StrategyTag, 'UserID': UserID,
+                'Exchange': Exchange, 'Symbol': Symbol, 'TransactionType': TransactionType,
+                'OrderType': OrderType, 'Validity': Validity, 'ProductType': ProductType,
+                'Quantity': Quantity, 'Price': Price, 'TriggerPrice': TriggerPrice,
+                'ProfitValue': ProfitValue, 'StoplossValue': StoplossValue,
+                'SLTrailingValue': SLTrailingValue, 'DisclosedQuantity': DisclosedQuantity,
+                'SignalLTP': SignalLTP, 'DataProvider': DataProvider}
+        return await self._value("/PlaceOrder", data, int)
+
+    async def IB_PlaceOrderAdv(self, UniqueID:int, StrategyTag:str, UserID:str, Exchange:str, Symbol:str,
+                               TransactionType:str, OrderType:str, ProductType:str, Price:float,
+                               TriggerPrice:float, ProfitValue:str, StoplossValue:str, Quantity:int,
+                               Validity:str="", SLTrailingValue:str="", DisclosedQuantity:str="",
+                               DataProvider:str="", TgtTrailingValue:str="", BreakEvenPoint:str="",
+                               SignalLTP:str="", MaxLTPDifference:str="", PriceSpread:str="",
+                               TriggerSpread:str="", CancelIfNotCompleteInSeconds:int=5):
+        data = {'UniqueID': UniqueID, 'StrategyTag': StrategyTag, 'UserID': UserID,
+                'Exchange': Exchange, 'Symbol': Symbol, 'TransactionType': TransactionType,
+                'OrderType': OrderType, 'Validity': Validity, 'ProductType': ProductType,
+                'Quantity': Quantity, 'Price': Price, 'TriggerPrice': TriggerPrice,
+                'ProfitValue': ProfitValue, 'StoplossValue': StoplossValue,
+                'SLTrailingValue': SLTrailingValue, 'DisclosedQuantity': DisclosedQuantity,
+                'DataProvider': DataProvider, 'TgtTrailingValue': TgtTrailingValue,
+                'BreakEvenPoint': BreakEvenPoint, 'SignalLTP': SignalLTP,
+                'MaxLTPDifference': MaxLTPDifference, 'PriceSpread': PriceSpread,
+                'TriggerSpread': TriggerSpread,
+                'CancelIfNotCompleteInSeconds': CancelIfNotCompleteInSeconds}
+        return await self._value("/PlaceOrderAdv", data, int)
+
+    async def IB_ModifyOrder(self, RequestID:int, Price:float, TriggerPrice:float, ProfitValue:str,
+                             StoplossValue:str, Quantity:int, SLTrailingValue:str="",
+                             TgtTrailingValue:str="", BreakEvenPoint:str=""):
+        data = {'RequestID': RequestID, 'Quantity': Quantity, 'Price': Price,
+                'TriggerPrice': TriggerPrice, 'ProfitValue': ProfitValue,
+                'StoplossValue': StoplossValue, 'SLTrailingValue': SLTrailingValue,
+                'TgtTrailingValue': TgtTrailingValue, 'BreakEvenPoint': BreakEvenPoint}
+        return await self._bool("/ModifyOrder", data)
+
+    async def IB_CancelOrExitOrder(self, RequestID:int):
+        return await self._bool("/CancelOrExitOrder", {'RequestID': RequestID})
+
+    # Market data
+    async def IB_Subscribe(self, Exchange:str, Symbol:str, DataProvider:str=""):
+        await self._call("/Subscribe", {'Exchange': Exchange, 'Symbol': Symbol, 'DataProvider': DataProvider})
+
+    async def IB_LTP(self, Exchange:str, Symbol:str, DataProvider:str=""):
+        return await self._value("/LTP", {'Exchange': Exchange, 'Symbol': Symbol, 'DataProvider': DataProvider}, float)
+
+    async def IB_BID(self, Exchange:str, Symbol:str, DataProvider:str=""):
+        return await self._value("/BID", {'Exchange': Exchange, 'Symbol': Symbol, 'DataProvider': DataProvider}, float)
+
+    async def IB_ASK(self, Exchange:str, Symbol:str, DataProvider:str=""):
+        return await self._value("/ASK", {'Exchange': Exchange, 'Symbol': Symbol, 'DataProvider': DataProvider}, float)
+
+    # Order status
+    async def IB_OrderID(self, RequestID:int):
+        return await self._value("/OrderID", {'RequestID': RequestID}, str)
+
+    async def IB_OrderStatus(self, RequestID:int):
+        return await self._value("/OrderStatus", {'RequestID': RequestID}, str)
+
+    async def IB_OrderQty(self, OrderID:int):
+        return await self._value("/OrderQty", {'OrderID': OrderID}, int)
+
+    async def IB_OrderFilledQty(self, OrderID:int):
+        return await self._value("/OrderFilledQty", {'OrderID': OrderID}, int)
+
+    async def IB_OrderAvgPrice(self, OrderID:int):
+        return await self._value("/OrderAvgPrice", {'OrderID': OrderID}, float)
+
+    async def IB_IsOrderOpen(self, RequestID:int):
+        return await self._bool("/IsOrderOpen", {'RequestID': RequestID})
+
+    async def IB_IsOrderRejected(self, RequestID:int):
+        return await self._bool("/IsOrderRejected", {'RequestID': RequestID})
+
+    async def IB_IsOrderCompleted(self, RequestID:int):
+        return await self._bool("/IsOrderCompleted", {'RequestID': RequestID})
+
+    async def IB_IsOrderCancelled(self, RequestID:int):
+        return await self._bool("/IsOrderCancelled", {'UniqueID': RequestID})
+
+
+class BridgeLoop:
+    '''
+    Description: Owns one asyncio event loop running on a daemon thread.
+
+        Synchronous code (the executor, the quote feed, the GUI) hands coroutines to
+        this loop with submit(), which returns a concurrent.futures.Future, or with
+        run(), which blocks for the result. Every AsyncIB_APIS call therefore shares
+        one thread and one connection pool instead of an OS thread per request.
+    '''
+
+    def __init__(self, name="BridgeLoop"):
+        self.name = name
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_running(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name=self.name, daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_running())
+
+    def run(self, coro, timeout=None):
+        return self.submit(coro).result(timeout)
+
+    def in_loop_thread(self):
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def stop(self):
+        with self._lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)